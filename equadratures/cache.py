@@ -0,0 +1,47 @@
+"""Bounded caches and fingerprints shared by the solvers, parameters and distributions."""
+import numpy as np
+import hashlib
+
+def add_to_cache(cache, key, value, cache_size):
+    """
+    Adds a value to a bounded dict cache. Once the cache holds cache_size entries, the oldest entry is evicted first; dicts
+    preserve insertion order.
+
+    :param dict cache:
+        The cache.
+    :param key:
+        A hashable key.
+    :param value:
+        The value to be cached.
+    :param int cache_size:
+        The largest number of entries in the cache. If it is zero, nothing is cached.
+    :return:
+        **value**: The value.
+    """
+    if cache_size <= 0:
+        return value
+    cache.pop(key, None)
+    while len(cache) >= cache_size:
+        del cache[next(iter(cache))]
+    cache[key] = value
+    return value
+def get_fingerprint(*items):
+    """
+    Returns a hexadecimal BLAKE2 digest of the given items. numpy.ndarrays are hashed by their dtype, shape and contents, and all
+    other items by their repr.
+
+    :param items:
+        The items to be hashed.
+    :return:
+        **fingerprint**: A string of 32 hexadecimal characters.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for item in items:
+        if isinstance(item, np.ndarray):
+            item = np.ascontiguousarray(item)
+            digest.update((str(item.dtype) + str(item.shape)).encode())
+            digest.update(item.tobytes())
+        else:
+            digest.update(repr(item).encode())
+        digest.update(b'|')
+    return digest.hexdigest()
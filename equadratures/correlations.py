@@ -108,7 +108,7 @@ class Correlations(object):
             S_samples = self.get_correlated_samples(N=N_Psi)
             w_weights = 1.0 / N_Psi * np.ones(N_Psi)
             Psi = poly.get_poly(S_samples).T
-            WPsi = np.diag(np.sqrt(w_weights)) @ Psi
+            WPsi = np.sqrt(w_weights).reshape(-1, 1) * Psi
             self.WPsi = WPsi
 
             R_Psi = np.linalg.qr(WPsi)[1]
@@ -121,8 +121,7 @@ class Correlations(object):
             self.corrected_poly._set_points_and_weights()
 
             P = self.corrected_poly.get_poly(self.corrected_poly._quadrature_points)
-            W = np.mat(np.diag(np.sqrt(self.corrected_poly._quadrature_weights)))
-            A = W * P.T
+            A = np.sqrt(self.corrected_poly._quadrature_weights).reshape(-1, 1) * P.T
             self.corrected_poly.A = A
             self.corrected_poly.P = P
 
@@ -142,7 +141,7 @@ class Correlations(object):
 
         """
         return self._points
-    def set_model(self, model=None, model_grads=None):
+    def set_model(self, model=None, model_grads=None, vectorized=False, executor=None, chunksize=None):
         """
         Computes the coefficients of the polynomial.
 
@@ -152,17 +151,23 @@ class Correlations(object):
             The function that needs to be approximated. In the absence of a callable function, the input can be the function evaluated at the quadrature points.
         :param callable model_grads:
             The gradient of the function that needs to be approximated. In the absence of a callable gradient function, the input can be a matrix of gradient evaluations at the quadrature points.
+        :param bool vectorized:
+            If ``True``, the callables ``model`` and ``model_grads`` are evaluated once over the full array of correlated points, rather than once per point.
+        :param concurrent.futures.Executor executor:
+            An optional executor over which the callable ``model`` is evaluated in parallel; failed evaluations are set to NaN.
+        :param int chunksize:
+            The number of points submitted to the executor per task.
         """
         # Need to account for the nataf transform here?
         model_values = None
         model_grads_values = None
         if callable(model):
-            model_values = evaluate_model(self._points, model)
+            model_values = evaluate_model(self._points, model, vectorized=vectorized, executor=executor, chunksize=chunksize)
         else:
             model_values = model
         if model_grads is not None:
             if callable(model_grads):
-                model_grads_values = evaluate_model_gradients(self._points, model_grads)
+                model_grads_values = evaluate_model_gradients(self._points, model_grads, 'matrix', vectorized=vectorized)
             else:
                 model_grads_values = model_grads
         self.corrected_poly.set_model(model_values, model_grads_values)
@@ -26,6 +26,15 @@ class Cauchy(Distribution):
             self.parent = cauchy(loc=self.location, scale=self.scale)
             self.mean = np.mean(self.get_samples(m=1000))
             self.variance = np.var(self.get_samples(m=1000))
+    def _get_shape_parameters(self):
+        """
+        Private method that returns the location and scale, which key the cached recurrence coefficients; the mean and variance
+        are estimated from random samples.
+
+        :param Cauchy self:
+            An instance of the Cauchy class.
+        """
+        return [self.location, self.scale, self.x_range_for_pdf[0], self.x_range_for_pdf[-1]]
     def get_description(self):
         """
         A description of the Cauchy distribution.
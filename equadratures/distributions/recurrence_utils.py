@@ -1,6 +1,19 @@
 """Recurrence coefficients class."""
 import numpy as np
+import warnings
 from scipy.special import erf, erfinv, gamma, beta, betainc, gammainc
+# Composite Gauss-Legendre discretisation of continuous distributions: points per panel, the initial and largest number of
+# panels, and the relative change in the recurrence coefficients at which the refinement stops.
+RECURRENCE_GAUSS_LEGENDRE_POINTS = 20
+RECURRENCE_MINIMUM_PANELS = 16
+RECURRENCE_MAXIMUM_PANELS = 2048
+RECURRENCE_TOLERANCE = 1e-10
+# Number of samples of the density used to locate the edges of its support.
+RECURRENCE_SUPPORT_SAMPLES = 1001
+# The end panels are graded geometrically towards the edges of the support, by this ratio, until their width is at most this
+# fraction of a uniform panel; this resolves integrable singularities of the density at the edges (e.g., chi-squared with k=1).
+RECURRENCE_GRADING_RATIO = 0.15
+RECURRENCE_GRADING_DEPTH = 1e-20
 def laguerre_recurrence_coefficients(a, order):
     """
     Returns the Laguerre recurrence coefficients.
@@ -100,52 +113,123 @@ def hermite_recurrence_coefficients(param_A, param_B, order):
     return ab
 def custom_recurrence_coefficients(x, w, order):
     """
-    Returns the custom recurrence coefficients.
+    Returns the custom recurrence coefficients of a discrete measure, using the Stieltjes procedure. The polynomials are normalised
+    at every step, so that they neither overflow nor underflow at high order.
 
     :param array x:
-        Equidistant values of the support of the distribution.
+        Points of the support of the distribution.
     :param array w:
         Probability density function weights associated with the distribution.
     :param int order:
         Order of the recurrence coefficients requested.
     :return:
-        (order+1)-by-2 numpy array of the Hermite recurrence coefficients.
+        (order+2)-by-2 numpy array of the recurrence coefficients.
     """
-
-    # Allocate memory for recurrence coefficients
     order = int(order)+1
+    x = np.asarray(x, dtype=float).reshape(-1)
+    w = np.asarray(w, dtype=float).reshape(-1)
     w = w / np.sum(w)
     ab = np.zeros((order+1,2))
 
     # Negate "zero" components
-    nonzero_indices = []
-    for i in range(0, len(x)):
-        if w[i] != 0:
-            nonzero_indices.append(i)
-
-    ncap = len(nonzero_indices)
-    x = x[nonzero_indices] # only keep entries at the non-zero indices!
-    w = w[nonzero_indices]
+    nonzero = w != 0
+    x, w = x[nonzero], w[nonzero]
     s = np.sum(w)
-    temp = w/s
-    ab[0,0] = np.dot(x, temp.T)
+    ab[0,0] = np.dot(w, x) / s
     ab[0,1] = s
 
     if order == 1:
         return ab
 
-    p1 = np.zeros((1, ncap))
-    p2 = np.ones((1, ncap))
-
+    # q0 and q1 are the previous and current orthonormal polynomials evaluated at x.
+    q0 = np.zeros(len(x))
+    q1 = np.ones(len(x)) / np.sqrt(s)
     for j in range(0, order):
-        p0 = p1
-        p1 = p2
-        p2 = ( x - ab[j,0] ) * p1 - ab[j,1] * p0
-        p2_squared = p2**2
-        s1 = np.dot(w, p2_squared.T)
-        inner = w * p2_squared
-        s2 = np.dot(x, inner.T)
-        ab[j+1,0] = s2/s1
-        ab[j+1,1] = s1/s
-        s = s1
-    return ab
\ No newline at end of file
+        q2 = (x - ab[j,0]) * q1 - (np.sqrt(ab[j,1]) if j > 0 else 0.0) * q0
+        w_q2_squared = w * q2**2
+        s1 = np.sum(w_q2_squared)
+        ab[j+1,0] = np.dot(x, w_q2_squared) / s1
+        ab[j+1,1] = s1
+        q0, q1 = q1, q2 / np.sqrt(s1)
+    return ab
+def discretised_recurrence_coefficients(pdf, lower, upper, order, tolerance=RECURRENCE_TOLERANCE):
+    """
+    Returns the recurrence coefficients of a continuous distribution over [lower, upper]. The range is first clipped to where the
+    density is positive, so that no panel straddles a jump at the edge of the support. The measure is then discretised with a
+    composite Gauss-Legendre rule, whose end panels are graded geometrically towards the edges of the support, and the number of
+    panels is doubled until the recurrence coefficients agree over two consecutive refinements.
+
+    :param callable pdf:
+        The probability density function of the distribution, evaluated at an array of points.
+    :param double lower:
+        Lower bound of the (truncated) support of the distribution.
+    :param double upper:
+        Upper bound of the (truncated) support of the distribution.
+    :param int order:
+        Order of the recurrence coefficients requested.
+    :param double tolerance:
+        The relative change in the recurrence coefficients, between successive refinements, below which they are converged.
+    :return:
+        (order+2)-by-2 numpy array of the recurrence coefficients.
+    """
+    lower, upper = _get_positive_support(pdf, lower, upper)
+    points, weights = np.polynomial.legendre.leggauss(RECURRENCE_GAUSS_LEGENDRE_POINTS)
+    panels = max(RECURRENCE_MINIMUM_PANELS, int(np.ceil(2.0 * (int(order) + 2) / RECURRENCE_GAUSS_LEGENDRE_POINTS)))
+    ab = None
+    agreements = 0
+    while True:
+        edges = _get_graded_edges(lower, upper, panels)
+        half_widths = 0.5 * np.diff(edges).reshape(-1, 1)
+        x = (0.5 * (edges[:-1] + edges[1:])).reshape(-1, 1) + half_widths * points.reshape(1, -1)
+        w = np.asarray(pdf(x.reshape(-1)), dtype=float).reshape(-1) * (half_widths * weights.reshape(1, -1)).reshape(-1)
+        ab_new = custom_recurrence_coefficients(x.reshape(-1), w, order)
+        if ab is not None and np.all(np.abs(ab_new - ab) <= tolerance * np.maximum(np.abs(ab_new), 1.0)):
+            agreements += 1
+        else:
+            agreements = 0
+        ab = ab_new
+        if agreements >= 2:
+            return ab
+        if panels >= RECURRENCE_MAXIMUM_PANELS:
+            warnings.warn('The recurrence coefficients did not converge with '+str(panels)+' Gauss-Legendre panels.', RuntimeWarning)
+            return ab
+        panels = 2 * panels
+def _get_graded_edges(lower, upper, panels):
+    """
+    Private function that returns the edges of panels of equal width over [lower, upper], where the first and last panels are
+    subdivided geometrically towards lower and upper respectively. The grading towards each end stops before the panels are too
+    narrow to be resolved in floating point arithmetic at that end.
+    """
+    edges = np.linspace(lower, upper, panels + 1)
+    width = edges[1] - edges[0]
+    offsets = []
+    for end in [lower, upper]:
+        smallest_width = max(RECURRENCE_GRADING_DEPTH * width, 100.0 * np.finfo(float).eps * abs(end))
+        layers = max(int(np.ceil(np.log(smallest_width / width) / np.log(RECURRENCE_GRADING_RATIO))), 0)
+        offsets.append(width * RECURRENCE_GRADING_RATIO ** np.arange(layers, 0, -1))
+    return np.concatenate([[lower], lower + offsets[0], edges[1:-1], upper - offsets[1][::-1], [upper]])
+def _get_positive_support(pdf, lower, upper):
+    """
+    Private function that clips [lower, upper] to the smallest interval outside which the density is zero, locating each end by
+    bisection between the first (or last) positive sample of the density and its zero neighbour.
+    """
+    x = np.linspace(lower, upper, RECURRENCE_SUPPORT_SAMPLES)
+    positive = np.where(np.asarray(pdf(x), dtype=float).reshape(-1) > 0)[0]
+    if len(positive) == 0:
+        return lower, upper
+    ends = []
+    for inside, outside in [(positive[0], positive[0] - 1), (positive[-1], positive[-1] + 1)]:
+        if outside < 0 or outside >= len(x):
+            ends.append(x[inside])
+            continue
+        x_inside, x_outside = x[inside], x[outside]
+        for _ in range(0, 100):
+            middle = 0.5 * (x_inside + x_outside)
+            if middle == x_inside or middle == x_outside:
+                break
+            if np.asarray(pdf(np.array([middle])), dtype=float).reshape(-1)[0] > 0:
+                x_inside = middle
+            else:
+                x_outside = middle
+        ends.append(x_inside)
+    return ends[0], ends[1]
@@ -1,10 +1,19 @@
 """The Distribution template."""
 
-from equadratures.distributions.recurrence_utils import custom_recurrence_coefficients
+from equadratures.distributions.recurrence_utils import discretised_recurrence_coefficients
+from equadratures.cache import add_to_cache, get_fingerprint
 
 import numpy as np
+import numbers, os
 
 PDF_SAMPLES = 500000
+# Recurrence coefficients are cached in memory, keyed by a hash of the distribution type, its shape parameters and the order. If
+# the environment variable below names a directory, they are also stored there, so that they are shared across processes. The
+# version is part of the key, and must change whenever the way they are computed does.
+RECURRENCE_CACHE_SIZE = 64
+RECURRENCE_CACHE_VARIABLE = 'EQUADRATURES_RECURRENCE_CACHE'
+RECURRENCE_CACHE_VERSION = 4
+_recurrence_coefficients_cache = {}
 
 class Distribution(object):
     """
@@ -61,7 +70,8 @@ class Distribution(object):
         pass
     def get_recurrence_coefficients(self, order):
         """
-        Recurrence coefficients for the distribution
+        Recurrence coefficients for the distribution. The measure is discretised with a composite Gauss-Legendre rule over
+        the range of x_range_for_pdf, which is refined until the coefficients converge.
 
         :param Distribution self:
             An instance of the distribution class.
@@ -70,9 +80,25 @@ class Distribution(object):
         :return:
             Recurrence coefficients associated with the distribution.
         """
-        w_pdf = self.get_pdf(self.x_range_for_pdf)
-        ab = custom_recurrence_coefficients(self.x_range_for_pdf, w_pdf, order)
+        lower, upper = self.x_range_for_pdf[0], self.x_range_for_pdf[-1]
+        ab = get_cached_recurrence_coefficients(type(self).__name__, self._get_shape_parameters(), order, \
+                lambda: discretised_recurrence_coefficients(self.get_pdf, lower, upper, order))
         return ab
+    def _get_shape_parameters(self):
+        """
+        Private method that returns the numbers that define the distribution, and key its cached recurrence coefficients: its
+        numeric attributes, its bounds, and the range of x_range_for_pdf. Distributions with attributes that are estimated from
+        random samples override it.
+
+        :param Distribution self:
+            An instance of the distribution class.
+        """
+        shape_parameters = []
+        for name in sorted(vars(self)):
+            value = getattr(self, name)
+            if isinstance(value, numbers.Number) or name == 'bounds':
+                shape_parameters.extend([name, value])
+        return shape_parameters + [self.x_range_for_pdf[0], self.x_range_for_pdf[-1]]
     def get_samples(self, m=None):
         """
         Generates samples from the distribution.
@@ -91,3 +117,47 @@ class Distribution(object):
         uniform_samples = np.random.random((number_of_random_samples, 1))
         yy = self.get_icdf(uniform_samples)
         return yy
+def get_cached_recurrence_coefficients(name, shape_parameters, order, get_coefficients):
+    """
+    Returns the recurrence coefficients of a distribution from a cache in memory and, if the environment variable named by
+    RECURRENCE_CACHE_VARIABLE is set to a directory, on disk.
+
+    :param string name:
+        The type of the distribution.
+    :param list shape_parameters:
+        The numbers (or numpy.ndarrays) that define the distribution, and the range over which it is discretised.
+    :param int order:
+        Order of the recurrence coefficients requested.
+    :param callable get_coefficients:
+        A function without arguments that computes the recurrence coefficients on a cache miss.
+    :return:
+        (order+2)-by-2 numpy array of the recurrence coefficients.
+    """
+    order = int(order)
+    key = get_fingerprint(name, order, RECURRENCE_CACHE_VERSION, *shape_parameters)
+    if key in _recurrence_coefficients_cache:
+        return _recurrence_coefficients_cache[key].copy()
+    ab = None
+    filename = None
+    directory = os.environ.get(RECURRENCE_CACHE_VARIABLE)
+    if directory:
+        filename = os.path.join(directory, key + '.npy')
+        try:
+            ab = np.load(filename)
+        except (OSError, ValueError):
+            ab = None
+        if ab is not None and ab.shape != (order + 2, 2):
+            ab = None
+    if ab is None:
+        ab = np.asarray(get_coefficients(), dtype=float)
+        if filename is not None:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                # Write to a file unique to this process and rename it, so that concurrent workers never read a partial file.
+                temporary_filename = filename + '.' + str(os.getpid()) + '.tmp.npy'
+                np.save(temporary_filename, ab)
+                os.replace(temporary_filename, filename)
+            except OSError:
+                pass
+    add_to_cache(_recurrence_coefficients_cache, key, ab, RECURRENCE_CACHE_SIZE)
+    return ab.copy()
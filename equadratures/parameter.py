@@ -17,8 +17,10 @@ from equadratures.distributions.logistic import Logistic
 from equadratures.distributions.gumbel import Gumbel
 from equadratures.distributions.chi import Chi
 from equadratures.distributions.analytical import Analytical
+from equadratures.cache import add_to_cache
 import numpy as np
 import scipy as sc
+RECURRENCE_COEFFICIENTS_CACHE_SIZE = 16
 
 class Parameter(object):
     """
@@ -127,6 +129,8 @@ class Parameter(object):
             self.distribution = Lognormal(self.shape_parameter_A)
         else:
             distribution_error()
+        self._recurrence_coefficients_cache = {}
+        self._linearisation_coefficients_cache = {}
         self.mean = self.distribution.mean
         self.variance = self.distribution.variance
     def _set_moments(self):
@@ -211,7 +215,50 @@ class Parameter(object):
         :param int order:
             Order of the recurrence coefficients.
         """
-        return self.distribution.get_recurrence_coefficients(order)
+        return self._get_cached_recurrence_coefficients(order).copy()
+    def _get_cached_recurrence_coefficients(self, order=None):
+        """
+        Private function that returns the recurrence coefficients from a bounded, per-parameter cache keyed by order. The returned
+        array is shared with the cache and must not be modified in place.
+
+        :param Parameter self:
+            An instance of the Parameter object.
+        :param int order:
+            Order of the recurrence coefficients.
+        """
+        if order in self._recurrence_coefficients_cache:
+            return self._recurrence_coefficients_cache[order]
+        ab = np.asarray(self.distribution.get_recurrence_coefficients(order), dtype=float)
+        return add_to_cache(self._recurrence_coefficients_cache, order, ab, RECURRENCE_COEFFICIENTS_CACHE_SIZE)
+    def _get_linearisation_coefficients(self, order):
+        """
+        Private function that returns the linearisation coefficients L of the orthonormal polynomials, with shape
+        (order+1, order+1, 2*order+1), such that phi_a * phi_b = sum_m L[a, b, m] phi_m. As the polynomials are orthonormal,
+        L[a, b, m] is also the triple product E[phi_a phi_b phi_m]. They follow from the recurrence coefficients alone: with J the
+        Jacobi matrix of size 2*order+1, phi_b(J), evaluated by the three-term recurrence, maps e_a to the coefficients of
+        phi_a * phi_b. The coefficients are kept in a bounded, per-parameter cache keyed by order, and must not be modified in place.
+
+        :param Parameter self:
+            An instance of the Parameter object.
+        :param int order:
+            The highest order of the polynomials phi_a and phi_b.
+        """
+        order = int(order)
+        if order in self._linearisation_coefficients_cache:
+            return self._linearisation_coefficients_cache[order]
+        size = 2 * order + 1
+        L = np.zeros((order + 1, order + 1, size))
+        L[:, 0, :order+1] = np.eye(order + 1)
+        if order > 0:
+            ab = self._get_cached_recurrence_coefficients(size)
+            J = self.get_jacobi_matrix(size, ab)
+            sqrt_b = np.sqrt(ab[0:size, 1])
+            phi_previous, phi = np.eye(size), (J - ab[0, 0] * np.eye(size)) / sqrt_b[1]
+            L[:, 1, :] = phi[:, 0:order+1].T
+            for u in range(2, order + 1):
+                phi_previous, phi = phi, (np.dot(J - ab[u-1, 0] * np.eye(size), phi) - sqrt_b[u-1] * phi_previous) / sqrt_b[u]
+                L[:, u, :] = phi[:, 0:order+1].T
+        return add_to_cache(self._linearisation_coefficients_cache, order, L, RECURRENCE_COEFFICIENTS_CACHE_SIZE)
     def get_jacobi_eigenvectors(self, order=None):
         """
         Computes the eigenvectors of the Jacobi matrix.
@@ -272,7 +319,7 @@ class Parameter(object):
             JacobiMatrix[order-1, order-1] = ab[order-1,0]
             JacobiMatrix[order-1, order-2] = np.sqrt(ab[order-1,1])
         return JacobiMatrix
-    def _get_orthogonal_polynomial(self, points, order=None):
+    def _get_orthogonal_polynomial(self, points, order=None, derivatives=2):
         """
         Private function that evaluates the univariate orthogonal polynomial at quadrature points.
 
@@ -282,58 +329,43 @@ class Parameter(object):
             Points at which the orthogonal polynomial must be evaluated.
         :param int order:
             Order up to which the orthogonal polynomial must be obtained.
+        :param int derivatives:
+            The highest derivative of the orthogonal polynomial that is required: ``0`` for the values only, ``1`` for the values and
+            the first derivatives, and ``2`` (default) for the values, the first and the second derivatives. Derivatives that are not
+            requested are returned as None.
         """
         if order is None:
             order = self.order + 1
         else:
             order = order + 1
-        gridPoints = np.asarray(points).copy()
-        ab = self.get_recurrence_coefficients(order)
-        """
-        print('Before:')
-        print(gridPoints)
-
-        for q in range(0, gridPoints.shape[0]):
-            if (gridPoints[q] < self.bounds[0]) or (gridPoints[q] > self.bounds[1]):
-                grid_flag = 1
-        if grid_flag == 1:
-            for r in range(0, gridPoints.shape[0]):
-                gridPoints[r] = (self.bounds[1] - self.bounds[0]) * ( (gridPoints[r] - self.lower) / (self.upper - self.lower) )  + self.bounds[0]
-            #print(gridPoints)
-        print('After:')
-        print(gridPoints)
-        """
-
-        orthopoly = np.zeros((order, len(gridPoints)))  # create a matrix full of zeros
-        derivative_orthopoly = np.zeros((order, len(gridPoints)))
-        dderivative_orthopoly = np.zeros((order, len(gridPoints)))
+        gridPoints = np.asarray(points, dtype=float).reshape(-1)
+        ab = self._get_cached_recurrence_coefficients(order)
+        sqrt_ab = np.sqrt(ab[0:order, 1])
+        no_of_points = len(gridPoints)
 
-        # Convert the grid points to a numpy array -- simplfy life!
-        gridPointsII = np.zeros((len(gridPoints), 1))
-        for u in range(0, len(gridPoints)):
-            gridPointsII[u, 0] = gridPoints[u]
+        orthopoly = np.zeros((order, no_of_points))  # create a matrix full of zeros
+        derivative_orthopoly = np.zeros((order, no_of_points)) if derivatives >= 1 else None
+        dderivative_orthopoly = np.zeros((order, no_of_points)) if derivatives >= 2 else None
         orthopoly[0, :] = 1.0
 
         # Cases
         if order == 1:  # CHANGED 2/2/18
             return orthopoly, derivative_orthopoly, dderivative_orthopoly
-        orthopoly[1, :] = ((gridPointsII[:, 0] - ab[0, 0]) * orthopoly[0, :])  * (1.0) / (1.0 * np.sqrt(ab[1, 1]))
-        derivative_orthopoly[1, :] = orthopoly[0, :] / (np.sqrt(ab[1, 1]))
-        if order == 2:  # CHANGED 2/2/18
-            return orthopoly, derivative_orthopoly, dderivative_orthopoly
-
-        if order >= 3:  # CHANGED 2/2/18
-            for u in range(2, order):  # CHANGED 2/2/18
-                # Three-term recurrence rule in action!
-                orthopoly[u, :] = (((gridPointsII[:, 0] - ab[u - 1, 0]) * orthopoly[u - 1, :]) - np.sqrt(
-                    ab[u - 1, 1]) * orthopoly[u - 2, :]) / (1.0 * np.sqrt(ab[u, 1]))
-            for u in range(2, order):  # CHANGED 2/2/18
+        orthopoly[1, :] = (gridPoints - ab[0, 0]) / sqrt_ab[1]
+        if derivatives >= 1:
+            derivative_orthopoly[1, :] = 1.0 / sqrt_ab[1]
+        for u in range(2, order):  # CHANGED 2/2/18
+            shifted_points = gridPoints - ab[u - 1, 0]
+            # Three-term recurrence rule in action!
+            orthopoly[u, :] = (shifted_points * orthopoly[u - 1, :] - sqrt_ab[u - 1] * orthopoly[u - 2, :]) / sqrt_ab[u]
+            if derivatives >= 1:
                 # Four-term recurrence formula for derivatives of orthogonal polynomials!
-                derivative_orthopoly[u,:] = ( ((gridPointsII[:,0] - ab[u-1,0]) * derivative_orthopoly[u-1,:]) - ( np.sqrt(ab[u-1,1]) * derivative_orthopoly[u-2,:] ) +  orthopoly[u-1,:]   )/(1.0 * np.sqrt(ab[u,1]))
-            for u in range(2,order):
+                derivative_orthopoly[u, :] = (shifted_points * derivative_orthopoly[u - 1, :] - sqrt_ab[u - 1] * derivative_orthopoly[u - 2, :] + \
+                        orthopoly[u - 1, :]) / sqrt_ab[u]
+            if derivatives >= 2:
                 # Four-term recurrence formula for second derivatives of orthogonal polynomials!
-                dderivative_orthopoly[u,:] = ( ((gridPointsII[:,0] - ab[u-1,0]) * dderivative_orthopoly[u-1,:]) - ( np.sqrt(ab[u-1,1]) * dderivative_orthopoly[u-2,:] ) +  2.0 * derivative_orthopoly[u-1,:]   )/(1.0 * np.sqrt(ab[u,1]))
-
+                dderivative_orthopoly[u, :] = (shifted_points * dderivative_orthopoly[u - 1, :] - sqrt_ab[u - 1] * dderivative_orthopoly[u - 2, :] + \
+                        2.0 * derivative_orthopoly[u - 1, :]) / sqrt_ab[u]
         return orthopoly, derivative_orthopoly, dderivative_orthopoly
     def _get_local_quadrature(self, order=None, ab=None):
         """
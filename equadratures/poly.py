@@ -5,11 +5,17 @@ from equadratures.basis import Basis
 from equadratures.solver import Solver
 from equadratures.subsampling import Subsampling
 from equadratures.quadrature import Quadrature
+from equadratures.sampling_methods.tensorgrid import LazyTensorgrid
 from equadratures.datasets import score
 import scipy.stats as st
+from scipy.linalg import solve_triangular
 import numpy as np
+import os
 from copy import deepcopy
 MAXIMUM_ORDER_FOR_STATS = 8
+POLYFIT_BLOCK_ENTRIES = 2**22
+# Marks a model evaluation that raised an exception, and is set to NaN.
+_FAILED_EVALUATION = object()
 class Poly(object):
     """
     Definition of a polynomial object.
@@ -242,8 +248,7 @@ class Poly(object):
         quadrature_points, quadrature_weights = self.quadrature.get_points_and_weights()
         if self.subsampling_algorithm_name is not None:
             P = self.get_poly(quadrature_points)
-            W = np.mat( np.diag(np.sqrt(quadrature_weights)))
-            A = W * P.T
+            A = np.sqrt(quadrature_weights).reshape(-1, 1) * P.T
             self.A = A
             self.P = P
             mm, nn = A.shape
@@ -254,11 +259,39 @@ class Poly(object):
         else:
             self._quadrature_points = quadrature_points
             self._quadrature_weights = quadrature_weights
-            P = self.get_poly(quadrature_points)
-            W = np.mat( np.diag(np.sqrt(quadrature_weights)))
-            A = W * P.T
-            self.A = A
-            self.P = P
+            self.A = None
+            self.P = None
+    @property
+    def P(self):
+        """
+        The polynomial evaluated at the quadrature points, as a numpy.ndarray of shape (cardinality, number_of_samples). Unless
+        it was required by the subsampling algorithm, it is only assembled when first accessed, so that the sum-factorised
+        projection on a tensor grid never forms it.
+
+        :param Poly self:
+            An instance of the Poly object.
+        """
+        if getattr(self, '_P', None) is None:
+            self._P = self.get_poly(self._quadrature_points)
+        return self._P
+    @P.setter
+    def P(self, P):
+        self._P = P
+    @property
+    def A(self):
+        """
+        The weighted design matrix, i.e., the transpose of P scaled row-wise by the square roots of the quadrature weights, as a
+        numpy.ndarray of shape (number_of_samples, cardinality). Like P, it is only assembled when first accessed.
+
+        :param Poly self:
+            An instance of the Poly object.
+        """
+        if getattr(self, '_A', None) is None:
+            self._A = np.sqrt(self._quadrature_weights).reshape(-1, 1) * self.P.T
+        return self._A
+    @A.setter
+    def A(self, A):
+        self._A = A
     def get_model_evaluations(self):
         """
         Returns the points at which the model was evaluated at.
@@ -275,9 +308,9 @@ class Poly(object):
             An instance of the Poly class.
 
         :return:
-            **mean**: The approximated mean of the polynomial fit; output as a float.
+            **mean**: The approximated mean of the polynomial fit; output as a float, or as a numpy.ndarray with one entry per output.
 
-            **variance**: The approximated variance of the polynomial fit; output as a float.
+            **variance**: The approximated variance of the polynomial fit; output as a float, or as a numpy.ndarray with one entry per output.
 
         """
         self._set_statistics()
@@ -290,48 +323,86 @@ class Poly(object):
             An instance of the Poly class.
 
         :return:
-            **skewness**: The approximated skewness of the polynomial fit; output as a float.
+            **skewness**: The approximated skewness of the polynomial fit; output as a float, or as a numpy.ndarray with one entry per output.
 
-            **kurtosis**: The approximated kurtosis of the polynomial fit; output as a float.
+            **kurtosis**: The approximated kurtosis of the polynomial fit; output as a float, or as a numpy.ndarray with one entry per output.
 
         """
         self._set_statistics()
         return self.statistics_object.get_skewness(), self.statistics_object.get_kurtosis()
     def _set_statistics(self):
         """
-        Private method that is used within the statistics routines.
+        Private method that is used within the statistics routines. Unless the inputs are correlated, the skewness and kurtosis
+        are computed in closed form where this is cheap; the quadrature rule required for the remaining higher order statistics
+        is only built when one of them is first requested.
 
         """
         if self.statistics_object is None:
-            if hasattr(self, 'inv_R_Psi'):
-                # quad_pts, quad_wts = self.quadrature.get_points_and_weights()
-                N_quad = 20000
-                quad_pts = self.corr.get_correlated_samples(N=N_quad)
-                quad_wts = 1.0 / N_quad * np.ones(N_quad)
-                poly_vandermonde_matrix = self.get_poly(quad_pts)
-            elif self.method != 'numerical-integration' and self.dimensions <= 6 and self.highest_order <= MAXIMUM_ORDER_FOR_STATS:
-                quad = Quadrature(parameters=self.parameters, basis=Basis('tensor-grid', orders= np.array(self.parameters_order) + 1), \
-                    mesh='tensor-grid', points=None)
-                quad_pts, quad_wts = quad.get_points_and_weights()
-                poly_vandermonde_matrix = self.get_poly(quad_pts)
-            elif self.mesh == 'monte-carlo':
-                quad = Quadrature(parameters=self.parameters,
-                                  basis=self.basis, mesh=self.mesh, points=None, oversampling=10.0)
-                quad_pts, quad_wts = quad.get_points_and_weights()
-                N_quad = len(quad_wts)
-                quad_wts = 1.0 / N_quad * np.ones(N_quad)
-                poly_vandermonde_matrix = self.get_poly(quad_pts)
-            else:
-                poly_vandermonde_matrix = self.get_poly(self._quadrature_points)
-                quad_pts, quad_wts = self.get_points_and_weights()
-
             if self.highest_order <= MAXIMUM_ORDER_FOR_STATS and (self.basis.basis_type.lower() == 'total-order'
                 or self.basis.basis_type.lower() == 'hyperbolic-basis'):
-                self.statistics_object = Statistics(self.parameters, self.basis,  self.coefficients,  quad_pts, \
-                        quad_wts, poly_vandermonde_matrix, max_sobol_order=self.highest_order)
+                max_sobol_order = self.highest_order
             else:
-                self.statistics_object = Statistics(self.parameters, self.basis,  self.coefficients,  quad_pts, \
-                        quad_wts, poly_vandermonde_matrix, max_sobol_order=MAXIMUM_ORDER_FOR_STATS)
+                max_sobol_order = MAXIMUM_ORDER_FOR_STATS
+            self.statistics_object = Statistics(self.parameters, self.basis,  self.coefficients, \
+                    max_sobol_order=max_sobol_order, quadrature=self._get_statistics_quadrature, \
+                    moments='quadrature' if hasattr(self, 'inv_R_Psi') else None)
+    def _get_statistics_quadrature(self):
+        """
+        Private method that returns the quadrature points and weights used for the higher order statistics, along with the
+        polynomial evaluated at these points.
+
+        """
+        if hasattr(self, 'inv_R_Psi'):
+            # quad_pts, quad_wts = self.quadrature.get_points_and_weights()
+            N_quad = 20000
+            quad_pts = self.corr.get_correlated_samples(N=N_quad)
+            quad_wts = 1.0 / N_quad * np.ones(N_quad)
+            poly_vandermonde_matrix = self.get_poly(quad_pts)
+        elif self.method != 'numerical-integration' and self.dimensions <= 6 and self.highest_order <= MAXIMUM_ORDER_FOR_STATS:
+            tensor_rule = LazyTensorgrid(self.parameters, np.array(self.parameters_order) + 1)
+            quad_pts, quad_wts, poly_vandermonde_matrix = self._get_poly_on_tensor_grid(tensor_rule)
+        elif self._is_sum_factorisation_possible():
+            quad_pts, quad_wts, poly_vandermonde_matrix = self._get_poly_on_tensor_grid(self.quadrature.samples.tensor_rule)
+        elif self.mesh == 'monte-carlo':
+            quad = Quadrature(parameters=self.parameters,
+                              basis=self.basis, mesh=self.mesh, points=None, oversampling=10.0)
+            quad_pts, quad_wts = quad.get_points_and_weights()
+            N_quad = len(quad_wts)
+            quad_wts = 1.0 / N_quad * np.ones(N_quad)
+            poly_vandermonde_matrix = self.get_poly(quad_pts)
+        else:
+            poly_vandermonde_matrix = self.get_poly(self._quadrature_points)
+            quad_pts, quad_wts = self.get_points_and_weights()
+        return quad_pts, quad_wts, poly_vandermonde_matrix
+    def _get_poly_on_tensor_grid(self, tensor_rule):
+        """
+        Private method that evaluates the polynomial on a tensor grid chunk by chunk, using the chunks generated by the tensor rule,
+        so that the intermediate arrays of each chunk have at most ``POLYFIT_BLOCK_ENTRIES`` entries.
+
+        :param Poly self:
+            An instance of the Poly class.
+        :param LazyTensorgrid tensor_rule:
+            The tensor grid quadrature rule.
+        :return:
+            **points**: A numpy.ndarray of the quadrature points with shape (number_of_points, dimensions).
+
+            **weights**: A numpy.ndarray of the quadrature weights with shape (number_of_points,).
+
+            **P**: A numpy.ndarray of the polynomial evaluated at the quadrature points, with shape (cardinality, number_of_points).
+        """
+        number_of_points = len(tensor_rule)
+        points = np.zeros((number_of_points, self.dimensions))
+        weights = np.zeros(number_of_points)
+        P = np.zeros((self.basis.elements.shape[0], number_of_points))
+        chunksize = max(POLYFIT_BLOCK_ENTRIES // self.basis.elements.shape[0], 1)
+        start = 0
+        for chunk_points, chunk_weights in tensor_rule.get_chunks(chunksize):
+            stop = start + len(chunk_weights)
+            points[start:stop] = chunk_points
+            weights[start:stop] = chunk_weights
+            P[:, start:stop] = self.get_poly(chunk_points)
+            start = stop
+        return points, weights, P
     def get_sobol_indices(self, order):
         """
         Computes the Sobol' indices.
@@ -342,7 +413,8 @@ class Poly(object):
             The order of the Sobol' indices required.
 
         :return:
-            **sobol_indices**: A dict comprising of Sobol' indices and constitutent mixed orders of the parameters.
+            **sobol_indices**: A dict comprising of Sobol' indices and constitutent mixed orders of the parameters. For several outputs, each
+            value is a numpy.ndarray with one entry per output.
         """
         self._set_statistics()
         return self.statistics_object.get_sobol(order)
@@ -369,6 +441,9 @@ class Poly(object):
 
         :return:
             **skewness_indices**: A dict comprising of skewness indices and constitutent mixed orders of the parameters.
+
+        The indices are normalised by the skewness integrated with the statistics quadrature rule, so that they sum to one. This
+        may differ from the skewness returned by get_skewness_and_kurtosis, which is computed in closed form where possible.
         """
         self._set_statistics()
         return self.statistics_object.get_conditional_skewness(order)
@@ -383,10 +458,13 @@ class Poly(object):
 
         :return:
             **kurtosis_indices**: A dict comprising of kurtosis indices and constitutent mixed orders of the parameters.
+
+        The indices are normalised by the kurtosis integrated with the statistics quadrature rule, so that they sum to one. This
+        may differ from the kurtosis returned by get_skewness_and_kurtosis, which is computed in closed form where possible.
         """
         self._set_statistics()
         return self.statistics_object.get_conditional_kurtosis(order)
-    def set_model(self, model=None, model_grads=None):
+    def set_model(self, model=None, model_grads=None, vectorized=False, executor=None, chunksize=None):
         """
         Computes the coefficients of the polynomial via the method selected.
 
@@ -394,39 +472,50 @@ class Poly(object):
             An instance of the Poly class.
         :param callable model:
             The function that needs to be approximated. In the absence of a callable function, the input can be the function evaluated at the quadrature points.
+            Several outputs that share the same points may be approximated at once, either by a callable that returns an array of outputs, or by an ndarray
+            of evaluations with shape (number_of_points, number_of_outputs); the coefficients then have shape (cardinality, number_of_outputs).
         :param callable model_grads:
             The gradient of the function that needs to be approximated. In the absence of a callable gradient function, the input can be a matrix of gradient evaluations at the quadrature points.
+        :param bool vectorized:
+            If ``True``, the callables ``model`` and ``model_grads`` are evaluated once over the full array of quadrature points, rather than
+            once per point. See :meth:`~equadratures.poly.evaluate_model`.
+        :param concurrent.futures.Executor executor:
+            An optional executor over which the callable ``model`` is evaluated in parallel. Failed evaluations are set to NaN, and are then
+            dropped from the fit. See :meth:`~equadratures.poly.evaluate_model`.
+        :param int chunksize:
+            The number of points submitted to the executor per task.
         """
         if (model is None) and (self.outputs is not None):
             self._model_evaluations = self.outputs
         else:
             if callable(model):
-                y = evaluate_model(self._quadrature_points, model)
+                y = evaluate_model(self._quadrature_points, model, vectorized=vectorized, executor=executor, chunksize=chunksize)
             else:
                 y = model
                 # TODO: This error gives messages that are usually not clear
                 assert(y.shape[0] == self._quadrature_points.shape[0])
-            if y.shape[1] != 1:
-                raise ValueError( 'model values should be a column vector.')
+            if np.ndim(y) == 1:
+                y = np.reshape(y, (-1, 1))
+            elif np.ndim(y) != 2:
+                raise ValueError( 'model values should be an ndarray with shape (number_of_points, number_of_outputs).')
             self._model_evaluations = y
             if self.gradient_flag == 1:
+                if y.shape[1] != 1:
+                    raise ValueError( 'Gradient-enhanced least squares only supports models with a single output.')
                 if (model_grads is None) and (self.gradients is not None):
                     grad_values = self.gradients
                 else:
                     if callable(model_grads):
-                        grad_values = evaluate_model_gradients(self._quadrature_points, model_grads, 'matrix')
+                        grad_values = evaluate_model_gradients(self._quadrature_points, model_grads, 'matrix', vectorized=vectorized)
                     else:
                         grad_values = model_grads
                 p, q = grad_values.shape
-                self._gradient_evaluations = np.zeros((p*q,1))
-                W = np.diag(np.sqrt(self._quadrature_weights))
-                counter = 0
-                for j in range(0,q):
-                    for i in range(0,p):
-                        self._gradient_evaluations[counter] = W[i,i] * grad_values[i,j]
-                        counter = counter + 1
-                del grad_values
+                # Weight each row and stack the columns, i.e., all the d/dx1 values first, then d/dx2, etc.
+                weighted_grad_values = np.sqrt(self._quadrature_weights).reshape(p, 1) * np.asarray(grad_values)
+                self._gradient_evaluations = weighted_grad_values.reshape(p*q, 1, order='F')
+                del grad_values, weighted_grad_values
         self.statistics_object = None
+        self._sample_cholesky = None
         self._set_coefficients()
     def _set_coefficients(self, user_defined_coefficients=None):
         """
@@ -443,7 +532,7 @@ class Poly(object):
         if user_defined_coefficients is not None:
             self.coefficients = user_defined_coefficients
             return
-        indices_with_nans = np.argwhere(np.isnan(self._model_evaluations))[:,0]
+        indices_with_nans = np.unique(np.argwhere(np.isnan(self._model_evaluations))[:,0])
         if len(indices_with_nans) is not 0:
             print('WARNING: One or more of your model evaluations have resulted in an NaN. We found '+str(len(indices_with_nans))+' NaNs out of '+str(len(self._model_evaluations))+'.')
             print('The code will now use a least-squares technique that will ignore input-output pairs of your model that have NaNs. This will likely compromise computed statistics.')
@@ -459,42 +548,34 @@ class Poly(object):
             self._set_points_and_weights()
             self.set_model()
         if self.mesh == 'sparse-grid':
-            counter = 0
-            multi_index = []
-            coefficients = np.empty([1])
-            multindices = np.empty([1, self.dimensions])
-            for tensor in self.quadrature.list:
+            coefficients = []
+            multindices = []
+            for counter, tensor in enumerate(self.quadrature.list):
                 P = self.get_poly(tensor.points, tensor.basis.elements)
-                W = np.diag(np.sqrt(tensor.weights))
-                A = np.dot(W , P.T)
-                _, _ , counts = np.unique( np.vstack( [tensor.points, self._quadrature_points]), axis=0, return_index=True, return_counts=True)
-                indices = [i for i in range(0, len(counts)) if  counts[i] == 2]
-                b = np.dot(W , self._model_evaluations[indices])
-                del counts, indices
-                coefficients_i = self.solver(A, b)  * self.quadrature.sparse_weights[counter]
-                multindices_i =  tensor.basis.elements
-                coefficients = np.vstack([coefficients_i, coefficients])
-                multindices = np.vstack([multindices_i, multindices])
-                counter = counter +  1
-            multindices = np.delete(multindices, multindices.shape[0]-1, 0)
-            coefficients = np.delete(coefficients, coefficients.shape[0]-1)
-            unique_indices, indices , counts = np.unique(multindices, axis=0, return_index=True, return_counts=True)
-            coefficients_final = np.zeros((unique_indices.shape[0], 1))
-            for i in range(0, unique_indices.shape[0]):
-                for j in range(0, multindices.shape[0]):
-                    if np.array_equiv( unique_indices[i,:] , multindices[j,:]):
-                        coefficients_final[i] = coefficients_final[i] + coefficients[j]
+                sqrt_weights = np.sqrt(tensor.weights).reshape(-1, 1)
+                A = sqrt_weights * P.T
+                b = self._model_evaluations[self.quadrature.tensor_point_indices[counter]]
+                b = sqrt_weights.reshape((-1,) + (1,) * (b.ndim - 1)) * b
+                coefficients.append(np.reshape(self.solver(A, b), (A.shape[1], -1)) * self.quadrature.sparse_weights[counter])
+                multindices.append(tensor.basis.elements)
+            # Sum the coefficients of the multi-indices that are shared across tensors.
+            unique_indices, inverse_indices = np.unique(np.vstack(multindices), axis=0, return_inverse=True)
+            coefficients = np.vstack(coefficients)
+            coefficients_final = np.zeros((unique_indices.shape[0], coefficients.shape[1]))
+            np.add.at(coefficients_final, inverse_indices.reshape(-1), coefficients)
             self.coefficients = coefficients_final
             self.basis.elements = unique_indices
+        elif self._is_sum_factorisation_possible():
+            self.coefficients = self._get_sum_factorised_coefficients()
         else:
             P = self.get_poly(self._quadrature_points)
-            W = np.diag(np.sqrt(self._quadrature_weights))
-            A = np.dot(W , P.T)
-            b = np.dot(W , self._model_evaluations)
+            sqrt_weights = np.sqrt(self._quadrature_weights).reshape(-1, 1)
+            A = sqrt_weights * P.T
+            b = sqrt_weights.reshape((-1,) + (1,) * (np.ndim(self._model_evaluations) - 1)) * self._model_evaluations
             if self.gradient_flag == 1:
                 # Now, we can reduce the number of rows!
                 dP = self.get_poly_grad(self._quadrature_points)
-                C = cell2matrix(dP, W)
+                C = cell2matrix(dP, sqrt_weights)
                 G = np.vstack([A, C])
                 r =  np.linalg.matrix_rank(G)
                 m, n = A. shape
@@ -505,6 +586,153 @@ class Poly(object):
                 self.coefficients = self.solver(A, b, C, self._gradient_evaluations)
             else:
                 self.coefficients = self.solver(A, b)
+    def _is_sum_factorisation_possible(self):
+        """
+        Private function that checks whether the coefficients can be computed with the sum-factorised projection, i.e., whether
+        the method is numerical integration and the model was evaluated on the full tensor grid.
+
+        :param Poly self:
+            An instance of the Poly object.
+        """
+        if self.method != 'numerical-integration' or self.gradient_flag == 1 or hasattr(self, 'inv_R_Psi'):
+            return False
+        if self.subsampling_algorithm_name is not None or self.quadrature.list is not None:
+            return False
+        if not hasattr(self.quadrature.samples, 'tensor_rule'):
+            return False
+        return self._quadrature_points is self.quadrature.samples.points
+    def _get_sum_factorised_coefficients(self):
+        """
+        Private function that computes the numerical-integration coefficients on a tensor grid by applying the univariate
+        (weighted) orthogonal polynomial transforms along each dimension in turn. This costs O(N * sum(n_i)) operations, where
+        n_i is the number of points along dimension i, and does not require the (cardinality, N) Vandermonde-type matrix.
+
+        :param Poly self:
+            An instance of the Poly object.
+        :return:
+            **coefficients**: A numpy.ndarray of shape (cardinality, number_of_outputs).
+        """
+        tensor_rule = self.quadrature.samples.tensor_rule
+        basis = self.basis.elements.astype(int)
+        tensor = tensor_rule.get_tensor(self._model_evaluations.reshape(len(tensor_rule), -1))
+        for k in range(0, self.dimensions):
+            p, _, _ = self.parameters[k]._get_orthogonal_polynomial(tensor_rule.univariate_points[k], int(np.max(basis[:, k])), \
+                    derivatives=0)
+            tensor = tensor_rule.apply_along_axis(tensor, p * tensor_rule.univariate_weights[k], axis=k)
+        return tensor[tuple(basis.T)].reshape(basis.shape[0], -1)
+    def add_samples(self, X, y, weights=None):
+        """
+        Adds input-output samples to a least-squares polynomial and updates its coefficients. Rather than re-assembling and
+        re-solving the full least-squares problem, the upper triangular factor R of the weighted design matrix is updated with
+        one rank-one update per new sample, so the cost is O(M^2 k) for k new samples and M basis terms.
+
+        :param Poly self:
+            An instance of the Poly class; ``set_model`` must have been called, with the ``least-squares`` method.
+        :param numpy.ndarray X:
+            An ndarray with shape (number_of_new_samples, dimensions) of the new input samples.
+        :param numpy.ndarray y:
+            An ndarray with shape (number_of_new_samples, 1) of the corresponding model evaluations.
+        :param numpy.ndarray weights:
+            An optional ndarray with shape (number_of_new_samples,) of sample weights, on the same scale as the weights returned by
+            :meth:`get_weights` before the first update. By default the new samples are given the same Christoffel-type weights
+            as user-defined samples, i.e., proportional to 1 / sum_j p_j(x)^2.
+        """
+        X = self._get_stack_of_points_2D(X)
+        y = np.asarray(y, dtype=float).reshape(X.shape[0], -1)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float).reshape(-1)
+            if weights.shape[0] != X.shape[0]:
+                raise ValueError('The number of weights must match the number of samples.')
+        indices_with_nans = np.argwhere(np.isnan(y))[:,0]
+        if len(indices_with_nans) != 0:
+            print('WARNING: '+str(len(indices_with_nans))+' of the new model evaluations are NaNs; these samples will be ignored.')
+            X, y = np.delete(X, indices_with_nans, axis=0), np.delete(y, indices_with_nans, axis=0)
+            if weights is not None:
+                weights = np.delete(weights, indices_with_nans)
+        R, moments = self._get_sample_factorisation()
+        P = self.get_poly(X)
+        if weights is None:
+            weights = self._christoffel_scale / np.sum(P**2, 0)
+        A = np.sqrt(weights).reshape(-1, 1) * P.T
+        self._sample_cholesky = _cholesky_update(R, A)
+        self._sample_moments = moments + np.dot(A.T, np.sqrt(weights).reshape(-1, 1) * y)
+        self._sample_weights = np.concatenate([self._sample_weights, weights])
+        self._quadrature_points = np.vstack([self._quadrature_points, X])
+        self.P = np.hstack([self.P, P])
+        model_evaluations = np.vstack([self._model_evaluations.reshape(-1, y.shape[1]), y])
+        self._model_evaluations = model_evaluations.reshape((-1,) + self._model_evaluations.shape[1:])
+        self._set_incremental_coefficients()
+    def remove_samples(self, indices):
+        """
+        Removes input-output samples from a least-squares polynomial and updates its coefficients. The upper triangular factor R
+        of the weighted design matrix is downdated with one rank-one downdate per removed sample, at a cost of O(M^2 k) for k
+        removed samples and M basis terms.
+
+        :param Poly self:
+            An instance of the Poly class; ``set_model`` must have been called, with the ``least-squares`` method.
+        :param numpy.ndarray indices:
+            The indices of the samples to be removed, in the ordering of :meth:`get_points`.
+        """
+        R, moments = self._get_sample_factorisation()
+        number_of_samples = self._quadrature_points.shape[0]
+        indices = np.unique(np.asarray(indices, dtype=int).reshape(-1) % number_of_samples)
+        if number_of_samples - len(indices) < self.basis.cardinality:
+            raise ValueError('At least '+str(self.basis.cardinality)+' samples must remain after removing samples.')
+        weights = self._sample_weights[indices]
+        y = self._model_evaluations.reshape(number_of_samples, -1)[indices]
+        A = np.sqrt(weights).reshape(-1, 1) * self.P[:, indices].T
+        self._sample_cholesky = _cholesky_update(R, A, downdate=True)
+        self._sample_moments = moments - np.dot(A.T, np.sqrt(weights).reshape(-1, 1) * y)
+        self._sample_weights = np.delete(self._sample_weights, indices)
+        self._quadrature_points = np.delete(self._quadrature_points, indices, axis=0)
+        self.P = np.delete(self.P, indices, axis=1)
+        self._model_evaluations = np.delete(self._model_evaluations, indices, axis=0)
+        self._set_incremental_coefficients()
+    def _get_sample_factorisation(self):
+        """
+        Private function that returns the upper triangular factor R of the weighted least-squares design matrix, together with
+        the weighted moments A^T b. Both are computed from the current samples the first time that they are required.
+
+        :param Poly self:
+            An instance of the Poly object.
+        """
+        if self.method != 'least-squares' or self.gradient_flag == 1:
+            raise ValueError('Samples can only be added to, or removed from, a polynomial with the least-squares method.')
+        if not hasattr(self, '_model_evaluations'):
+            raise ValueError('Please call set_model before adding or removing samples.')
+        if getattr(self, '_sample_cholesky', None) is None:
+            weights = np.asarray(self._quadrature_weights, dtype=float).reshape(-1)
+            P = self.get_poly(self._quadrature_points)
+            A = np.sqrt(weights).reshape(-1, 1) * P.T
+            R = np.linalg.qr(A, mode='r')
+            R = np.sign(np.diag(R)).reshape(-1, 1) * R
+            if np.min(np.abs(np.diag(R))) <= np.finfo(float).eps * A.shape[0] * np.max(np.abs(np.diag(R))):
+                raise ValueError('The weighted design matrix is rank deficient; samples can not be added or removed incrementally.')
+            y = self._model_evaluations.reshape(A.shape[0], -1)
+            self._sample_cholesky = R
+            self._sample_moments = np.dot(A.T, np.sqrt(weights).reshape(-1, 1) * y)
+            self._sample_weights = weights
+            self._christoffel_scale = np.sum(weights) / np.sum(1.0 / np.sum(P**2, 0))
+            self.P = P
+        return self._sample_cholesky, self._sample_moments
+    def _set_incremental_coefficients(self):
+        """
+        Private function that refreshes the coefficients, weights and dependent attributes after samples have been added or removed.
+
+        :param Poly self:
+            An instance of the Poly object.
+        """
+        R = self._sample_cholesky
+        coefficients = solve_triangular(R, solve_triangular(R, self._sample_moments, trans='T'))
+        if self._model_evaluations.ndim == 1:
+            coefficients = coefficients.reshape(-1)
+        self.coefficients = coefficients
+        self._quadrature_weights = self._sample_weights / np.sum(self._sample_weights)
+        self.A = np.sqrt(self._quadrature_weights).reshape(-1, 1) * self.P.T
+        self.inputs = self._quadrature_points
+        self.outputs = self._model_evaluations
+        self.mesh = 'user-defined'
+        self.statistics_object = None
     def get_multi_index(self):
         """
         Returns the multi-index set of the basis.
@@ -522,7 +750,7 @@ class Poly(object):
         :param Poly self:
             An instance of the Poly object.
         :return:
-            **coefficients**: A numpy.ndarray of the coefficients with size (number_of_coefficients, 1).
+            **coefficients**: A numpy.ndarray of the coefficients with size (number_of_coefficients, number_of_outputs).
         """
         return self.coefficients
     def get_points(self):
@@ -558,7 +786,7 @@ class Poly(object):
             **w**: A numpy.ndarray of the corresponding quadrature weights with shape (number_of_samples, 1).
         """
         return self._quadrature_points, self._quadrature_weights
-    def get_polyfit(self, stack_of_points, uq=False):
+    def get_polyfit(self, stack_of_points, uq=False, out=None, block_size=None):
         """
         Evaluates the /polynomial approximation of a function (or model data) at prescribed points.
 
@@ -568,14 +796,83 @@ class Poly(object):
             An ndarray with shape (number_of_observations, dimensions) at which the polynomial fit must be evaluated at.
         :param bool uq:
             If true, the estimated uncertainty (standard deviation) of the polynomial approximation is also returned.
+        :param numpy.ndarray out:
+            An optional preallocated ndarray with shape (number_of_observations, number_of_outputs) into which the polynomial approximation is written.
+        :param int block_size:
+            The number of points evaluated at a time. By default, this is chosen so that each block of the Vandermonde-type matrix
+            has at most ``POLYFIT_BLOCK_ENTRIES`` entries; the full (cardinality, number_of_observations) matrix is never stored.
         :return:
-            **p**: A numpy.ndarray of shape (1, number_of_observations) corresponding to the polynomial approximation of the model.
+            **p**: A numpy.ndarray of shape (number_of_observations, number_of_outputs) corresponding to the polynomial approximation of the model.
+            If uq is true, the standard deviation is returned as a second numpy.ndarray of the same shape.
         """
         N = len(self.coefficients)
+        polyfit = self._get_polyfit_blocked(stack_of_points, self.coefficients.reshape(N, -1), out, block_size)
         if uq:
-            return np.dot(self.get_poly(stack_of_points).T , self.coefficients.reshape(N, 1)), self._get_polystd(stack_of_points)
+            return polyfit, self._get_polystd(stack_of_points)
         else:
-            return np.dot(self.get_poly(stack_of_points).T , self.coefficients.reshape(N, 1))
+            return polyfit
+    def _get_polyfit_blocked(self, stack_of_points, coefficients, out=None, block_size=None):
+        """
+        Private function that evaluates get_poly(stack_of_points).T @ coefficients over blocks of points, reusing the same
+        work arrays for each block.
+
+        :param Poly self:
+            An instance of the Poly class.
+        :param numpy.ndarray stack_of_points:
+            An ndarray with shape (number_of_observations, dimensions).
+        :param numpy.ndarray coefficients:
+            An ndarray with shape (cardinality, number_of_outputs).
+        :param numpy.ndarray out:
+            An optional preallocated ndarray with shape (number_of_observations, number_of_outputs).
+        :param int block_size:
+            The number of points evaluated at a time.
+        :return:
+            **p**: A numpy.ndarray of shape (number_of_observations, number_of_outputs).
+        """
+        stack_of_points = self._get_stack_of_points_2D(stack_of_points)
+        no_of_points = stack_of_points.shape[0]
+        basis = self.basis.elements.astype(int)
+        basis_entries, dimensions = basis.shape
+        if hasattr(self, 'inv_R_Psi'):
+            coefficients = self.inv_R_Psi @ coefficients
+        number_of_outputs = coefficients.shape[1]
+        if out is None:
+            out = np.zeros((no_of_points, number_of_outputs))
+        elif out.shape != (no_of_points, number_of_outputs):
+            raise ValueError('The output buffer must have shape '+str((no_of_points, number_of_outputs))+', but has shape '+str(out.shape)+'.')
+        if no_of_points == 0:
+            return out
+        if block_size is None:
+            block_size = max(POLYFIT_BLOCK_ENTRIES // basis_entries, 1)
+        block_size = min(int(block_size), no_of_points)
+        max_orders = np.max(basis, axis=0)
+        polynomial = np.empty((basis_entries, block_size))
+        gathered = np.empty((basis_entries, block_size))
+        for start in range(0, no_of_points, block_size):
+            stop = min(start + block_size, no_of_points)
+            if stop - start != polynomial.shape[1]:
+                polynomial = np.empty((basis_entries, stop - start))
+                gathered = np.empty((basis_entries, stop - start))
+            for k in range(dimensions):
+                p, _, _ = self.parameters[k]._get_orthogonal_polynomial(stack_of_points[start:stop, k], int(max_orders[k]), derivatives=0)
+                if k == 0:
+                    np.take(p, basis[:, k], axis=0, out=polynomial)
+                else:
+                    np.take(p, basis[:, k], axis=0, out=gathered)
+                    polynomial *= gathered
+            out[start:stop, :] = np.dot(polynomial.T, coefficients)
+        return out
+    def _get_stack_of_points_2D(self, stack_of_points):
+        """
+        Private function that reshapes the points into an ndarray with shape (number_of_observations, dimensions), following
+        the conventions of get_poly: a 1D array is a set of points in the univariate case, and a single point otherwise.
+        """
+        stack_of_points = np.asarray(stack_of_points, dtype=float)
+        if stack_of_points.ndim == 1:
+            if self.dimensions == 1:
+                return stack_of_points.reshape(-1, 1)
+            return stack_of_points.reshape(1, -1)
+        return stack_of_points
     def get_polyfit_grad(self, stack_of_points, dim_index = None):
         """
         Evaluates the gradient of the polynomial approximation of a function (or model data) at prescribed points.
@@ -589,6 +886,8 @@ class Poly(object):
             **p**: A numpy.ndarray of shape (dimensions, number_of_observations) corresponding to the polynomial gradient approximation of the model.
         """
         N = len(self.coefficients)
+        if self.coefficients.size != N:
+            raise ValueError('The gradient of the polynomial approximation is only available for a single output.')
         if stack_of_points.ndim == 1:
             no_of_points = 1
         else:
@@ -600,7 +899,7 @@ class Poly(object):
         for i in range(0, self.dimensions):
             grads[i,:] = np.dot(self.coefficients.reshape(N,) , H[i] )
         return grads
-    def get_polyfit_hess(self, stack_of_points):
+    def get_polyfit_hess(self, stack_of_points, compact=False):
         """
         Evaluates the hessian of the polynomial approximation of a function (or model data) at prescribed points.
 
@@ -609,20 +908,35 @@ class Poly(object):
         :param numpy.ndarray stack_of_points:
             An ndarray with shape (number_of_observations, dimensions) at which the polynomial fit approximation's
             Hessian must be evaluated at.
+        :param bool compact:
+            If ``True``, only the upper triangle of the (symmetric) Hessian is returned, as an ndarray with shape
+            (number_of_observations, dimensions * (dimensions + 1) / 2) whose columns are ordered as in ``numpy.triu_indices(dimensions)``.
         :return:
             **h**: A numpy.ndarray of shape (dimensions, dimensions, number_of_observations) corresponding to the polynomial Hessian approximation of the model.
         """
-        if stack_of_points.ndim == 1:
-            no_of_points = 1
-        else:
-            no_of_points, _ = stack_of_points.shape
-        H = self.get_poly_hess(stack_of_points)
+        N = len(self.coefficients)
+        if self.coefficients.size != N:
+            raise ValueError('The Hessian of the polynomial approximation is only available for a single output.')
         if self.dimensions == 1:
-            return np.dot(self.coefficients.T , H)
+            H = self.get_poly_hess(stack_of_points)
+            hess = np.dot(self.coefficients.reshape(1, N), H)
+            return hess.T if compact else hess
+        coefficients = self.coefficients.reshape(N, 1)
+        if hasattr(self, 'inv_R_Psi'):
+            coefficients = self.inv_R_Psi @ coefficients
+        coefficients = coefficients.reshape(N)
+        stack_of_points = self._get_stack_of_points_2D(stack_of_points)
+        no_of_points = stack_of_points.shape[0]
+        p, dp, d2p = self._get_univariate_polynomials(stack_of_points, derivatives=2)
+        rows, cols = np.triu_indices(self.dimensions)
+        hess_upper = np.zeros((len(rows), no_of_points))
+        for i in range(0, len(rows)):
+            hess_upper[i, :] = np.dot(coefficients, self._get_poly_hess_entry(p, dp, d2p, rows[i], cols[i]))
+        if compact:
+            return hess_upper.T
         hess = np.zeros((self.dimensions, self.dimensions, no_of_points))
-        for i in range(0, self.dimensions):
-            for j in range(0, self.dimensions):
-                hess[i, j, :] = np.dot(self.coefficients.T , H[i * self.dimensions + j])
+        hess[rows, cols, :] = hess_upper
+        hess[cols, rows, :] = hess_upper
         return hess
     def get_polyfit_function(self):
         """
@@ -633,8 +947,7 @@ class Poly(object):
         :return:
             A callable function.
         """
-        N = len(self.coefficients)
-        return lambda x: np.dot( self.get_poly(x).T ,  self.coefficients.reshape(N, 1) )
+        return lambda x: self.get_polyfit(x)
     def get_polyfit_grad_function(self):
         """
         Returns a callable for the gradients of the polynomial approximation of a function (or model data).
@@ -655,6 +968,103 @@ class Poly(object):
             A callable function.
         """
         return lambda x : self.get_polyfit_hess(x)
+    def get_polyfit_chunks(self, stack_of_points, chunksize=None, output='value'):
+        """
+        Evaluates the polynomial approximation (or its gradient or Hessian) one chunk of points at a time, so that only one chunk of
+        points and predictions needs to be held in memory.
+
+        :param Poly self:
+            An instance of the Poly class.
+        :param stack_of_points:
+            Either an iterable of numpy.ndarrays with shape (number_of_observations_in_chunk, dimensions), a numpy.ndarray (or numpy.memmap)
+            with shape (number_of_observations, dimensions), or the filename of such an array saved in the ``.npy`` format, which is then
+            memory-mapped.
+        :param int chunksize:
+            The number of points per chunk, when ``stack_of_points`` is an array or a filename. By default, this is chosen so that the
+            Vandermonde-type matrix of each chunk has at most ``POLYFIT_BLOCK_ENTRIES`` entries.
+        :param str output:
+            The quantity to evaluate: ``value`` (default) for :meth:`get_polyfit`, ``grad`` for :meth:`get_polyfit_grad` or ``hess`` for
+            :meth:`get_polyfit_hess`.
+        :return:
+            A generator that yields the output of the selected method for each chunk of points.
+        """
+        evaluate = self._get_polyfit_evaluator(output)
+        for chunk in self._iterate_chunks_of_points(stack_of_points, chunksize):
+            yield evaluate(chunk)
+    def save_polyfit(self, stack_of_points, filename, chunksize=None, output='value'):
+        """
+        Evaluates the polynomial approximation (or its gradient or Hessian) chunk by chunk, writing the results to a ``.npy`` file
+        through a memory-map.
+
+        :param Poly self:
+            An instance of the Poly class.
+        :param stack_of_points:
+            A numpy.ndarray (or numpy.memmap) with shape (number_of_observations, dimensions), or the filename of such an array saved in
+            the ``.npy`` format.
+        :param str filename:
+            The ``.npy`` file that the results are written to. The array stored has shape (number_of_observations, number_of_outputs) for ``value``,
+            (dimensions, number_of_observations) for ``grad`` and (dimensions, dimensions, number_of_observations) for ``hess``.
+        :param int chunksize:
+            The number of points per chunk.
+        :param str output:
+            The quantity to evaluate: ``value`` (default), ``grad`` or ``hess``.
+        :return:
+            **results**: The numpy.memmap with the results, opened in read-only mode.
+        """
+        if isinstance(stack_of_points, str):
+            stack_of_points = np.load(stack_of_points, mmap_mode='r')
+        if stack_of_points.ndim == 1:
+            stack_of_points = self._get_stack_of_points_2D(stack_of_points)
+        no_of_points = stack_of_points.shape[0]
+        if output == 'value':
+            shape = (no_of_points, self.coefficients.size // len(self.coefficients))
+        elif output == 'grad':
+            shape = (self.dimensions, no_of_points)
+        elif output == 'hess':
+            shape = (self.dimensions, self.dimensions, no_of_points)
+        else:
+            raise ValueError('Output must be one of value, grad or hess.')
+        results = np.lib.format.open_memmap(filename, mode='w+', dtype=float, shape=shape)
+        start = 0
+        for chunk in self.get_polyfit_chunks(stack_of_points, chunksize, output):
+            if output == 'value':
+                stop = start + chunk.shape[0]
+                results[start:stop, :] = chunk
+            else:
+                stop = start + chunk.shape[-1]
+                results[..., start:stop] = chunk.reshape(shape[:-1] + (stop - start,))
+            start = stop
+        results.flush()
+        del results
+        return np.load(filename, mmap_mode='r')
+    def _get_polyfit_evaluator(self, output):
+        """
+        Private function that returns the method used to evaluate each chunk in get_polyfit_chunks.
+        """
+        if output == 'value':
+            return self.get_polyfit
+        elif output == 'grad':
+            return self.get_polyfit_grad
+        elif output == 'hess':
+            return self.get_polyfit_hess
+        else:
+            raise ValueError('Output must be one of value, grad or hess.')
+    def _iterate_chunks_of_points(self, stack_of_points, chunksize=None):
+        """
+        Private function that splits arrays (or memory-mapped .npy files) of points into chunks; other iterables are passed through.
+        """
+        if isinstance(stack_of_points, str):
+            stack_of_points = np.load(stack_of_points, mmap_mode='r')
+        if not hasattr(stack_of_points, 'shape'):
+            for chunk in stack_of_points:
+                yield self._get_stack_of_points_2D(chunk)
+            return
+        stack_of_points = self._get_stack_of_points_2D(stack_of_points) if stack_of_points.ndim == 1 else stack_of_points
+        if chunksize is None:
+            chunksize = max(POLYFIT_BLOCK_ENTRIES // self.basis.elements.shape[0], 1)
+        chunksize = max(int(chunksize), 1)
+        for start in range(0, stack_of_points.shape[0], chunksize):
+            yield np.asarray(stack_of_points[start:start + chunksize], dtype=float)
     def get_poly(self, stack_of_points, custom_multi_index=None):
         """
         Evaluates the value of each polynomial basis function at a set of points.
@@ -682,13 +1092,13 @@ class Poly(object):
 
         # Save time by returning if univariate!
         if dimensions == 1:
-            poly , _ , _ =  self.parameters[0]._get_orthogonal_polynomial(stack_of_points, int(np.max(basis)))
+            poly , _ , _ =  self.parameters[0]._get_orthogonal_polynomial(stack_of_points, int(np.max(basis)), derivatives=0)
             return poly
         else:
             for i in range(0, dimensions):
                 if len(stack_of_points.shape) == 1:
                     stack_of_points = np.array([stack_of_points])
-                p[i] , _ , _ = self.parameters[i]._get_orthogonal_polynomial(stack_of_points[:,i], int(np.max(basis[:,i])) )
+                p[i] , _ , _ = self.parameters[i]._get_orthogonal_polynomial(stack_of_points[:,i], int(np.max(basis[:,i])), derivatives=0)
 
         # One loop for polynomials
         polynomial = np.ones((basis_entries, no_of_points))
@@ -728,13 +1138,13 @@ class Poly(object):
 
         # Save time by returning if univariate!
         if dimensions == 1:
-            _ , dpoly, _ =  self.parameters[0]._get_orthogonal_polynomial(stack_of_points, int(np.max(basis) ) )
+            _ , dpoly, _ =  self.parameters[0]._get_orthogonal_polynomial(stack_of_points, int(np.max(basis) ), derivatives=1)
             return dpoly
         else:
             for i in range(0, dimensions):
                 if len(stack_of_points.shape) == 1:
                     stack_of_points = np.array([stack_of_points])
-                p[i] , dp[i], _ = self.parameters[i]._get_orthogonal_polynomial(stack_of_points[:,i], int(np.max(basis[:,i])) )
+                p[i] , dp[i], _ = self.parameters[i]._get_orthogonal_polynomial(stack_of_points[:,i], int(np.max(basis[:,i])), derivatives=1)
 
         # One loop for polynomials
         R = []
@@ -755,7 +1165,7 @@ class Poly(object):
                     polynomialgradient = self.inv_R_Psi.T @ polynomialgradient
                 R.append(polynomialgradient)
         return R
-    def get_poly_hess(self, stack_of_points):
+    def get_poly_hess(self, stack_of_points, compact=False):
         """
         Evaluates the Hessian for each of the polynomial basis functions at a set of points,
         with respect to each input variable.
@@ -764,56 +1174,71 @@ class Poly(object):
             An instance of the Poly class.
         :param numpy.ndarray stack_of_points:
             An ndarray with shape (number_of_observations, dimensions) at which the Hessian must be evaluated.
+        :param bool compact:
+            If ``True``, only the upper triangle of the (symmetric) Hessian is computed, and returned as an ndarray with shape
+            (dimensions * (dimensions + 1) / 2, cardinality, number_of_observations) whose entries are ordered as in ``numpy.triu_indices(dimensions)``.
 
         :return:
             **Hessian**: A list with d^2 elements, where d corresponds to the dimension of the model. Each element is a numpy.ndarray of shape
-            (cardinality, number_of_observations) corresponding to the hessian polynomial evaluations at the stack_of_points.
+            (cardinality, number_of_observations) corresponding to the hessian polynomial evaluations at the stack_of_points. As the Hessian
+            is symmetric, only the upper triangle is computed; the elements j * d + i, for i < j, are copies of the elements i * d + j.
 
         """
         # "Unpack" parameters from "self"
         basis = self.basis.elements
         basis_entries, dimensions = basis.shape
-        if stack_of_points.ndim == 1:
-            no_of_points = 1
-        else:
-            no_of_points, _ = stack_of_points.shape
-        p = {}
-        dp = {}
-        d2p = {}
 
         # Save time by returning if univariate!
         if dimensions == 1:
             _, _, d2poly = self.parameters[0]._get_orthogonal_polynomial(stack_of_points, int(np.max(basis)))
-            return d2poly
-        else:
-            for i in range(0, dimensions):
-                if len(stack_of_points.shape) == 1:
-                    stack_of_points = np.array([stack_of_points])
-                p[i], dp[i], d2p[i] = self.parameters[i]._get_orthogonal_polynomial(stack_of_points[:, i],
-                                                                       int(np.max(basis[:, i]) + 1))
-        H = []
-        for w in range(0, dimensions):
-            gradDirection1 = w
-            for v in range(0, dimensions):
-                gradDirection2 = v
-                polynomialhessian = np.zeros((basis_entries, no_of_points))
-                for i in range(0, basis_entries):
-                    temp = np.ones((1, no_of_points))
-                    for k in range(0, dimensions):
-                        if k == gradDirection1 == gradDirection2:
-                            polynomialhessian[i, :] = d2p[k][int(basis[i, k])] * temp
-                        elif k == gradDirection1:
-                            polynomialhessian[i, :] = dp[k][int(basis[i, k])] * temp
-                        elif k == gradDirection2:
-                            polynomialhessian[i, :] = dp[k][int(basis[i, k])] * temp
-                        else:
-                            polynomialhessian[i, :] = p[k][int(basis[i, k])] * temp
-                        temp = polynomialhessian[i, :]
-                if hasattr(self, 'inv_R_Psi'):
-                    polynomialhessian = self.inv_R_Psi.T @ polynomialhessian
-                H.append(polynomialhessian)
-
+            return d2poly[np.newaxis, :, :] if compact else d2poly
+        stack_of_points = self._get_stack_of_points_2D(stack_of_points)
+        p, dp, d2p = self._get_univariate_polynomials(stack_of_points, derivatives=2)
+        rows, cols = np.triu_indices(dimensions)
+        H_upper = []
+        for w, v in zip(rows, cols):
+            polynomialhessian = self._get_poly_hess_entry(p, dp, d2p, w, v)
+            if hasattr(self, 'inv_R_Psi'):
+                polynomialhessian = self.inv_R_Psi.T @ polynomialhessian
+            H_upper.append(polynomialhessian)
+        if compact:
+            return np.array(H_upper)
+        H = [None] * (dimensions * dimensions)
+        for i in range(0, len(rows)):
+            H[rows[i] * dimensions + cols[i]] = H_upper[i]
+            if rows[i] != cols[i]:
+                H[cols[i] * dimensions + rows[i]] = H_upper[i].copy()
         return H
+    def _get_univariate_polynomials(self, stack_of_points, derivatives=0):
+        """
+        Private function that evaluates the univariate orthogonal polynomials (and their derivatives) of each parameter, up to the
+        highest order in the basis, at an ndarray of points with shape (number_of_observations, dimensions).
+        """
+        basis = self.basis.elements
+        p, dp, d2p = {}, {}, {}
+        for i in range(0, basis.shape[1]):
+            p[i], dp[i], d2p[i] = self.parameters[i]._get_orthogonal_polynomial(stack_of_points[:, i], int(np.max(basis[:, i])), \
+                    derivatives=derivatives)
+        return p, dp, d2p
+    def _get_poly_hess_entry(self, p, dp, d2p, w, v):
+        """
+        Private function that evaluates the second derivative of each basis function with respect to the variables w and v,
+        as an ndarray with shape (cardinality, number_of_observations).
+        """
+        basis = self.basis.elements
+        polynomialhessian = None
+        for k in range(0, basis.shape[1]):
+            if k == w == v:
+                table = d2p[k]
+            elif k == w or k == v:
+                table = dp[k]
+            else:
+                table = p[k]
+            if polynomialhessian is None:
+                polynomialhessian = table[basis[:, k].astype(int)]
+            else:
+                polynomialhessian *= table[basis[:, k].astype(int)]
+        return polynomialhessian
     def get_polyscore(self,X_test=None,y_test=None,metric='adjusted_r2'):
         """
         Evaluates the accuracy of the polynomial approximation using the selected accuracy metric. Training accuracy is evaluated on the data used for fitting the polynomial. Testing accuracy is evaluated on new data if it is provided by the ``X_test`` and ``y_test`` arguments (both must be provided together). 
@@ -851,30 +1276,29 @@ class Poly(object):
         :param numpy.ndarray stack_of_points:
             An ndarray with shape (number_of_observations, dimensions) at which the polynomial variance must be evaluated at.
         :return:
-            **y_std**: A numpy.ndarray of shape (number_of_observations,1) corresponding to the uncertainty (one standard deviation) of the polynomial approximation at each point.
+            **y_std**: A numpy.ndarray of shape (number_of_observations, number_of_outputs) corresponding to the uncertainty (one standard deviation) of the polynomial approximation at each point.
         """
         # Training data
         X_train = self.inputs
-        y_train = self.outputs
+        y_train = np.reshape(self.outputs, (X_train.shape[0], -1))
 
         # Define covariance matrix - TODO: allow non-diagonal matrix?
         # Empirical variance
         if self.output_variances is None:
-            mse = ((y_train - self.get_polyfit(X_train))**2).mean()
-            data_variance = np.full(X_train.shape[0],mse)
+            mse = ((y_train - self.get_polyfit(X_train))**2).mean(axis=0)
+            data_variance = np.ones((X_train.shape[0], 1)) * mse
         # User defined variance (scalar)
         elif np.isscalar(self.output_variances):
-            data_variance = np.full(X_train.shape[0],self.output_variances)
+            data_variance = np.full((X_train.shape[0], 1), self.output_variances)
         # User defined variance (array)
         else:
-            data_variance = self.output_variances
-        Sigma = np.diag(data_variance)
+            data_variance = np.reshape(self.output_variances, (X_train.shape[0], -1))
+        data_variance = np.asarray(data_variance, dtype=float)
 
         # Construct Q, the pseudoinverse of the weighted orthogonal polynomial matrix P
  
         P = self.get_poly(self._quadrature_points)
-        W = np.diag(np.sqrt(self._quadrature_weights))
-        A = np.dot(W, P.T)
+        A = np.sqrt(self._quadrature_weights).reshape(-1, 1) * P.T
         Q = np.dot( _inv( np.dot(A.T, A) ), A.T)
 
         # Construct A matrix for test points, but omit weights
@@ -882,11 +1306,35 @@ class Poly(object):
         Po = self.get_poly(X_test)
         Ao = Po.T
 
-        # Propagate the uncertainties
-        Sigma_X = np.dot( np.dot(Q, Sigma), Q.T)
-        Sigma_F = np.dot( np.dot(Ao, Sigma_X), Ao.T) 
-        std_F = 1.96 * np.sqrt( np.diag(Sigma_F) )
-        return std_F.reshape(-1,1)
+        # Propagate the (diagonal) uncertainties of each output; only the diagonal of Sigma_F is required
+        std_F = np.zeros((Ao.shape[0], data_variance.shape[1]))
+        for k in range(0, data_variance.shape[1]):
+            Sigma_X = np.dot(Q * data_variance[:, k], Q.T)
+            std_F[:, k] = 1.96 * np.sqrt( np.sum(np.dot(Ao, Sigma_X) * Ao, axis=1) )
+        return std_F
+
+def _cholesky_update(R, V, downdate=False):
+    """
+    Private function that returns the upper triangular factor of R^T R + V^T V, or of R^T R - V^T V if downdate is True. Each
+    column is eliminated with a single (hyperbolic, for downdates) Householder reflection acting on one row of R and all the rows
+    of V, so this costs O(k M^2) for V with shape (k, M). The diagonal of R is assumed, and kept, positive.
+    """
+    R = np.array(R, dtype=float)
+    V = np.array(V, dtype=float).reshape(-1, R.shape[0])
+    sign = -1.0 if downdate else 1.0
+    for j in range(0, R.shape[0]):
+        a, v = R[j,j], V[:,j]
+        beta_squared = a**2 + sign * np.dot(v, v)
+        if beta_squared <= 0.0:
+            raise ValueError('The downdated design matrix is rank deficient; these samples can not be removed.')
+        beta = -np.sqrt(beta_squared)
+        u0 = a - beta
+        w = (u0 * R[j,j+1:] + sign * np.dot(v, V[:,j+1:])) / (-beta * u0)
+        R[j,j+1:] -= u0 * w
+        V[:,j+1:] -= np.outer(v, w)
+        R[j,j] = beta
+        R[j,j:] *= -1.0
+    return R
 
 def _inv(M):
     """
@@ -899,7 +1347,7 @@ def _inv(M):
     inv_M = inv_L.T @ inv_L
     return inv_M
 
-def evaluate_model_gradients(points, fungrad, format):
+def evaluate_model_gradients(points, fungrad, format, vectorized=False):
     """
     Evaluates the model gradient at given values.
 
@@ -911,48 +1359,141 @@ def evaluate_model_gradients(points, fungrad, format):
         The format in which the output is to be provided: ``matrix`` will output a numpy.ndarray of shape
         (number_of_observations, dimensions) with gradient values, while ``vector`` will stack all the
         vectors in this matrix to yield a numpy.ndarray with shape (number_of_observations x dimensions, 1).
+    :param bool vectorized:
+        If ``True``, ``fungrad`` is called once with the full (number_of_observations, dimensions) array of points and
+        must return an array of shape (number_of_observations, dimensions). Default is ``False``, where ``fungrad`` is called once per point.
 
     :return:
         **grad_values**: A numpy.ndarray of gradient evaluations.
 
     """
     dimensions = len(points[0,:])
-    if format is 'matrix':
+    if format == 'matrix':
+        if vectorized:
+            return _evaluate_vectorized(points, fungrad, dimensions)
         grad_values = np.zeros((len(points), dimensions))
         # For loop through all the points
         for i in range(0, len(points)):
-            output_from_gradient_call = fungrad(points[i,:])
-            for j in range(0, dimensions):
-                grad_values[i,j] = output_from_gradient_call[j]
+            grad_values[i,:] = np.reshape(fungrad(points[i,:]), (dimensions,))
         return grad_values
-    elif format is 'vector':
-        grad_values = np.zeros((len(points) * dimensions, 1))
-        # For loop through all the points
-        counter = 0
-        for i in range(0, len(points)):
-            output_from_gradient_call = fungrad(points[i,:])
-            for j in range(0, dimensions):
-                grad_values[counter, 0] = output_from_gradient_call[j]
-                counter = counter + 1
-        return np.mat(grad_values)
+    elif format == 'vector':
+        if vectorized:
+            grad_values = _evaluate_vectorized(points, fungrad, dimensions)
+        else:
+            grad_values = np.zeros((len(points), dimensions))
+            for i in range(0, len(points)):
+                grad_values[i,:] = np.reshape(fungrad(points[i,:]), (dimensions,))
+        return grad_values.reshape(len(points) * dimensions, 1)
     else:
         raise ValueError( 'evalgradients(): Format must be either matrix or vector!')
-def evaluate_model(points, function):
+def evaluate_model(points, function, vectorized=False, executor=None, chunksize=None):
     """
     Evaluates the model function at given values.
 
     :param numpy.ndarray points:
         An ndarray with shape (number_of_observations, dimensions) at which the gradient must be evaluated.
     :param callable function:
-        A callable argument for the function.
+        A callable argument for the function. It may return a scalar, or an array of number_of_outputs values for models with several
+        outputs.
+    :param bool vectorized:
+        If ``True``, ``function`` is called once with the full (number_of_observations, dimensions) array of points and
+        must return number_of_observations x number_of_outputs values. Default is ``False``, where ``function`` is called once per point.
+    :param concurrent.futures.Executor executor:
+        An optional executor (e.g., a ``ThreadPoolExecutor`` or a ``ProcessPoolExecutor``) over which the points are evaluated in
+        chunks. Evaluations that raise an exception are set to NaN, so that they are subsequently ignored when the coefficients are computed.
+        Note that a ``ProcessPoolExecutor`` requires ``function`` to be picklable, i.e., defined at the top level of a module.
+    :param int chunksize:
+        The number of points submitted to the executor per task. By default, the points are split into four chunks per available CPU.
 
     :return:
-        **function_values**: A numpy.ndarray of function evaluations.
+        **function_values**: A numpy.ndarray of function evaluations with shape (number_of_observations, number_of_outputs).
     """
-    function_values = np.zeros((len(points), 1))
-    for i in range(0, len(points)):
-        function_values[i,0] = function(points[i,:])
+    if executor is not None:
+        return _evaluate_with_executor(points, function, vectorized, executor, chunksize)
+    if vectorized:
+        return _evaluate_vectorized(points, function)
+    return _stack_function_values([function(points[i,:]) for i in range(0, len(points))])
+def _evaluate_with_executor(points, function, vectorized, executor, chunksize):
+    """
+    Private function that evaluates the model over an executor, reassembling the chunks in their original order.
+    """
+    number_of_points = len(points)
+    if chunksize is None:
+        chunksize = int(np.ceil(number_of_points / (4.0 * (os.cpu_count() or 1))))
+    chunksize = max(int(chunksize), 1)
+    starts = range(0, number_of_points, chunksize)
+    futures = [executor.submit(_evaluate_chunk, points[i:i+chunksize, :], function, vectorized) for i in starts]
+    chunks = [future.result() for future in futures]
+    # A chunk in which every evaluation failed has a single column of NaNs, which is broadcast across the outputs.
+    number_of_outputs = max([chunk.shape[1] for chunk in chunks], default=1)
+    function_values = np.zeros((number_of_points, number_of_outputs))
+    for i, chunk in zip(starts, chunks):
+        function_values[i:i+chunksize, :] = chunk
     return function_values
+def _evaluate_chunk(points, function, vectorized):
+    """
+    Private function that evaluates the model over a chunk of points, mapping evaluations that raise an exception to NaN.
+    """
+    if vectorized:
+        try:
+            values = function(points)
+        except Exception:
+            # Fall back to one point at a time to isolate the failures.
+            values = _FAILED_EVALUATION
+        if values is not _FAILED_EVALUATION:
+            return _reshape_vectorized_values(points, values)
+    function_values = []
+    for i in range(0, len(points)):
+        try:
+            value = function(points[i:i+1, :]) if vectorized else function(points[i,:])
+        except Exception:
+            function_values.append(_FAILED_EVALUATION)
+            continue
+        function_values.append(_reshape_vectorized_values(points[i:i+1, :], value) if vectorized else value)
+    return _stack_function_values(function_values)
+def _get_model_value(value):
+    """
+    Private function that converts a value returned by the model into a flat float array, raising a ValueError if it is malformed.
+    """
+    if value is None:
+        raise ValueError('The model returned None; it must return a scalar, or an array of outputs.')
+    try:
+        return np.asarray(value, dtype=float).reshape(-1)
+    except (TypeError, ValueError):
+        raise ValueError('The model returned '+repr(value)+', which cannot be converted to an array of floats.')
+def _stack_function_values(function_values):
+    """
+    Private function that stacks per-point model evaluations, which are either scalars or arrays of outputs, into an ndarray with
+    shape (number_of_observations, number_of_outputs). Failed evaluations, marked by _FAILED_EVALUATION, are set to NaN.
+    """
+    function_values = [value if value is _FAILED_EVALUATION else _get_model_value(value) for value in function_values]
+    sizes = set(value.size for value in function_values if value is not _FAILED_EVALUATION)
+    if len(sizes) > 1:
+        raise ValueError('The model returned different numbers of outputs: '+str(sorted(sizes))+'.')
+    number_of_outputs = sizes.pop() if len(sizes) == 1 else 1
+    stacked_values = np.full((len(function_values), number_of_outputs), np.nan)
+    for i, value in enumerate(function_values):
+        if value is not _FAILED_EVALUATION:
+            stacked_values[i,:] = value
+    return stacked_values
+def _evaluate_vectorized(points, function, columns=None):
+    """
+    Private function that evaluates a batched callable over all the points in a single call. If columns is None, the number of
+    columns (outputs) is inferred from the number of values returned.
+    """
+    return _reshape_vectorized_values(points, function(points), columns)
+def _reshape_vectorized_values(points, values, columns=None):
+    """
+    Private function that reshapes the values returned by a batched callable into an ndarray with shape (number_of_points, columns),
+    raising a ValueError if they are malformed.
+    """
+    number_of_points = len(points)
+    values = _get_model_value(values)
+    if columns is None:
+        columns = values.size // number_of_points if number_of_points > 0 and values.size > 0 else 1
+    if values.size != number_of_points * columns:
+        raise ValueError('A vectorized model evaluated at '+str(number_of_points)+' points must return '+str(number_of_points * columns)+' values, but returned '+str(values.size)+'.')
+    return values.reshape(number_of_points, columns)
 def vector_to_2D_grid(coefficients, index_set):
     """
     Handy function that converts a vector of coefficients into a matrix based on index set values.
@@ -979,18 +1520,16 @@ def vector_to_2D_grid(coefficients, index_set):
     coefficients = np.reshape(coefficients, (1, l))
     z[indices[:,0], indices[:,1]] = coefficients
     return x, y, z, max_order
-def cell2matrix(G, W):
-    dimensions = len(G)
-    G0 = G[0] # Which by default has to exist!
-    C0 = G0.T
-    rows, cols = C0.shape
-    BigC = np.zeros((dimensions*rows, cols))
-    counter = 0
-    for i in range(0, dimensions):
-        K = np.dot(W, G[i].T)
-        for j in range(0, rows):
-            for k in range(0,cols):
-                BigC[counter,k] = K[j,k]
-            counter = counter + 1
-    BigC = np.mat(BigC)
-    return BigC
+def cell2matrix(G, sqrt_weights):
+    """
+    Stacks the row-weighted, transposed gradient matrices of each dimension on top of one another.
+
+    :param list G:
+        A list with one numpy.ndarray of shape (cardinality, number_of_points) per dimension.
+    :param numpy.ndarray sqrt_weights:
+        The square roots of the quadrature weights, with shape (number_of_points,) or (number_of_points, 1).
+    :return:
+        **BigC**: A numpy.ndarray of shape (dimensions x number_of_points, cardinality).
+    """
+    sqrt_weights = np.asarray(sqrt_weights).reshape(-1, 1)
+    return np.vstack([sqrt_weights * np.asarray(G_i).T for G_i in G])
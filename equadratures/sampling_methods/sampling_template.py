@@ -12,7 +12,7 @@ class Sampling(object):
         self.basis = basis
         self.points = points
         self.weights = weights
-        if self.weights is None:
+        if weights is None:
             self._set_weights()
     def _set_weights(self):
         P = self._get_multivariate_orthogonal_polynomial()
@@ -59,13 +59,13 @@ class Sampling(object):
 
         # Save time by returning if univariate!
         if dimensions == 1:
-            poly , _ , _ =  self.parameters[0]._get_orthogonal_polynomial(self.points, int(np.max(basis)))
+            poly , _ , _ =  self.parameters[0]._get_orthogonal_polynomial(self.points, int(np.max(basis)), derivatives=0)
             return poly
         else:
             for i in range(0, dimensions):
                 if len(self.points.shape) == 1:
                     self.points = np.asarray([self.points])
-                p[i] , _ , _ = self.parameters[i]._get_orthogonal_polynomial(self.points[:,i], int(np.max(basis[:,i])) )
+                p[i] , _ , _ = self.parameters[i]._get_orthogonal_polynomial(self.points[:,i], int(np.max(basis[:,i])), derivatives=0)
 
         # One loop for polynomials
         polynomial = np.ones((basis_entries, no_of_points))
@@ -3,6 +3,7 @@ from equadratures.sampling_methods.sampling_template import Sampling
 from equadratures.sampling_methods.tensorgrid import Tensorgrid
 from equadratures.basis import Basis
 import numpy as np
+SPARSE_GRID_POINT_TOLERANCE = 1e-12
 class Sparsegrid(Sampling):
     """
     The class defines a Tensorgrid sampling object.
@@ -31,35 +32,38 @@ class Sparsegrid(Sampling):
         """
         sparse_indices, sparse_factors, not_used = self.basis.get_basis()
         rows = len(sparse_indices)
-        cols = len(sparse_indices[0])
-
-        # For storage we use dictionaries
-        points_store = {}
-        weights_store = {}
-        indices = np.zeros((rows))
+        points_store = []
+        weights_store = []
         self.tensor_product_list = []
         for i in range(0,rows):
             orders = sparse_indices[i,:]
             myBasis = Basis('tensor-grid')
             myTensor = Tensorgrid(parameters=self.parameters, basis=myBasis, orders=orders.astype(int) )
             self.tensor_product_list.append(myTensor)
-            pts = myTensor.points
-            wts = myTensor.weights * sparse_factors[i]
-            points_store[i] = pts
-            weights_store[i] = wts
-            indices[i] = myTensor.basis.cardinality
-            del myTensor, myBasis
-        sum_indices = int(np.sum(indices))
-        points_saved = np.zeros((sum_indices, self.basis.dimensions))
-        weights_saved = np.zeros((sum_indices))
-        counter = int(0)
-        for i in range(0,rows):
-            for j in range(0, int(indices[i])):
-                for d in range(0, self.basis.dimensions):
-                    points_saved[counter,d] = points_store[i][j, d]
-                weights_saved[counter] = weights_store[i][j]
-                counter = counter + 1
-        self.points , indices = np.unique(points_saved, axis=0, return_index=True)
+            points_store.append(myTensor.points)
+            weights_store.append(myTensor.weights * sparse_factors[i])
+        points_per_tensor = [len(pts) for pts in points_store]
+        points_saved = np.vstack(points_store)
+        weights_saved = np.concatenate(weights_store)
+        # Points from different tensors that agree to within the tolerance (relative to the extent of each dimension) are merged.
+        keys = _get_point_keys(points_saved, SPARSE_GRID_POINT_TOLERANCE)
+        _, indices, inverse_indices = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        self.points = points_saved[indices]
         self.weights = weights_saved[indices]
+        # For each tensor, the rows of self.points that correspond to its points.
+        self.tensor_point_indices = np.split(inverse_indices.reshape(-1), np.cumsum(points_per_tensor)[:-1])
         self.sparse_indices = sparse_indices
         self.sparse_weights = sparse_factors
+def _get_point_keys(points, tolerance):
+    """
+    Private function that labels the coordinates of the points, dimension by dimension, so that points which agree to within the
+    tolerance in every dimension have the same row of integer labels. The values along each dimension are sorted, and a new label
+    starts wherever consecutive values differ by more than the tolerance, so no value is split from a neighbour within the tolerance.
+    """
+    scale = np.maximum(np.max(np.abs(points), axis=0), 1.0)
+    keys = np.zeros(points.shape, dtype=np.int64)
+    for d in range(0, points.shape[1]):
+        order = np.argsort(points[:, d], kind='stable')
+        gaps = np.diff(points[order, d]) > tolerance * scale[d]
+        keys[order, d] = np.concatenate([[0], np.cumsum(gaps)])
+    return keys
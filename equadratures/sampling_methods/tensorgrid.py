@@ -3,7 +3,8 @@ from equadratures.sampling_methods.sampling_template import Sampling
 import numpy as np
 class Tensorgrid(Sampling):
     """
-    The class defines a Tensorgrid sampling object.
+    The class defines a Tensorgrid sampling object. Only the univariate quadrature rules are computed on construction; the full
+    arrays of points and weights are generated from the underlying LazyTensorgrid when they are first accessed.
 
     :param list parameters: A list of parameters, where each element of the list is an instance of the Parameter class.
     :param Basis basis: An instance of the Basis class corresponding to the multi-index set used.
@@ -15,7 +16,7 @@ class Tensorgrid(Sampling):
             self.basis.set_orders(orders)
         self.dimensions = len(self.parameters)
         self._set_points(orders)
-        super(Tensorgrid, self).__init__(self.parameters, self.basis, self.points, self.weights)
+        super(Tensorgrid, self).__init__(self.parameters, self.basis)
     def _set_points(self, orders=None):
         """
         Generates a tensor grid quadrature rule based on the parameters in Poly.
@@ -25,28 +26,165 @@ class Tensorgrid(Sampling):
         :param list orders:
             A list of the highest polynomial orders along each dimension.
         """
-        # Initialize points and weights
-        pp = [1.0]
-        ww = [1.0]
-
         if orders is None:
             orders = self.basis.orders
+        self.tensor_rule = LazyTensorgrid(self.parameters, orders)
+    def _set_weights(self):
+        """
+        The weights of a tensor grid are products of the univariate quadrature weights, and are generated by the tensor rule.
+        """
+        self.weights = None
+    @property
+    def points(self):
+        """
+        The quadrature points, as a numpy.ndarray of shape (number_of_points, dimensions); generated on first access.
+        """
+        if self._points is None:
+            self._points = self.tensor_rule.get_points()
+        return self._points
+    @points.setter
+    def points(self, points):
+        self._points = points
+    @property
+    def weights(self):
+        """
+        The quadrature weights, as a numpy.ndarray of shape (number_of_points,); generated on first access.
+        """
+        if self._weights is None:
+            self._weights = self.tensor_rule.get_weights()
+        return self._weights
+    @weights.setter
+    def weights(self, weights):
+        self._weights = weights
+class LazyTensorgrid(object):
+    """
+    The class defines a tensor grid quadrature rule that only stores the univariate quadrature rule of each dimension. Points
+    and weights are generated on demand, either by their (flat) index in the grid, by slices, or in chunks. The ordering of the
+    points is the same as that of Tensorgrid, i.e., the last dimension varies the fastest.
 
-        # number of parameters
-        # For loop across each dimension
-        for u in range(0, self.dimensions):
+    :param list parameters: A list of parameters, where each element of the list is an instance of the Parameter class.
+    :param list orders: A list of the highest polynomial orders along each dimension.
 
-            # Call to get local quadrature method (for dimension 'u')
+    **Sample constructor initialisations**::
+
+        import numpy as np
+        from equadratures import *
+        from equadratures.sampling_methods.tensorgrid import LazyTensorgrid
+
+        param = Parameter(distribution='uniform', lower=-1., upper=1., order=4)
+        grid = LazyTensorgrid([param for i in range(0, 10)], orders=[4 for i in range(0, 10)])
+        for points, weights in grid.get_chunks(chunksize=10000):
+            print(points.shape)
+    """
+    def __init__(self, parameters, orders):
+        self.parameters = parameters
+        self.dimensions = len(self.parameters)
+        self.univariate_points = []
+        self.univariate_weights = []
+        for u in range(0, self.dimensions):
             local_points, local_weights = self.parameters[u]._get_local_quadrature(orders[u])
-            ww = np.kron(ww, local_weights)
-
-            # Tensor product of the points
-            dummy_vec = np.ones((len(local_points), 1))
-            dummy_vec2 = np.ones((len(pp), 1))
-            left_side = np.array(np.kron(pp, dummy_vec))
-            right_side = np.array( np.kron(dummy_vec2, local_points) )
-            pp = np.concatenate((left_side, right_side), axis = 1)
-
-        # Ignore the first column of pp
-        self.points = pp[:,1::]
-        self.weights = ww
+            self.univariate_points.append(np.asarray(local_points, dtype=float).reshape(-1))
+            self.univariate_weights.append(np.asarray(local_weights, dtype=float).reshape(-1))
+        self.shape = tuple(len(local_points) for local_points in self.univariate_points)
+        self.number_of_points = int(np.prod(self.shape, dtype=np.int64))
+    def __len__(self):
+        return self.number_of_points
+    def _get_flat_indices(self, indices=None):
+        """
+        Private function that converts an int, slice or array of indices into an array of flat indices.
+        """
+        if indices is None:
+            return np.arange(self.number_of_points)
+        if isinstance(indices, slice):
+            return np.arange(*indices.indices(self.number_of_points))
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        indices = np.where(indices < 0, indices + self.number_of_points, indices)
+        if np.any(indices < 0) or np.any(indices >= self.number_of_points):
+            raise IndexError('Tensor grid indices must lie in [0, '+str(self.number_of_points)+').')
+        return indices
+    def get_points(self, indices=None):
+        """
+        Returns the quadrature points.
+
+        :param LazyTensorgrid self:
+            An instance of the LazyTensorgrid class.
+        :param indices:
+            An int, slice or numpy.ndarray of flat indices of the points required. By default, all the points are returned.
+        :return:
+            **points**: A numpy.ndarray of quadrature points with shape (number_of_indices, dimensions).
+        """
+        flat_indices = self._get_flat_indices(indices)
+        multi_indices = np.unravel_index(flat_indices, self.shape)
+        points = np.zeros((len(flat_indices), self.dimensions))
+        for u in range(0, self.dimensions):
+            points[:, u] = self.univariate_points[u][multi_indices[u]]
+        return points
+    def get_weights(self, indices=None):
+        """
+        Returns the quadrature weights.
+
+        :param LazyTensorgrid self:
+            An instance of the LazyTensorgrid class.
+        :param indices:
+            An int, slice or numpy.ndarray of flat indices of the weights required. By default, all the weights are returned.
+        :return:
+            **weights**: A numpy.ndarray of quadrature weights with shape (number_of_indices,).
+        """
+        flat_indices = self._get_flat_indices(indices)
+        multi_indices = np.unravel_index(flat_indices, self.shape)
+        weights = np.ones(len(flat_indices))
+        for u in range(0, self.dimensions):
+            weights = weights * self.univariate_weights[u][multi_indices[u]]
+        return weights
+    def get_points_and_weights(self, indices=None):
+        """
+        Returns the quadrature points and weights.
+
+        :param LazyTensorgrid self:
+            An instance of the LazyTensorgrid class.
+        :param indices:
+            An int, slice or numpy.ndarray of flat indices. By default, all the points and weights are returned.
+        """
+        return self.get_points(indices), self.get_weights(indices)
+    def get_chunks(self, chunksize):
+        """
+        Returns a generator over the quadrature points and weights, in chunks of at most chunksize points.
+
+        :param LazyTensorgrid self:
+            An instance of the LazyTensorgrid class.
+        :param int chunksize:
+            The number of points per chunk.
+        """
+        chunksize = max(int(chunksize), 1)
+        for start in range(0, self.number_of_points, chunksize):
+            yield self.get_points_and_weights(slice(start, start + chunksize))
+    def get_tensor(self, values):
+        """
+        Reshapes values that are stored in the ordering of the points into the layout of the grid.
+
+        :param LazyTensorgrid self:
+            An instance of the LazyTensorgrid class.
+        :param numpy.ndarray values:
+            Values on the grid, with shape (number_of_points,) or (number_of_points, number_of_columns).
+        :return:
+            **values**: A numpy.ndarray with shape self.shape or self.shape + (number_of_columns,).
+        """
+        values = np.asarray(values)
+        return values.reshape(self.shape + values.shape[1:])
+    def apply_along_axis(self, values, transform, axis):
+        """
+        Applies a univariate linear transform along one dimension of the grid, i.e., computes (I x ... x transform x ... x I) values
+        without forming the Kronecker product. Transforms may be chained along different dimensions.
+
+        :param LazyTensorgrid self:
+            An instance of the LazyTensorgrid class.
+        :param numpy.ndarray values:
+            Values in the layout of the grid (see :meth:`get_tensor`), with shape (n_0, ..., n_{d-1}) or (n_0, ..., n_{d-1}, number_of_columns).
+        :param numpy.ndarray transform:
+            A numpy.ndarray with shape (m, n_axis).
+        :param int axis:
+            The dimension along which the transform is applied.
+        :return:
+            **values**: A numpy.ndarray with the same layout as the input, where the extent of dimension ``axis`` is now m.
+        """
+        return np.moveaxis(np.tensordot(transform, values, axes=([1], [axis])), 0, axis)
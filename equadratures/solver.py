@@ -1,14 +1,31 @@
 """Solvers for computing of a linear system."""
 import numpy as np
-from scipy.linalg import qr
+from scipy.linalg import qr, solve_triangular, lapack, cho_factor, cho_solve
+from scipy.sparse.linalg import LinearOperator
+import scipy.sparse as sparse
 from scipy.optimize import linprog, minimize
 from scipy.special import huber as huber_loss
 from copy import deepcopy
+from equadratures.cache import add_to_cache, get_fingerprint
 try:
     import cvxpy as cv
     cvxpy = True
 except ImportError as e:
     cvxpy = False
+FACTORISATION_CACHE_SIZE = 4
+# Above this number of columns, basis pursuit de-noising uses matrix-free (conjugate gradient) Newton steps by default.
+MATRIX_FREE_CARDINALITY = 4000
+# Number of regularisation parameters, and ratio of the smallest to the largest, on the default coordinate-descent elastic-net path.
+ELASTIC_NET_PATH_LENGTH = 100
+ELASTIC_NET_LAMDA_RATIO = 1e-3
+# Iteratively reweighted least squares: maximum number of iterations, and the smallest residual (relative to max|b|) that is
+# weighted in the L1 loss.
+IRLS_MAX_ITER = 500
+IRLS_L1_SMOOTHING = 1e-8
+# Relevance vector machine: basis terms whose precision alpha exceeds RVM_ALPHA_MAX / mean(b**2) are pruned, and the residual
+# sum of squares used to update the noise precision is bounded below by RVM_MINIMUM_NOISE_VARIANCE * ||b||**2.
+RVM_ALPHA_MAX = 1e12
+RVM_MINIMUM_NOISE_VARIANCE = 1e-14
 
 class Solver(object):
     """
@@ -17,6 +34,11 @@ class Solver(object):
     :param dict solver_args: Optional arguments centered around the specific solver.
             :param numpy.ndarray noise-level: The noise-level to be used in the basis pursuit de-noising solver.
             :param bool verbose: Default value of this input is set to ``False``; when ``True`` a string is printed to the screen detailing the solver convergence and condition number of the matrix.
+            :param concurrent.futures.Executor executor: An optional executor over which the cross-validation folds of the basis pursuit de-noising solver are run in parallel.
+            :param float param1: The regularisation parameter lambda of the ``elastic-net`` solver (1.0 by default), or the parameter of the ``huber`` solver. For the ``elastic-net`` solver, an array of candidate values, or ``cv`` for a regularisation path, selects lambda by 5-fold cross validation.
+            :param float param2: The L1/L2 mix alpha of the ``elastic-net`` solver.
+            :param string optimiser: The optimiser used by the ``least-absolute-residual``, ``huber`` and ``elastic-net`` solvers. Options include ``osqp`` (requires cvxpy), ``scipy`` and ``irls``. When cvxpy is not installed, ``scipy`` is used by default: a (sparse) linear program for ``least-absolute-residual``, and iteratively reweighted least squares for ``huber``. ``irls`` uses iteratively reweighted least squares for both, and its cost scales linearly with the number of samples. The ``elastic-net`` solver instead accepts ``osqp`` and ``coordinate-descent``; the latter is used when cvxpy is not installed.
+            :param bool matrix-free: If ``True``, the basis pursuit de-noising solver computes its Newton steps with conjugate gradients, using only products with A and A^T. By default, this is done when A has more than ``MATRIX_FREE_CARDINALITY`` columns.
     """
     def __init__(self, method, solver_args):
         self.method = method
@@ -27,6 +49,8 @@ class Solver(object):
         self.verbose = False
         self.max_iter = None
         self.opt = 'osqp'
+        self.executor = None
+        self.matrix_free = None
         if self.solver_args is not None:
             if 'noise-level' in self.solver_args: self.noise_level = solver_args.get('noise-level')
             if 'param1' in self.solver_args: self.param1 = solver_args.get('param1')
@@ -34,38 +58,138 @@ class Solver(object):
             if 'verbose' in self.solver_args: self.verbose = solver_args.get('verbose')
             if 'max-iter' in self.solver_args: self.max_iter = solver_args.get('max-iter')
             if 'optimiser' in self.solver_args: self.opt = solver_args.get('optimiser')
+            if 'executor' in self.solver_args: self.executor = solver_args.get('executor')
+            if 'matrix-free' in self.solver_args: self.matrix_free = solver_args.get('matrix-free')
         if self.opt=='osqp' and not cvxpy: 
-            self.opt='scipy'
+            self.opt='coordinate-descent' if self.method.lower() == 'elastic-net' else 'scipy'
         if self.method.lower() == 'compressed-sensing' or self.method.lower() == 'compressive-sensing':
-            self.solver = lambda A, b: basis_pursuit_denoising(A, b, self.noise_level, self.verbose)
+            self.solver = _solve_columnwise(lambda A, b: basis_pursuit_denoising(A, b, self.noise_level, self.verbose, self.executor, self.matrix_free))
         elif self.method.lower() == 'least-squares':
-            self.solver = lambda A, b: least_squares(A, b, self.verbose)
+            self.least_squares_solver = LeastSquaresSolver()
+            self.solver = lambda A, b: least_squares(A, b, self.verbose, self.least_squares_solver)
         elif self.method.lower() == 'minimum-norm':
             self.solver = lambda A, b: minimum_norm(A, b)
         elif self.method.lower() == 'numerical-integration':
             self.solver = lambda A, b: orthogonal_linear_system(A, b)
         elif self.method.lower() == 'least-squares-with-gradients':
-            self.solver = lambda A, b, C, d: constrained_least_squares(A, b, C, d, self.verbose)
+            self.least_squares_solver = LeastSquaresSolver()
+            self.solver = lambda A, b, C, d: constrained_least_squares(A, b, C, d, self.verbose, self.least_squares_solver)
         elif self.method.lower() == 'least-absolute-residual':
-            self.solver = lambda A, b: least_absolute_residual(A, b, self.verbose, self.opt)
+            self.solver = _solve_columnwise(lambda A, b: least_absolute_residual(A, b, self.verbose, self.opt))
         elif self.method.lower() == 'huber':
-            self.solver = lambda A, b: huber(A, b, self.verbose, self.param1, self.opt)
+            self.solver = _solve_columnwise(lambda A, b: huber(A, b, self.verbose, self.param1, self.opt))
         elif self.method.lower() == 'elastic-net':
-            self.solver = lambda A, b: elastic_net(A, b, self.verbose, self.param1, self.param2, self.opt)
+            self.solver = _solve_columnwise(lambda A, b: elastic_net(A, b, self.verbose, self.param1, self.param2, self.opt))
         elif self.method.lower() == 'relevance-vector-machine':
-            self.solver = lambda A, b: rvm(A, b, self.max_iter)
+            self.solver = _solve_columnwise(lambda A, b: rvm(A, b, self.max_iter))
         else:
             raise ValueError('You have not selected a valid method for solving the coefficients of the polynomial. Choose from compressed-sensing, least-squares, least-squares-with-gradients, least-absolute-residual, minimum-norm, numerical-integration, huber or elastic-net.')
     def get_solver(self):
         return self.solver
-def least_squares(A, b, verbose):
-    if np.__version__ < '1.14':
-        alpha = np.linalg.lstsq(A, b)
+def _solve_columnwise(solver):
+    """
+    Private function that wraps a solver for a single right-hand side, so that a b with several columns (outputs) is solved
+    one column at a time.
+    """
+    def columnwise_solver(A, b):
+        if np.ndim(b) == 1 or np.shape(b)[1] == 1:
+            return solver(A, b)
+        return np.hstack([np.reshape(solver(A, b[:, k:k+1]), (-1, 1)) for k in range(0, np.shape(b)[1])])
+    return columnwise_solver
+class LeastSquaresSolver(object):
+    """
+    Solves least-squares problems min ||Ax - b||, caching the factorisation of each matrix A against a fingerprint of its
+    shape and entries (a hash of all of its bytes, which is cheap relative to the factorisation). Repeated solves with the same A and a new b (e.g., bootstrap resamples, cross-validation folds or several outputs)
+    then only require applying Q^T and a triangular solve. Tall matrices of full rank are factorised with a Householder QR;
+    wide or rank deficient matrices with an SVD, which yields the same minimum-norm solution as numpy.linalg.lstsq.
+
+    :param int cache_size: The number of factorisations that are kept; the oldest one is evicted first. If 0, nothing is cached.
+
+    **Sample usage**::
+
+        solver = LeastSquaresSolver()
+        for b in bootstrap_samples:
+            x = solver.solve(A, b)
+        print(solver.get_condition_number(A))
+    """
+    def __init__(self, cache_size=FACTORISATION_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._factorisations = {}
+    def solve(self, A, b, verbose=False):
+        """
+        Solves the least-squares problem.
+
+        :param LeastSquaresSolver self:
+            An instance of the LeastSquaresSolver class.
+        :param numpy.ndarray A:
+            The matrix, with shape (m, n).
+        :param numpy.ndarray b:
+            The right-hand side(s), with shape (m,) or (m, k).
+        :param bool verbose:
+            If ``True``, the condition number of A is printed.
+        :return:
+            **x**: A numpy.ndarray with shape (n,) or (n, k).
+        """
+        factorisation = self._get_factorisation(A)
+        b = np.asarray(b, dtype=float)
+        rhs = b.reshape(b.shape[0], -1)
+        if factorisation['method'] == 'qr':
+            n = factorisation['R'].shape[0]
+            lwork = max(1, rhs.shape[1]) * 64
+            qtb, _, info = lapack.dormqr('L', 'T', factorisation['qr'], factorisation['tau'], np.array(rhs, order='F'), lwork)
+            x = solve_triangular(factorisation['R'], qtb[0:n, :])
+        else:
+            x = np.dot(factorisation['Vt'].T, factorisation['inv_s'].reshape(-1, 1) * np.dot(factorisation['U'].T, rhs))
+        if verbose is True:
+            print('The condition number of the matrix is '+str(factorisation['cond'])+'.')
+        return x.reshape((x.shape[0],) + b.shape[1:])
+    def get_condition_number(self, A):
+        """
+        Returns the 2-norm condition number of A, from the singular values of its (cached) factorisation.
+
+        :param LeastSquaresSolver self:
+            An instance of the LeastSquaresSolver class.
+        :param numpy.ndarray A:
+            The matrix, with shape (m, n).
+        """
+        return self._get_factorisation(A)['cond']
+    def _get_factorisation(self, A):
+        """
+        Private method that returns the factorisation of A from the cache, computing (and caching) it if required.
+        """
+        A = np.asarray(A, dtype=float)
+        if self.cache_size <= 0:
+            return _get_least_squares_factorisation(A)
+        fingerprint = get_fingerprint(A)
+        if fingerprint in self._factorisations:
+            return self._factorisations[fingerprint]
+        return add_to_cache(self._factorisations, fingerprint, _get_least_squares_factorisation(A), self.cache_size)
+def _get_least_squares_factorisation(A):
+    """
+    Private function that factorises A with a Householder QR (without forming Q) if A is tall and of full rank, and with an SVD
+    otherwise. The condition number is computed from the singular values of R, or of A.
+    """
+    m, n = A.shape
+    if m >= n and n > 0:
+        (qr_factors, tau), R = qr(A, mode='raw')
+        R = np.triu(R[0:n, 0:n])
+        singular_values = np.linalg.svd(R, compute_uv=False)
+        if singular_values[-1] > np.finfo(float).eps * m * singular_values[0]:
+            return {'method': 'qr', 'qr': qr_factors, 'tau': tau, 'R': R, 'cond': singular_values[0] / singular_values[-1]}
+    U, singular_values, Vt = np.linalg.svd(A, full_matrices=False)
+    inv_s = np.zeros(len(singular_values))
+    if len(singular_values) > 0:
+        rank = singular_values > np.finfo(float).eps * max(m, n) * singular_values[0]
+        inv_s[rank] = 1.0 / singular_values[rank]
+        with np.errstate(divide='ignore'):
+            cond = singular_values[0] / singular_values[-1]
     else:
-      alpha = np.linalg.lstsq(A, b, rcond=None)
-    if verbose is True:
-        print('The condition number of the matrix is '+str(np.linalg.cond(A))+'.')
-    return alpha[0]
+        cond = np.inf
+    return {'method': 'svd', 'U': U, 'inv_s': inv_s, 'Vt': Vt, 'cond': cond}
+def least_squares(A, b, verbose, solver=None):
+    if solver is None:
+        solver = LeastSquaresSolver(cache_size=0)
+    return solver.solve(A, b, verbose)
 def minimum_norm(A, b):
     Q, R, pvec = qr(A, pivoting=True)
     m, n = A.shape
@@ -77,12 +201,12 @@ def minimum_norm(A, b):
     temp = P[indices,:]
     P1 = temp[0:n, 0:r]
     x = np.dot(P1 ,  np.dot( np.linalg.inv(R1)  , np.dot( Q1.T , b ) ) )
-    x = x.reshape(n, 1)
+    x = x.reshape(n, -1)
     return x
 def orthogonal_linear_system(A, b):
     coefficients = np.dot(A.T, b)
     return coefficients
-def constrained_least_squares(A, b, C, d, verbose):
+def constrained_least_squares(A, b, C, d, verbose, solver=None):
     # Size of matrices!
     m, n = A.shape
     p, q = b.shape
@@ -94,10 +218,10 @@ def constrained_least_squares(A, b, C, d, verbose):
     elif k != s:
         raise ValueError( 'solver: error: mismatch in sizes of C and d')
     if m >= n:
-        return least_squares(np.vstack([A, C]), np.vstack([b, d]), verbose)
+        return least_squares(np.vstack([A, C]), np.vstack([b, d]), verbose, solver)
     else:
-        return null_space_method(C, d, A, b, verbose)
-def null_space_method(Ao, bo, Co, do, verbose):
+        return null_space_method(C, d, A, b, verbose, solver)
+def null_space_method(Ao, bo, Co, do, verbose, solver=None):
     A = deepcopy(Ao)
     C = deepcopy(Co)
     b = deepcopy(bo)
@@ -110,18 +234,39 @@ def null_space_method(Ao, bo, Co, do, verbose):
     # Lower triangular matrix!
     L = R.T
     L = L[0:p, 0:p]
-    y1 = least_squares(L, d, verbose)
+    if solver is None:
+        solver = LeastSquaresSolver()
+    y1 = least_squares(L, d, verbose, solver)
     c = b - np.dot( np.dot(A , Q1) , y1)
     AQ2 = np.dot(A , Q2)
-    y2 = least_squares(AQ2 , c, verbose)
+    y2 = least_squares(AQ2 , c, verbose, solver)
     x = np.dot(Q1 , y1) + np.dot(Q2 , y2)
-    cond = np.linalg.cond(AQ2)
+    cond = solver.get_condition_number(AQ2)
     if verbose is True:
         print('The condition number of the matrix is '+str(cond)+'.')
     return x
-def basis_pursuit_denoising(Ao, bo, noise_level, verbose):
-    A = deepcopy(Ao)
-    y = deepcopy(bo)
+def basis_pursuit_denoising(Ao, bo, noise_level, verbose, executor=None, use_CG=None):
+    """
+    Solves the basis pursuit de-noising problem, selecting the noise level by 5-fold cross validation.
+
+    :param Ao:
+        The matrix, either as a numpy.ndarray, or as a scipy.sparse.linalg.LinearOperator that provides matvec and rmatvec.
+    :param numpy.ndarray bo:
+        The right hand side column vector.
+    :param noise_level:
+        The noise level(s) to be considered. By default, 1e-8 to 1e-1.
+    :param bool verbose:
+        If ``True``, the noise level used is printed.
+    :param concurrent.futures.Executor executor:
+        An optional executor over which the cross-validation folds are run in parallel.
+    :param bool use_CG:
+        If ``True``, the Newton steps are computed with conjugate gradients, without forming A^T A or A A^T. By default, this is done
+        for linear operators, and for matrices with more than ``MATRIX_FREE_CARDINALITY`` columns.
+    """
+    A = Ao if isinstance(Ao, LinearOperator) else np.asarray(Ao)
+    y = np.asarray(bo).flatten()
+    if use_CG is None:
+        use_CG = isinstance(A, LinearOperator) or A.shape[1] > MATRIX_FREE_CARDINALITY
     N = A.shape[0]
     # Possible noise levels
     log_eta = [-8,-7,-6,-5,-4,-3,-2,-1]
@@ -134,31 +279,19 @@ def basis_pursuit_denoising(Ao, bo, noise_level, verbose):
         except TypeError:
             eta = [noise_level]
         log_eta =  [np.log10(i) for i in eta]
-    errors = []
-    mean_errors = np.zeros(len(eta))
-    # 5 fold cross validation
+    # 5 fold cross validation; each fold traverses all the noise levels, and the folds are independent of one another.
+    folds = _get_cross_validation_folds(N, 5)
+    if executor is None:
+        fold_errors = [_get_fold_errors(A, y, indices, eta, use_CG) for indices in folds]
+    else:
+        futures = [executor.submit(_get_fold_errors, A, y, indices, eta, use_CG) for indices in folds]
+        fold_errors = [future.result() for future in futures]
+    fold_errors = np.array(fold_errors).reshape(len(folds), len(eta))
+    mean_errors = np.full(len(eta), np.inf)
     for e in range(len(eta)):
-        for n in range(5):
-            try:
-                indices = [int(i) for i in n * np.ceil(N/5.0) + range(int(np.ceil(N/5.0))) if i < N]
-                A_ver = A[indices]
-                A_train = np.delete(A, indices, 0)
-                y_ver = y[indices].flatten()
-                if len(y_ver) == 0:
-                    continue
-                y_train = np.delete(y, indices).flatten()
-
-                x_train = _bp_denoise(A_train, y_train, eta[e])
-                y_trained = np.reshape(np.dot(A_ver, x_train), len(y_ver))
-
-                assert y_trained.shape == y_ver.shape
-                errors.append(np.mean(np.abs(y_trained - y_ver))/len(y_ver))
-            except np.linalg.LinAlgError:
-                continue
-        if len(errors) == 0:
-            mean_errors[e] = np.inf
-        else:
-            mean_errors[e] = np.mean(errors)
+        valid_errors = fold_errors[:, e][~np.isnan(fold_errors[:, e])]
+        if len(valid_errors) > 0:
+            mean_errors[e] = np.mean(valid_errors)
     sorted_ind = np.argsort(mean_errors)
     x = None
     ind = 0
@@ -166,17 +299,64 @@ def basis_pursuit_denoising(Ao, bo, noise_level, verbose):
         if ind >= len(log_eta):
             raise ValueError('Singular matrix!! Reconsider sample points!')
         try:
-            x = _bp_denoise(A, y, eta[sorted_ind[ind]])
+            x = _bp_denoise(A, y, eta[sorted_ind[ind]], use_CG=use_CG)
         except np.linalg.LinAlgError:
             ind += 1
     if verbose:
         print('The noise level used is '+str(eta[sorted_ind[ind]])+'.')
     return np.reshape(x, (len(x),1))
+def _get_cross_validation_folds(number_of_samples, number_of_folds):
+    """
+    Private function that splits the rows into contiguous cross-validation folds, returning the (verification) indices of each
+    non-empty fold.
+    """
+    fold_size = int(np.ceil(number_of_samples / float(number_of_folds)))
+    return [np.arange(n * fold_size, min((n + 1) * fold_size, number_of_samples)) for n in range(number_of_folds) \
+            if n * fold_size < number_of_samples]
+def _get_fold_errors(A, y, indices, eta, use_CG=False):
+    """
+    Private function that trains on all but the given rows, and returns the verification error on those rows for every noise
+    level (NaN where the training failed). The noise levels are visited in increasing order, so that the solution for one noise
+    level is a feasible warm start for the next.
+    """
+    train_indices = np.delete(np.arange(A.shape[0]), indices)
+    A_ver, y_ver = _get_rows(A, indices), y[indices]
+    A_train, y_train = _get_rows(A, train_indices), y[train_indices]
+    AtA = None if use_CG else np.dot(A_train.T, A_train)
+    errors = np.full(len(eta), np.nan)
+    x_train = None
+    for e in np.argsort(eta):
+        try:
+            x_train = _bp_denoise(A_train, y_train, eta[e], x0=x_train, use_CG=use_CG, AtA=AtA)
+        except np.linalg.LinAlgError:
+            x_train = None
+            continue
+        y_trained = np.reshape(A_ver.dot(x_train), len(y_ver))
+        errors[e] = np.mean(np.abs(y_trained - y_ver))/len(y_ver)
+    return errors
+def _get_rows(A, indices):
+    """
+    Private function that returns the given rows of a matrix, or a linear operator restricted to those rows.
+    """
+    if not isinstance(A, LinearOperator):
+        return A[indices]
+    def rmatvec(w):
+        z = np.zeros(A.shape[0])
+        z[indices] = np.asarray(w).flatten()
+        return A.rmatvec(z)
+    return LinearOperator((len(indices), A.shape[1]), dtype=float, matvec=lambda v: A.matvec(v).flatten()[indices], \
+            rmatvec=rmatvec)
+def _get_gram_operator(A):
+    """
+    Private function that returns A A^T as a linear operator, without forming it.
+    """
+    return LinearOperator((A.shape[0], A.shape[0]), dtype=float, matvec=lambda v: A.dot(A.T.dot(np.asarray(v).flatten())))
 def _CG_solve(A, b, max_iters, tol):
     """
-    Solves Ax = b iteratively using conjugate gradient, assuming A is a symmetric positive definite matrix.
+    Solves Ax = b iteratively using conjugate gradient, assuming A is a symmetric positive definite matrix. A is only accessed
+    through products A.dot(d); a direction of non-positive curvature shows that A is not positive definite.
     :param numpy-matrix A:
-        The matrix.
+        The matrix, or a scipy.sparse.linalg.LinearOperator.
     :param numpy-array b:
         The right hand side column vector.
     :param int max_iters:
@@ -184,33 +364,32 @@ def _CG_solve(A, b, max_iters, tol):
     :param double tol:
         Tolerance for cut-off.
     """
-    if not(np.all(np.linalg.eigvals(A) > 0)):
-        raise ValueError('A is not symmetric positive definite.')
     n = A.shape[0]
-    b = b.astype(np.float64)
-    b = b.reshape((len(b),1))
-
+    b = np.asarray(b, dtype=np.float64).flatten()
 
     #Initialization
-    x = np.zeros((n,1))
+    x = np.zeros(n)
     r = b.copy()
 
     d = r.copy()
     iterations = 0
-    delta = sum(r**2)
-    delta_0 = sum(b**2)
+    delta = np.dot(r, r)
+    delta_0 = np.dot(b, b)
     bestx = x.copy()
     bestres = np.sqrt(delta/delta_0)
     residual = np.sqrt(delta / delta_0)
 
     while (iterations < max_iters) and (delta > (tol**2) * delta_0):
 
-        q = np.dot(A,d)
-        alpha = delta / sum(d * q)
+        q = A.dot(d)
+        curvature = np.dot(d, q)
+        if curvature <= 0.0:
+            raise ValueError('A is not symmetric positive definite.')
+        alpha = delta / curvature
 
         x += alpha * d
         r -= alpha * q
-        new_delta = sum(r**2)
+        new_delta = np.dot(r, r)
         beta = new_delta / delta
         d = r + beta * d
 
@@ -223,30 +402,40 @@ def _CG_solve(A, b, max_iters, tol):
         iterations += 1
 
     return x.flatten(), residual, iterations
-def _bp_denoise(A, b, epsilon, x0 = None, lbtol = 1e-3, mu = 10, cgtol = 1e-8, cgmaxiter = 200, verbose = False, use_CG = False):
+def _bp_denoise(A, b, epsilon, x0 = None, lbtol = 1e-3, mu = 10, cgtol = 1e-8, cgmaxiter = 200, verbose = False, use_CG = False, AtA = None):
     """
     Solving the basis pursuit de-noising problem.
     :param numpy-matrix A:
-        The matrix.
+        The matrix, or a scipy.sparse.linalg.LinearOperator, in which case use_CG must be ``True``.
     :param numpy-array b:
         The right hand side column vector.
     :param double epsilon:
         The noise.
     :param numpy-array x0:
         Initial solution  if not provided the least norm solution is used.
+    :param bool use_CG:
+        If ``True``, the linear systems are solved with conjugate gradients, using only products with A and A^T.
+    :param numpy-array AtA:
+        The matrix A^T A, if it has already been computed. It is not required if use_CG is ``True``.
     """
     newtontol = lbtol
+    if isinstance(A, LinearOperator):
+        use_CG = True
+    if AtA is None and not use_CG:
+        AtA = np.dot(A.T, A)
     newtonmaxiter = 50
 
     b = b.flatten()
+    # the starting point must satisfy ||Ax - b|| <= epsilon, so the CG tolerance for it is relative to epsilon.
+    start_cgtol = np.min([cgtol, 0.1 * epsilon / np.max([np.linalg.norm(b), np.finfo(float).tiny])])
 
     # starting point --- make sure that it is feasible
     if not(x0 is None):
-        if (np.linalg.norm(np.dot(A,x0) - b) > epsilon):
+        if (np.linalg.norm(A.dot(x0) - b) > epsilon):
             if verbose:
                 print('Starting point infeasible  using x0 = At*inv(AAt)*y.')
             if use_CG:
-                w, cgres, cgiter =  _CG_solve(np.dot(A,A.T),b,cgmaxiter,cgtol)
+                w, cgres, cgiter =  _CG_solve(_get_gram_operator(A),b,cgmaxiter,start_cgtol)
             else:
                 w = np.linalg.solve(np.dot(A,A.T),b).flatten()
                 cgres = np.linalg.norm(np.dot(np.dot(A,A.T), w).flatten() - b.flatten()) / np.linalg.norm(b)
@@ -257,12 +446,12 @@ def _bp_denoise(A, b, epsilon, x0 = None, lbtol = 1e-3, mu = 10, cgtol = 1e-8, c
                     print('A*At is ill-conditioned: cannot find starting point' )
               xp = x0.copy()
               return xp
-            x0 = np.dot(A.T, w)
+            x0 = A.T.dot(w)
     else:
         if verbose:
             print('No x0. Using x0 = At*inv(AAt)*y.')
         if use_CG:
-            w, cgres, cgiter =  _CG_solve(np.dot(A,A.T),b,cgmaxiter,cgtol)
+            w, cgres, cgiter =  _CG_solve(_get_gram_operator(A),b,cgmaxiter,start_cgtol)
         else:
             w = np.linalg.solve(np.dot(A,A.T),b).flatten()
             cgres = np.linalg.norm(np.dot(np.dot(A,A.T), w).flatten() - b.flatten()) / np.linalg.norm(b)
@@ -271,10 +460,10 @@ def _bp_denoise(A, b, epsilon, x0 = None, lbtol = 1e-3, mu = 10, cgtol = 1e-8, c
               if verbose:
                     print("cgres = " + str(cgres) )
                     print('A*At is ill-conditioned: cannot find starting point' )
-        x0 = np.dot(A.T, w)
+        x0 = A.T.dot(w)
 
     x = x0.copy()
-    r = np.reshape(np.dot(A, x), len(b)) - b
+    r = np.reshape(A.dot(x), len(b)) - b
     N = len(x0)
     u = (0.95)*np.abs(x0) + (0.10)*np.max(np.abs(x0))     #arbitrary u starting point?
     if verbose:
@@ -285,7 +474,7 @@ def _bp_denoise(A, b, epsilon, x0 = None, lbtol = 1e-3, mu = 10, cgtol = 1e-8, c
         print('Number of log barrier iterations = ' + str(lbiter) )
     totaliter = 0
     for ii in range(lbiter+1):
-      xp, up, ntiter =  _l1qc_newton(x, u, A, b, epsilon, tau, newtontol, newtonmaxiter, cgtol, cgmaxiter, verbose, use_CG)
+      xp, up, ntiter =  _l1qc_newton(x, u, A, b, epsilon, tau, newtontol, newtonmaxiter, cgtol, cgmaxiter, verbose, use_CG, AtA)
       totaliter += ntiter
       if verbose:
           print('Log barrier iter = ' + str(ii) + ', l1 = ' + str(np.sum(np.abs(xp))) + ', functional = ' + str(np.sum(up)) + \
@@ -295,24 +484,25 @@ def _bp_denoise(A, b, epsilon, x0 = None, lbtol = 1e-3, mu = 10, cgtol = 1e-8, c
       u = up.copy()
       tau *= mu
     return xp
-def _l1qc_newton(x0, u0, A, b, epsilon, tau, newtontol, newtonmaxiter, cgtol, cgmaxiter, verbose, use_CG):
+def _l1qc_newton(x0, u0, A, b, epsilon, tau, newtontol, newtonmaxiter, cgtol, cgmaxiter, verbose, use_CG, AtA=None):
     # line search parameters
     alpha = 0.01
     beta = 0.5
-    AtA = np.dot(A.T,A)
+    if AtA is None and not use_CG:
+        AtA = np.dot(A.T,A)
     x = x0.flatten()
     u = u0.flatten()
-    r = np.dot(A, x).flatten() - b.flatten()
+    r = A.dot(x).flatten() - b.flatten()
     fu1 = x - u
     fu2 = -x - u
-    fe = 0.5*(np.asscalar(np.dot(r.T,r)) - epsilon**2)
+    fe = 0.5*(float(np.dot(r.T,r)) - epsilon**2)
     f = np.sum(u) - (1.0/tau) * (np.sum(np.log(-fu1)) + np.sum(np.log(-fu2)) + np.log(-fe))
 
     niter = 0
     done = 0
     while (not(done)):
 
-      atr = np.dot(A.T, r)
+      atr = A.T.dot(r)
 
       ntgz = 1.0/fu1 - 1.0/fu2 + 1.0/fe * atr
       ntgu = -tau - 1.0/fu1 - 1.0/fu2
@@ -324,10 +514,18 @@ def _l1qc_newton(x0, u0, A, b, epsilon, tau, newtontol, newtonmaxiter, cgtol, cg
 
       w1p = ntgz - sig12/sig11 *ntgu
 
-      H11p = np.diag(sigx.reshape(len(sigx))) - (1.0/fe) * AtA + (1.0/fe)**2 * np.outer(atr,atr)
       if use_CG:
-          dx, cgres, cgiter =  _CG_solve(H11p, w1p, cgmaxiter, cgtol)
+          # H11p = diag(sigx) - (1/fe) A^T A + (1/fe)^2 atr atr^T, applied without forming it.
+          H11p = LinearOperator((len(x), len(x)), dtype=float, matvec=lambda v, sigx=sigx, fe=fe, atr=atr: \
+                  sigx * v.flatten() - (1.0/fe) * A.T.dot(A.dot(v.flatten())) + (1.0/fe)**2 * np.dot(atr, v.flatten()) * atr)
+          try:
+              dx, cgres, cgiter =  _CG_solve(H11p, w1p, cgmaxiter, cgtol)
+          except ValueError:
+              # H11p is only positive definite while the iterate is strictly feasible.
+              dx, cgres, cgiter = np.zeros(len(x)), np.inf, -1
       else:
+          H11p = (-1.0/fe) * AtA + (1.0/fe)**2 * np.outer(atr,atr)
+          H11p[np.diag_indices(len(sigx))] += sigx
           dx = np.linalg.solve(H11p, w1p).flatten()
           cgres = np.linalg.norm(np.dot(H11p, dx).flatten() - w1p.flatten()) / np.linalg.norm(w1p)
           cgiter = -1
@@ -338,7 +536,7 @@ def _l1qc_newton(x0, u0, A, b, epsilon, tau, newtontol, newtonmaxiter, cgtol, cg
           xp = x.flatten()
           up = u.flatten()
           return xp, up, 0
-      Adx = np.dot(A,dx).flatten()
+      Adx = A.dot(dx).flatten()
 
 
       du = (1.0/sig11) * ntgu - (sig12/sig11)*dx
@@ -346,7 +544,7 @@ def _l1qc_newton(x0, u0, A, b, epsilon, tau, newtontol, newtonmaxiter, cgtol, cg
       # minimum step size that stays in the interior
       aqe = np.dot(Adx.T, Adx)
       bqe = 2.0*np.dot(r.T, Adx)
-      cqe = np.asscalar(np.dot(r.T,r)) - epsilon**2
+      cqe = float(np.dot(r.T,r)) - epsilon**2
 
       smax = np.min(np.hstack([ 1.0,np.min(np.hstack([-fu1[(dx-du) > 0] / (dx[(dx-du) > 0] - du[(dx-du) > 0]),\
         -fu2[(-dx-du) > 0] / (-dx[(-dx-du) > 0] - du[(-dx-du) > 0]), \
@@ -400,6 +598,9 @@ def _l1qc_newton(x0, u0, A, b, epsilon, tau, newtontol, newtonmaxiter, cgtol, cg
 def least_absolute_residual(A, b, verbose, opt):
     '''
     Solves Ax=b by minimising the L1 norm (absolute residuals).
+    With opt='scipy' (the default without cvxpy), a linear program with sparse constraints is solved; the coefficients are
+    unbounded, whereas earlier versions used the default bounds of linprog, which constrained them to be non-negative.
+    With opt='irls', iteratively reweighted least squares is used, with weights 1/max(|r|, IRLS_L1_SMOOTHING*max|b|).
     '''
     N, d = A.shape
     if verbose: print('Solving for coefficients with least-absolute-residual')
@@ -420,13 +621,19 @@ def least_absolute_residual(A, b, verbose, opt):
     elif opt=='scipy':
         if verbose: print('Solving using scipy linprog')
         c = np.hstack([np.zeros(d), np.ones(N)])
-        A1 = np.hstack([A, -np.eye(N)])
-        A2 = np.hstack([-A, -np.eye(N)])
-        AA = np.vstack([A1, A2])
+        A1 = sparse.hstack([A, -sparse.identity(N)])
+        A2 = sparse.hstack([-A, -sparse.identity(N)])
+        AA = sparse.vstack([A1, A2]).tocsr()
         bb = np.hstack([b.reshape(-1), -b.reshape(-1)])
-        res = linprog(c, A_ub=AA, b_ub=bb)
+        res = linprog(c, A_ub=AA, b_ub=bb, bounds=[(None, None)] * d + [(0, None)] * N)
         return res.x[:d]
 
+    # Use iteratively reweighted least squares
+    elif opt=='irls':
+        if verbose: print('Solving using iteratively reweighted least squares')
+        delta = IRLS_L1_SMOOTHING * np.max([np.max(np.abs(b)), np.finfo(float).tiny])
+        return _irls(A, b, lambda r: 1.0 / np.maximum(np.abs(r), delta), lambda r: np.sum(np.abs(r)), verbose)
+
 def huber(A, b, verbose, M, opt):
     '''
     Solves Ax=b by minimising the Huber loss function. 
@@ -434,6 +641,7 @@ def huber(A, b, verbose, M, opt):
     function is identical to the least squares (L2) penalty for small residuals (i.e. ||Ax-b||**2<=M). 
     But on large residuals (||Ax-b||**2>M), its penalty is lower (L1) and increases linearly rather than quadratically. 
     It is thus more forgiving of outliers.
+    With opt='scipy' or opt='irls', iteratively reweighted least squares is used, with weights min(1, M/|r|).
     '''
     if verbose: print('Huber regression with M=%.2f.' %M)
 
@@ -461,9 +669,37 @@ def huber(A, b, verbose, M, opt):
         prob.solve(solver=cv.OSQP,verbose=verbose,polish=True)
         x = x.value 
 
-    # Use scipy linprog for optimising
-    elif opt=='scipy':
-        raise ValueError( 'At present cvxpy, must be installed for huber regression to be selected.')
+    # Use iteratively reweighted least squares
+    elif opt=='scipy' or opt=='irls':
+        if verbose: print('Solving using iteratively reweighted least squares')
+        x = _irls(A, b, lambda r: M / np.maximum(np.abs(r), M), lambda r: np.sum(huber_loss(M, r)), verbose)
+    return x
+def _irls(A, b, get_weights, get_loss, verbose, tol=1e-10, max_iter=IRLS_MAX_ITER):
+    '''
+    Private function that minimises a robust loss of the residuals Ax-b by iteratively reweighted least squares, starting from the
+    least squares solution. Each iteration factorises the d x d weighted normal equations A^T W A once (Cholesky, or a QR of
+    W^(1/2) A if they are numerically singular), so the cost is linear in the number of rows. Iterations stop once the relative
+    decrease of the loss is below tol.
+    '''
+    A = np.asarray(A, dtype=float)
+    b = np.asarray(b, dtype=float).reshape(-1)
+    x = np.linalg.lstsq(A, b, rcond=None)[0]
+    loss = get_loss(np.dot(A, x) - b)
+    for iteration in range(max_iter):
+        weights = get_weights(np.dot(A, x) - b)
+        try:
+            x_new = cho_solve(cho_factor(np.dot(A.T, weights.reshape(-1,1) * A)), np.dot(A.T, weights * b))
+        except np.linalg.LinAlgError:
+            sqrt_weights = np.sqrt(weights)
+            Q, R = qr(sqrt_weights.reshape(-1,1) * A, mode='economic')
+            x_new = np.linalg.lstsq(R, np.dot(Q.T, sqrt_weights * b), rcond=None)[0]
+        loss_new = get_loss(np.dot(A, x_new) - b)
+        if loss_new > loss:
+            break
+        x, loss_change, loss = x_new, loss - loss_new, loss_new
+        if loss_change <= tol * loss:
+            break
+    if verbose: print('Iteratively reweighted least squares finished after %d iterations with loss %.6e.' %(iteration + 1, loss))
     return x
 
 def elastic_net(A, b, verbose, lamda_val, alpha_val, opt):
@@ -476,77 +712,204 @@ def elastic_net(A, b, verbose, lamda_val, alpha_val, opt):
     Note, to set lamda1 and lamda 2 directly:
     lamda = lamda1 + lamda2
     alpha = lamda1 / (lamda1 + lamda2)
+    With opt='coordinate-descent', the problem is solved by coordinate descent along a warm-started path of decreasing lamda,
+    with the strong rules used to screen out coefficients; opt='osqp' requires cvxpy. If lamda is an array of candidates, or 'cv' for a regularisation
+    path, it is chosen by 5-fold cross validation (with coordinate descent) before solving.
     '''
     N,d = A.shape
-    if lamda_val == None: lamda_val = 1.0
+    if opt != 'osqp' and opt != 'coordinate-descent':
+        raise ValueError('Choose from osqp or coordinate-descent for the elastic-net optimiser.')
+    if opt == 'osqp' and not cvxpy:
+        raise ValueError('cvxpy must be installed for the osqp elastic-net optimiser; choose coordinate-descent instead.')
     if alpha_val == None: alpha_val = 0.5 
+    if lamda_val is None:
+        lamda_val = 1.0
+    elif isinstance(lamda_val, str) or np.ndim(lamda_val) > 0:
+        lamda_val = _get_elastic_net_cv_lamda(A, b, lamda_val, alpha_val)
+    if opt == 'coordinate-descent':
+        return _elastic_net_coordinate_descent(A, b, verbose, lamda_val, alpha_val)
     if verbose: print('Elastic net regression with lambda=%.2f and alpha=%.2f.' %(lamda_val,alpha_val))
 
     # Use cvxpy with OSQP for optimising 
-    if opt=='osqp':
-        if verbose: print('Solving using cvxpy with OSQP solver')
-        # Define problem
-        b = b.squeeze()
-        x = cv.Variable(d)
-        lamda1 = cv.Parameter(nonneg=True)
-        lamda2 = cv.Parameter(nonneg=True)
-        #objective = 0.5*cv.sum_squares(A*x - b) + lamda1*cv.norm1(x) #+ 0.5*lamda2*cv.pnorm(x, p=2)**2
-        objective = 0.5*cv.sum_squares(A@x - b) + lamda1*cv.norm1(x) + 0.5*lamda2*cv.sum_squares(x)
-        prob = cv.Problem(cv.Minimize(objective))
-        # Solve with OSQP
-        lamda1.value = lamda_val*alpha_val
-        lamda2.value = lamda_val*(1.-alpha_val)
-        prob.solve(solver=cv.OSQP,verbose=verbose)
-        x = x.value.reshape(-1,1)
-
-    # Use scipy linprog for optimising
-    elif opt=='scipy':
-        raise ValueError( 'At present cvxpy, must be installed for elastic net regression to be selected.')
+    if verbose: print('Solving using cvxpy with OSQP solver')
+    # Define problem
+    b = b.squeeze()
+    x = cv.Variable(d)
+    lamda1 = cv.Parameter(nonneg=True)
+    lamda2 = cv.Parameter(nonneg=True)
+    #objective = 0.5*cv.sum_squares(A*x - b) + lamda1*cv.norm1(x) #+ 0.5*lamda2*cv.pnorm(x, p=2)**2
+    objective = 0.5*cv.sum_squares(A@x - b) + lamda1*cv.norm1(x) + 0.5*lamda2*cv.sum_squares(x)
+    prob = cv.Problem(cv.Minimize(objective))
+    # Solve with OSQP
+    lamda1.value = lamda_val*alpha_val
+    lamda2.value = lamda_val*(1.-alpha_val)
+    prob.solve(solver=cv.OSQP,verbose=verbose)
+    x = x.value.reshape(-1,1)
     return x
+def _get_elastic_net_cv_lamda(A, b, lamda_val, alpha_val, tol=1e-12, max_iter=1000):
+    """
+    Private function that selects lamda by 5-fold cross validation, with coordinate descent, from an array of candidates, or
+    from a regularisation path if lamda_val is 'cv'.
+    """
+    A = np.asarray(A, dtype=float)
+    b = np.asarray(b, dtype=float).flatten()
+    if isinstance(lamda_val, str):
+        if lamda_val.lower() != 'cv':
+            raise ValueError('For the elastic net, param1 must be a number, an array of candidates, or cv.')
+        lamdas = _get_elastic_net_lamda_max(A.T @ b, alpha_val) * np.logspace(0, np.log10(ELASTIC_NET_LAMDA_RATIO), \
+                ELASTIC_NET_PATH_LENGTH)
+    else:
+        lamdas = np.sort(np.asarray(lamda_val, dtype=float).reshape(-1))[::-1]
+    if len(lamdas) == 1:
+        return lamdas[0]
+    folds = _get_cross_validation_folds(len(b), 5)
+    fold_errors = np.array([_get_elastic_net_fold_errors(A, b, indices, lamdas, alpha_val, tol, max_iter) for indices in folds])
+    return lamdas[np.argmin(np.mean(fold_errors, axis=0))]
+def _elastic_net_coordinate_descent(A, b, verbose, lamda_val, alpha_val, tol=1e-12, max_iter=1000):
+    """
+    Private function that solves the elastic net problem of elastic_net by coordinate descent, for a single lamda.
+    """
+    A = np.asarray(A, dtype=float)
+    b = np.asarray(b, dtype=float).flatten()
+    Atb = A.T @ b
+    lamda_max = _get_elastic_net_lamda_max(Atb, alpha_val)
+    if verbose: print('Elastic net regression with lambda=%.2e and alpha=%.2f, solved by coordinate descent.' %(lamda_val,alpha_val))
+    # Warm start from lamda_max, where all the coefficients are zero.
+    path = _get_elastic_net_warm_start_path(lamda_max, lamda_val)
+    x = _get_elastic_net_path(A.T @ A, Atb, path, alpha_val, tol * np.dot(b, b), max_iter)[-1]
+    return x.reshape(-1,1)
+def _get_elastic_net_lamda_max(Atb, alpha):
+    """
+    Private function that returns the smallest lamda for which all the elastic net coefficients are zero (for alpha > 0).
+    """
+    return np.max([np.max(np.abs(Atb)), np.finfo(float).tiny]) / np.max([alpha, ELASTIC_NET_LAMDA_RATIO])
+def _get_elastic_net_warm_start_path(lamda_max, lamda):
+    """
+    Private function that returns a geometric sequence of lamda values from lamda_max down to lamda, ending at lamda.
+    """
+    if lamda >= lamda_max:
+        return np.array([lamda])
+    path = lamda_max * np.logspace(0, np.log10(ELASTIC_NET_LAMDA_RATIO), ELASTIC_NET_PATH_LENGTH // 5)
+    return np.append(path[path > lamda], lamda)
+def _get_elastic_net_fold_errors(A, b, indices, lamdas, alpha, tol, max_iter):
+    """
+    Private function that trains along the lamda path on all but the given rows, and returns the mean squared verification error
+    on those rows for every lamda.
+    """
+    A_train, b_train = np.delete(A, indices, 0), np.delete(b, indices)
+    coefficients = _get_elastic_net_path(A_train.T @ A_train, A_train.T @ b_train, lamdas, alpha, tol * np.dot(b_train, b_train), \
+            max_iter)
+    return np.mean((A[indices] @ coefficients.T - b[indices].reshape(-1,1))**2, axis=0)
+def _get_elastic_net_path(gram, Atb, lamdas, alpha, tol, max_iter):
+    """
+    Private function that returns the elastic net coefficients for each of the (decreasing) lamdas, with shape
+    (len(lamdas), number_of_coefficients). Each solution is the warm start for the next. At every lamda, coordinate descent runs
+    over the coefficients that are non-zero or pass the sequential strong rule |A_j^T (b - A x)| >= alpha (2 lamda - lamda_prev),
+    after which the discarded coefficients are checked against the optimality conditions, and any violators are added.
+    """
+    M = len(Atb)
+    x = np.zeros(M)
+    gradient = Atb.copy() # A^T (b - A x)
+    coefficients = np.zeros((len(lamdas), M))
+    lamda_prev = np.max([lamdas[0], _get_elastic_net_lamda_max(Atb, alpha)])
+    for l, lamda in enumerate(lamdas):
+        strong = (np.abs(gradient) >= alpha * (2.0 * lamda - lamda_prev)) | (x != 0.0)
+        while True:
+            _coordinate_descent(gram, x, gradient, np.where(strong)[0], lamda, alpha, tol, max_iter)
+            violators = ~strong & (np.abs(gradient) > alpha * lamda)
+            if not np.any(violators):
+                break
+            strong |= violators
+        coefficients[l] = x
+        lamda_prev = lamda
+    return coefficients
+def _coordinate_descent(gram, x, gradient, indices, lamda, alpha, tol, max_iter):
+    """
+    Private function that runs cyclic coordinate descent for the elastic net over the given coefficients, updating x and the
+    gradient A^T (b - A x) in place, until the largest change in the objective of a sweep is below tol.
+    """
+    threshold = lamda * alpha
+    denominators = np.diag(gram) + lamda * (1.0 - alpha)
+    for iteration in range(max_iter):
+        max_change = 0.0
+        for j in indices:
+            if denominators[j] <= 0.0:
+                continue
+            rho = gradient[j] + gram[j, j] * x[j]
+            if rho > threshold:
+                x_new = (rho - threshold) / denominators[j]
+            elif rho < -threshold:
+                x_new = (rho + threshold) / denominators[j]
+            else:
+                x_new = 0.0
+            delta = x_new - x[j]
+            if delta != 0.0:
+                gradient -= gram[j] * delta
+                x[j] = x_new
+                max_change = max(max_change, denominators[j] * delta**2)
+        if max_change < tol:
+            break
 
 def rvm(A, b, max_iter):
+    """
+    Relevance vector machine, where the hyperparameters are updated by maximising the marginal likelihood. All linear algebra
+    is carried out in coefficient space: the Gram matrix A^T A is formed once, the posterior covariance is obtained from a
+    Cholesky factorisation over the retained basis terms, and the log marginal likelihood follows from the Woodbury identity
+    and the matrix determinant lemma. The K x K covariance of the samples is never formed.
+
+    :param numpy.ndarray A:
+        The matrix, with shape (K, card).
+    :param numpy.ndarray b:
+        The right hand side vector, with K entries.
+    :param int max_iter:
+        The maximum number of iterations. By default, 1000.
+    """
     if max_iter is None:
         max_iter = 1000
+    A = np.asarray(A)
+    b = np.asarray(b).flatten()
     K, card = A.shape
     alpha = np.ones(card)
     alpha_0 = 1.0
     remaining_coeff_ind = np.arange(card)
     removed = np.array([], dtype=int)
 
-    Alpha_diag = np.diag(alpha)
+    gram = A.T @ A
+    Atb = A.T @ b
+    btb = np.dot(b, b)
 
-    Sigma = np.linalg.inv(alpha_0 * A.T @ A + Alpha_diag)
-    mu = alpha_0 * Sigma @ A.T @ b
-
-    Phi = A.copy()
+    Sigma_diag, mu, logdet_H = _get_rvm_posterior(gram, Atb, alpha, alpha_0)
 
     all_L = []
 
     for i in range(max_iter):
 
-        C = 1.0 / alpha_0 * np.eye(K) + Phi @ np.diag(1.0 / np.diag(Alpha_diag)) @ Phi.T
-        L = -0.5 * (K * np.log(2.0 * np.pi) + np.linalg.slogdet(C)[1] + b.T @ np.linalg.inv(C) @ b)
+        # log|C| = log|H| - K log(alpha_0) - sum(log(alpha)) and b^T C^{-1} b = alpha_0 (b^T b - b^T A mu), with
+        # C = (1/alpha_0) I + A diag(1/alpha) A^T and H = alpha_0 A^T A + diag(alpha).
+        L = -0.5 * (K * np.log(2.0 * np.pi) + logdet_H - K * np.log(alpha_0) - np.sum(np.log(alpha)) + \
+                alpha_0 * (btb - np.dot(Atb[remaining_coeff_ind], mu)))
 
         all_L.append(L)
-        gamma = 1.0 - alpha * np.diag(Sigma)
-
-        remaining_ind = np.where(gamma >= 1e-10)[0]
-
-        removed = np.append(removed, remaining_coeff_ind[np.where(gamma < 1e-10)[0]])
-        remaining_coeff_ind = np.setdiff1d(remaining_coeff_ind, remaining_coeff_ind[np.where(gamma < 1e-10)[0]])
-
-
-        alpha_new = (gamma / mu ** 2)[remaining_ind]
-        alpha_0_new = (K - np.sum(gamma)) / np.linalg.norm(b - Phi @ mu) ** 2
-
-        alpha = alpha_new.copy()
-        alpha_0 = alpha_0_new
-        Phi = Phi[:, remaining_ind]
-
-        Alpha_diag = np.diag(alpha)
-        Sigma = np.linalg.inv(alpha_0 * Phi.T @ Phi + Alpha_diag)
-
-        mu = alpha_0 * Sigma @ Phi.T @ b
+        gamma = 1.0 - alpha * Sigma_diag
+        residual_norm = np.linalg.norm(b - A[:, remaining_coeff_ind] @ mu) ** 2
+
+        # Basis terms whose precision is infinite (mu = 0) or very large relative to the scale of b are pruned.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alpha = gamma / mu ** 2
+        remaining_ind = np.where((gamma >= 1e-10) & (alpha * btb < RVM_ALPHA_MAX * K))[0]
+
+        removed = np.append(removed, np.delete(remaining_coeff_ind, remaining_ind))
+        remaining_coeff_ind = remaining_coeff_ind[remaining_ind]
+        if len(remaining_coeff_ind) == 0:
+            mu = np.zeros(0)
+            break
+
+        alpha = alpha[remaining_ind]
+        # The noise variance is bounded below, so that alpha_0 stays finite when b is represented exactly.
+        alpha_0 = (K - np.sum(gamma)) / np.maximum(residual_norm, RVM_MINIMUM_NOISE_VARIANCE * btb)
+
+        Sigma_diag, mu, logdet_H = _get_rvm_posterior(gram[np.ix_(remaining_coeff_ind, remaining_coeff_ind)], \
+                Atb[remaining_coeff_ind], alpha, alpha_0)
         if len(all_L) > 1:
             residual = np.abs((all_L[-1] - all_L[-2]) / (all_L[-1] - all_L[0]))
             if residual < 1e-3:
@@ -557,3 +920,16 @@ def rvm(A, b, max_iter):
     mean_coeffs[remaining_coeff_ind] = mu.copy()
 
     return mean_coeffs
+def _get_rvm_posterior(gram, Atb, alpha, alpha_0):
+    """
+    Private function that returns the diagonal of the posterior covariance Sigma = H^{-1}, the posterior mean
+    alpha_0 Sigma A^T b and log|H|, where H = alpha_0 A^T A + diag(alpha), from a Cholesky factorisation of H.
+    """
+    H = alpha_0 * gram
+    H[np.diag_indices_from(H)] += alpha
+    R = np.linalg.cholesky(H)
+    R_inv = solve_triangular(R, np.eye(len(alpha)), lower=True)
+    Sigma_diag = np.sum(R_inv ** 2, axis=0)
+    mu = alpha_0 * (R_inv.T @ (R_inv @ Atb))
+    logdet_H = 2.0 * np.sum(np.log(np.diag(R)))
+    return Sigma_diag, mu, logdet_H
@@ -2,43 +2,85 @@
 from equadratures.basis import Basis
 import numpy as np
 from itertools import *
+from math import factorial
+# Number of pairs of basis terms expanded at a time by the closed-form moments, and the (relative) size below which a
+# linearisation coefficient is treated as zero.
+CLOSED_FORM_CHUNK_SIZE = 50000
+LINEARISATION_TOLERANCE = 1e-13
+# Largest number of expanded terms for which the closed-form moments are preferred over an available quadrature rule.
+CLOSED_FORM_MAXIMUM_TERMS = 10**7
 
 class Statistics(object):
     """
-    Definition of a statistics object.
+    Definition of a statistics object. Every statistic is computed on first request and cached. The mean, variance and Sobol'
+    indices only require the coefficients, and so do the skewness and kurtosis when computed in closed form; the quadrature rule
+    (and the polynomial evaluated on it) is otherwise required for the skewness, kurtosis and conditional indices, and may be
+    supplied lazily through ``quadrature``.
 
     :param list parameters: A list of parameters, where each element of the list is an instance of the Parameter class.
     :param Basis basis: An instance of the Basis class corresponding to the multi-index set used.
-    :param numpy.ndarray coefficients: Coefficients from a polynomial expansion.
+    :param numpy.ndarray coefficients: Coefficients from a polynomial expansion, with shape (cardinality, 1), or (cardinality, number_of_outputs)
+        for several outputs. In the latter case, every statistic is returned with one entry per output.
     :param numpy.ndarray quadrature_points: Quadrautre points associated with a quadrature rule of shape (number_of_points, dimensions)
     :param numpy.ndarray quadrature_weights: Quadrature weights associated with a quadrature rule of shape (number_of_points, 1)
     :param numpy.ndarray polynomial_matrix: The vandermonde-type matrix with multivariate polynomials evaluated at the quadrature_points of shape (cardinality, number_of_points).
     :param int max_sobol_order: For fast numerical calculations, max_sobol_order restricts the computation of conditional variances (and thus higher order Sobol' indices) to a
         user-defined order.
+    :param callable quadrature: A function without arguments that returns the tuple (quadrature_points, quadrature_weights, polynomial_matrix). It is
+        only called when a statistic that requires the quadrature rule is first requested, and only if these were not passed directly.
+    :param string moments: How the skewness and kurtosis are computed: ``closed-form`` uses the univariate linearisation coefficients of the
+        parameters' orthonormal polynomials, and requires no quadrature rule; ``quadrature`` integrates the third and fourth powers of the expansion with
+        the quadrature rule. By default, ``closed-form`` is used if no quadrature rule is supplied, or if the expansion involves at most
+        CLOSED_FORM_MAXIMUM_TERMS terms. The conditional skewness and kurtosis indices always use the quadrature rule, and are normalised by
+        the moments computed with it; see :meth:`get_conditional_kurtosis`.
 
     """
 
     # constructor
-    def __init__(self, parameters, basis, coefficients, quadrature_points=None, quadrature_weights=None, polynomial_matrix=None, max_sobol_order=None):
+    def __init__(self, parameters, basis, coefficients, quadrature_points=None, quadrature_weights=None, polynomial_matrix=None, max_sobol_order=None, \
+            quadrature=None, moments=None):
         mm = len(coefficients)
-        self.coefficients = np.reshape(np.asarray(coefficients), (mm, 1))
+        self.coefficients = np.reshape(np.asarray(coefficients), (mm, -1))
+        self._number_of_outputs = self.coefficients.shape[1]
         self.basis = basis
         self.parameters = parameters #should be a list containing instances of Parameter
         self.max_sobol_order = max_sobol_order
-        self._mean = private_get_mean(self.coefficients)
-        self._variance = private_get_variance(self.coefficients)
-        self._sobol = private_get_all_sobol_indices(self.coefficients, self.basis, max_sobol_order)
-        # Only required when computing skewness and kurtosis.
-        if (quadrature_points is None) and (quadrature_weights is None) and (polynomial_matrix is None):
-            pass
-        else:
-            nn = len(quadrature_weights)
-            weighted_evals = np.zeros((mm, nn))
-            weighted_evals = polynomial_matrix * self.coefficients
-            self._weighted_evals = weighted_evals
-            self.quadrature_weights = quadrature_weights
-            self._skewness = private_get_skewness(self.quadrature_weights, self._weighted_evals, self.basis, self._variance)
-            self._kurtosis = private_get_kurtosis(self.quadrature_weights, self._weighted_evals, self.basis, self._variance)
+        self._quadrature = quadrature
+        self.moments = moments
+        self._polynomial_matrix = None
+        self.quadrature_weights = None
+        if not((quadrature_points is None) and (quadrature_weights is None) and (polynomial_matrix is None)):
+            self._set_quadrature(quadrature_weights, polynomial_matrix)
+        self._mean = None
+        self._variance = None
+        self._sobol = None
+        self._sobol_total = None
+        self._skewness = None
+        self._kurtosis = None
+        self._quadrature_moments = None
+        self._conditional_skewness = {}
+        self._conditional_kurtosis = {}
+    def _set_quadrature(self, quadrature_weights, polynomial_matrix):
+        """
+        Private method that stores the quadrature weights, and the polynomial evaluated at the quadrature points.
+        """
+        self._polynomial_matrix = polynomial_matrix
+        self.quadrature_weights = np.reshape(quadrature_weights, (-1,))
+    def _get_polynomial_matrix(self):
+        """
+        Private method that returns the polynomial evaluated at the quadrature points, building the quadrature rule on first use.
+        """
+        if self._polynomial_matrix is None:
+            if self._quadrature is None:
+                raise ValueError('A quadrature rule is required for the skewness, kurtosis and conditional indices.')
+            quadrature_points, quadrature_weights, polynomial_matrix = self._quadrature()
+            self._set_quadrature(quadrature_weights, polynomial_matrix)
+        return self._polynomial_matrix
+    def _get_weighted_evals(self, k=0):
+        """
+        Private method that returns the (cardinality, number_of_points) evaluations of each term of the expansion for output k.
+        """
+        return self._get_polynomial_matrix() * self.coefficients[:, k:k+1]
     def get_mean(self):
         """
         Compute the mean of the polynomial expansion.
@@ -49,6 +91,8 @@ class Statistics(object):
         :return:
             **mean**: The approximated mean of the polynomial fit; output as a float.
         """
+        if self._mean is None:
+            self._mean = private_get_mean(self.coefficients)
         return self._mean
     def get_variance(self):
         """
@@ -60,7 +104,40 @@ class Statistics(object):
         :return:
             **variance**: The approximated variance of the polynomial fit; output as a float.
         """
+        if self._variance is None:
+            self._variance = private_get_variance(self.coefficients)
         return self._variance
+    def _set_skewness_and_kurtosis(self):
+        """
+        Private method that computes the skewness and kurtosis, either in closed form or from the quadrature rule.
+        """
+        moments = self.moments
+        if moments is None:
+            if self._polynomial_matrix is None and self._quadrature is None:
+                moments = 'closed-form'
+            else:
+                moments = 'closed-form' if private_get_closed_form_cost(self.basis, CLOSED_FORM_MAXIMUM_TERMS) <= \
+                        CLOSED_FORM_MAXIMUM_TERMS else 'quadrature'
+        if moments.lower() == 'closed-form':
+            variance = self.get_variance()
+            third_moment, fourth_moment = private_get_closed_form_moments(self.coefficients, self.basis, self.parameters)
+            self._skewness = _get_output_value(third_moment / (variance**1.5))
+            self._kurtosis = _get_output_value(fourth_moment / (variance**2))
+        elif moments.lower() == 'quadrature':
+            self._skewness, self._kurtosis = self._get_quadrature_skewness_and_kurtosis()
+        else:
+            raise ValueError('Choose from closed-form or quadrature for the moments.')
+    def _get_quadrature_skewness_and_kurtosis(self):
+        """
+        Private method that computes the skewness and kurtosis from the quadrature rule.
+        """
+        if self._quadrature_moments is None:
+            polynomial_matrix = self._get_polynomial_matrix()
+            variance = self.get_variance()
+            total_evals = np.dot(self.coefficients[1:].T, polynomial_matrix[1:])
+            self._quadrature_moments = (_get_output_value(np.dot(total_evals**3, self.quadrature_weights) / (variance**1.5)), \
+                    _get_output_value(np.dot(total_evals**4, self.quadrature_weights) / (variance**2)))
+        return self._quadrature_moments
     def get_skewness(self):
         """
         Compute the skewness of the polynomial expansion.
@@ -71,6 +148,8 @@ class Statistics(object):
         :return:
             **skewness**: The approximated skewness of the polynomial fit; output as a float.
         """
+        if self._skewness is None:
+            self._set_skewness_and_kurtosis()
         return self._skewness
     def get_kurtosis(self):
         """
@@ -82,6 +161,8 @@ class Statistics(object):
         :return:
             **kurtosis**: The approximated kurtosis of the polynomial fit; output as a float.
         """
+        if self._kurtosis is None:
+            self._set_skewness_and_kurtosis()
         return self._kurtosis
     def get_sobol(self, order=1):
         """
@@ -100,6 +181,8 @@ class Statistics(object):
             fosi = stats.getSobol(1)
 
         """
+        if self._sobol is None:
+            self._sobol = private_get_all_sobol_indices(self.coefficients, self.basis, self.max_sobol_order)
         return {key: value for key, value in self._sobol.items() if len(key) == order}
     def get_conditional_skewness(self, order=1):
         """
@@ -110,6 +193,11 @@ class Statistics(object):
         :return: indices: Dictionary where keys specify non-zero dimensions and values represent conditional skewness indices.
         :rtype: dict
 
+        .. note::
+            The indices are integrated with the quadrature rule, and are normalised by the skewness computed with that same rule,
+            so that all the indices sum to one. This normaliser may differ from :meth:`get_skewness`, which is computed in closed
+            form where possible, unless the rule is exact for polynomials of three times the order of the expansion.
+
         **Sample usage:**
 
         .. code-block:: python
@@ -118,8 +206,10 @@ class Statistics(object):
             first_order_skewness = stats.getCondSkewness(1)
 
         """
-        return private_conditional_skewness(order, self.quadrature_weights, \
-            self._weighted_evals, self.basis, self._variance, self._skewness)
+        if order not in self._conditional_skewness:
+            self._conditional_skewness[order] = self._get_conditional_indices_of_outputs(private_conditional_skewness, order, \
+                    self._get_quadrature_skewness_and_kurtosis()[0])
+        return self._conditional_skewness[order]
     def get_conditional_kurtosis(self, order=1):
         """
         Get conditional kurtosis indices at specified order.
@@ -129,6 +219,11 @@ class Statistics(object):
         :return: indices: Dictionary where keys specify non-zero dimensions and values represent conditional kurtosis indices.
         :rtype: dict
 
+        .. note::
+            The indices are integrated with the quadrature rule, and are normalised by the kurtosis computed with that same rule,
+            so that all the indices sum to one. This normaliser may differ from :meth:`get_kurtosis`, which is computed in closed
+            form where possible, unless the rule is exact for polynomials of four times the order of the expansion.
+
         **Sample usage:**
 
         .. code-block:: python
@@ -137,56 +232,201 @@ class Statistics(object):
             first_order_kurtosis = stats.getCondKurtosis(1)
 
         """
-        return private_conditional_kurtosis(order, self.quadrature_weights, \
-            self._weighted_evals, self.basis, self._variance, self._kurtosis)
+        if order not in self._conditional_kurtosis:
+            self._conditional_kurtosis[order] = self._get_conditional_indices_of_outputs(private_conditional_kurtosis, order, \
+                    self._get_quadrature_skewness_and_kurtosis()[1])
+        return self._conditional_kurtosis[order]
+    def _get_conditional_indices_of_outputs(self, conditional_indices, order, moment):
+        """
+        Private method that computes conditional skewness or kurtosis indices for each output in turn. For several outputs, they
+        are stacked into a dict whose values have one entry per output.
+        """
+        variance = np.reshape(self.get_variance(), (-1,))
+        moment = np.reshape(moment, (-1,))
+        indices = []
+        for k in range(0, self._number_of_outputs):
+            weighted_evals = self._get_weighted_evals(k)
+            indices.append(conditional_indices(order, self.quadrature_weights, weighted_evals, self.basis, variance[k], moment[k]))
+        if self._number_of_outputs == 1:
+            return indices[0]
+        return {key: np.array([index[key] for index in indices]) for key in indices[0]}
     def get_sobol_total(self):
         """
         Get total Sobol' indices
         :return: list: Totol Sobol' indices for each parameter
         """
-        all_sobols = self._sobol
-        dims = len(self.parameters)
-        TSI = np.zeros(dims)
-        for i in all_sobols.keys():
-            for p in i:
-                TSI[p] += all_sobols[i]
-        return TSI
+        if self._sobol_total is None:
+            if self.basis.elements.shape[1] == 1:
+                self._sobol_total = np.ones((1,) + np.shape(self.get_mean()))
+            else:
+                self._sobol_total = private_get_total_sobol_indices(self.coefficients, self.basis, self.max_sobol_order)
+        return self._sobol_total
+def _get_output_value(values):
+    """
+    Private function that returns a float for a single output, and a numpy.ndarray with one entry per output otherwise.
+    """
+    values = np.reshape(values, (-1,))
+    if len(values) == 1:
+        return float(values[0])
+    return values
 def private_get_mean(coefficients):
-    return float(coefficients[0])
+    coefficients = np.reshape(coefficients, (len(coefficients), -1))
+    return _get_output_value(coefficients[0])
 def private_get_variance(coefficients):
-    result = 0.
-    for i in range(1, len(coefficients)):
-        variance = result + float(coefficients[i]**2)
-        result = variance
-    return variance
+    coefficients = np.reshape(coefficients, (len(coefficients), -1))
+    return _get_output_value(np.sum(coefficients[1:]**2, axis=0))
 def private_get_all_sobol_indices(coefficients, basis, max_order):
-    variance = private_get_variance(coefficients)
+    coefficients = np.reshape(coefficients, (len(coefficients), -1))
+    variance = np.sum(coefficients[1:]**2, axis=0)
     if not(isinstance(basis, np.ndarray)):
         basis = basis.elements
     m, dimensions = basis.shape
     if dimensions == 1:
-        return {0:1.0}
+        return {0:_get_output_value(np.ones(coefficients.shape[1]))}
     else:
-        basis_entries = m
-        combo_index = {}
         if max_order is None or max_order > dimensions:
             max_order = dimensions
-        for order in range(1,max_order+1): #loop over order
-            for i in combinations(range(dimensions),order):
-                #initialize each index to be 0
-                combo_index[i] = 0
-
-
-            for i in range(0,basis_entries): #loop over rows
-                row = basis[i,:]
-                non_zero_entries = np.nonzero(row)[0]
-                non_zero_entries.sort()    #just in case
-                if len(non_zero_entries) == order: #neglect entries that should actually be zero (what constitutes as zero?)
-                    combo_index[tuple(non_zero_entries)] = float(combo_index[tuple(non_zero_entries)] + coefficients[i]**2 / variance)
-        check_sum = sum(combo_index.values())
-        if (abs(check_sum - 1.0) >= 1e-2):
+        #initialize each index to be 0
+        all_combinations = chain.from_iterable(combinations(range(dimensions), order) for order in range(1, max_order+1))
+        if coefficients.shape[1] == 1:
+            combo_index = dict.fromkeys(all_combinations, 0.0)
+        else:
+            combo_index = {i: np.zeros(coefficients.shape[1]) for i in all_combinations}
+        supports, fractions = _get_support_variances(coefficients, basis)
+        fractions = fractions / variance
+        orders = np.sum(supports, axis=1)
+        retained = (orders >= 1) & (orders <= max_order)
+        for support, fraction in zip(supports[retained], fractions[retained]):
+            combo_index[tuple(np.nonzero(support)[0].tolist())] = _get_output_value(fraction)
+        check_sum = _get_output_value(np.sum(fractions[retained], axis=0))
+        if np.any(np.abs(check_sum - 1.0) >= 1e-2):
             print("Possible discrepancy in calculation, sum of indices = " + str(check_sum))
         return combo_index
+def private_get_total_sobol_indices(coefficients, basis, max_order):
+    coefficients = np.reshape(coefficients, (len(coefficients), -1))
+    variance = np.sum(coefficients[1:]**2, axis=0)
+    if not(isinstance(basis, np.ndarray)):
+        basis = basis.elements
+    dimensions = basis.shape[1]
+    if max_order is None or max_order > dimensions:
+        max_order = dimensions
+    supports, fractions = _get_support_variances(coefficients, basis)
+    orders = np.sum(supports, axis=1)
+    retained = (orders >= 1) & (orders <= max_order)
+    total_indices = np.dot(supports[retained].T.astype(float), fractions[retained]) / variance
+    if coefficients.shape[1] == 1:
+        return total_indices.reshape(-1)
+    return total_indices
+def _get_support_variances(coefficients, elements):
+    """
+    Private function that groups the rows of the multi-index set by their support (the set of dimensions in which they are
+    non-zero), encoded as a bitmask, and sums the squared coefficients of each group with one bincount per output. Returns the
+    distinct supports as a boolean numpy.ndarray of shape (number_of_supports, dimensions) and the summed squared coefficients,
+    with shape (number_of_supports, number_of_outputs).
+    """
+    support = np.asarray(elements) != 0
+    dimensions = support.shape[1]
+    if dimensions < 63:
+        keys = np.dot(support.astype(np.int64), np.left_shift(np.int64(1), np.arange(dimensions, dtype=np.int64)))
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    else:
+        _, first, inverse = np.unique(np.packbits(support, axis=1), axis=0, return_index=True, return_inverse=True)
+    inverse = np.reshape(inverse, (-1,))
+    squares = coefficients**2
+    variances = np.stack([np.bincount(inverse, weights=squares[:, k], minlength=len(first)) \
+            for k in range(0, coefficients.shape[1])], axis=1)
+    return support[first], variances
+def private_get_closed_form_cost(basis, maximum_terms=np.inf, chunk_size=CLOSED_FORM_CHUNK_SIZE):
+    """
+    Returns the number of terms expanded by private_get_closed_form_moments, i.e., the sum over pairs of basis terms of the
+    number of orthonormal polynomials in their product. The count stops once it exceeds maximum_terms.
+
+    :param Basis basis: An instance of the Basis class corresponding to the multi-index set used.
+    :param float maximum_terms: The count beyond which the remaining pairs are not counted.
+    :param int chunk_size: The number of pairs of basis terms that are counted at a time.
+    """
+    elements = np.asarray(basis.elements if not(isinstance(basis, np.ndarray)) else basis, dtype=np.int64)
+    elements = elements[np.any(elements != 0, axis=1)]
+    number_of_pairs = len(elements) * (len(elements) + 1) // 2
+    if number_of_pairs > maximum_terms:
+        return number_of_pairs
+    I, J = np.triu_indices(len(elements))
+    cost = 0
+    for start in range(0, len(I), chunk_size):
+        cost += np.sum(np.prod(np.minimum(elements[I[start:start + chunk_size]], elements[J[start:start + chunk_size]]) + 1, axis=1))
+        if cost > maximum_terms:
+            break
+    return cost
+def private_get_closed_form_moments(coefficients, basis, parameters, chunk_size=CLOSED_FORM_CHUNK_SIZE):
+    """
+    Returns the third and fourth central moments of a polynomial expansion without a quadrature rule. The square of the
+    zero-mean part of the expansion, g = (f - mean)^2, is expanded in the orthonormal basis (of up to twice the order), using
+    the univariate linearisation coefficients phi_a phi_b = sum_m L[a, b, m] phi_m of each parameter, so that
+    E[(f - mean)^3] = sum_m g_m c_m and E[(f - mean)^4] = sum_m g_m^2. The cost scales with the number of pairs of basis terms,
+    not with the size of a quadrature rule.
+
+    :param numpy.ndarray coefficients: Coefficients of the expansion, with shape (cardinality, number_of_outputs).
+    :param Basis basis: An instance of the Basis class corresponding to the multi-index set used.
+    :param list parameters: A list of parameters, one per dimension, with respect to which the basis is orthonormal.
+    :param int chunk_size: The number of pairs of basis terms that are expanded at a time.
+    :return: A tuple of numpy.ndarrays (third_moment, fourth_moment), with one entry per output.
+    """
+    coefficients = np.reshape(coefficients, (len(coefficients), -1))
+    elements = np.asarray(basis.elements if not(isinstance(basis, np.ndarray)) else basis, dtype=np.int64)
+    number_of_outputs = coefficients.shape[1]
+    terms = np.where(np.any(elements != 0, axis=1))[0]
+    elements, coefficients = elements[terms], coefficients[terms]
+    orders = np.max(elements, axis=0) if len(terms) > 0 else np.zeros(elements.shape[1], dtype=np.int64)
+    L = [parameters[d]._get_linearisation_coefficients(orders[d]) for d in range(0, elements.shape[1])]
+    # Multi-indices of g (of up to twice the orders) are encoded as mixed-radix integers, or as raw bytes if those overflow.
+    radix = 2 * orders + 1
+    if np.sum(np.log2(radix.astype(float))) < 62:
+        place_values = np.concatenate([[1], np.cumprod(radix[:-1])]).astype(np.int64)
+        get_keys = lambda indices: np.dot(indices, place_values)
+    else:
+        get_keys = lambda indices: np.ascontiguousarray(indices).view(np.dtype((np.void, indices.dtype.itemsize * indices.shape[1]))).reshape(-1)
+    I, J = np.triu_indices(len(terms))
+    pair_coefficients = coefficients[I] * coefficients[J] * np.where(I == J, 1.0, 2.0).reshape(-1, 1)
+    all_keys, all_values = [], []
+    for start in range(0, len(I), chunk_size):
+        pairs = np.arange(start, min(start + chunk_size, len(I)))
+        a, b = elements[I[pairs]], elements[J[pairs]]
+        indices = a + b
+        factors = np.ones(len(pairs))
+        for d in range(0, elements.shape[1]):
+            # phi_a phi_b = phi_{a+b} if either is phi_0; otherwise it spans phi_|a-b|, ..., phi_{a+b}.
+            branching = np.where((a[:, d] > 0) & (b[:, d] > 0))[0]
+            if len(branching) == 0:
+                continue
+            a_d, b_d = a[branching, d], b[branching, d]
+            m = np.abs(a_d - b_d).reshape(-1, 1) + np.arange(2 * orders[d] + 1).reshape(1, -1)
+            valid = m <= (a_d + b_d).reshape(-1, 1)
+            values = L[d][a_d.reshape(-1, 1), b_d.reshape(-1, 1), np.minimum(m, 2 * orders[d])]
+            valid &= np.abs(values) > LINEARISATION_TOLERANCE * np.max(np.abs(L[d]))
+            rows, columns = np.nonzero(valid)
+            keep = np.setdiff1d(np.arange(len(pairs)), branching)
+            new_rows = branching[rows]
+            new_indices = indices[new_rows]
+            new_indices[:, d] = m[rows, columns]
+            indices = np.vstack([indices[keep], new_indices])
+            factors = np.concatenate([factors[keep], factors[new_rows] * values[rows, columns]])
+            pairs = np.concatenate([pairs[keep], pairs[new_rows]])
+            a, b = np.vstack([a[keep], a[new_rows]]), np.vstack([b[keep], b[new_rows]])
+        keys, inverse = np.unique(get_keys(indices), return_inverse=True)
+        inverse = np.reshape(inverse, (-1,))
+        all_keys.append(keys)
+        all_values.append(np.stack([np.bincount(inverse, weights=factors * pair_coefficients[pairs, k], minlength=len(keys)) \
+                for k in range(0, number_of_outputs)], axis=1))
+    if len(all_keys) == 0:
+        return np.zeros(number_of_outputs), np.zeros(number_of_outputs)
+    keys, inverse = np.unique(np.concatenate(all_keys), return_inverse=True)
+    inverse = np.reshape(inverse, (-1,))
+    values = np.concatenate(all_values)
+    g = np.stack([np.bincount(inverse, weights=values[:, k], minlength=len(keys)) for k in range(0, number_of_outputs)], axis=1)
+    _, g_indices, term_indices = np.intersect1d(keys, get_keys(elements), return_indices=True)
+    third_moment = np.sum(g[g_indices] * coefficients[term_indices], axis=0)
+    fourth_moment = np.sum(g**2, axis=0)
+    return third_moment, fourth_moment
 def private_get_skewness(quadrature_weights, weighted_evals, basis, variance):
     total_evals = np.sum(weighted_evals[1:],0)
     third_total_evals = total_evals**3
@@ -196,170 +436,126 @@ def private_get_kurtosis(quadrature_weights, weighted_evals, basis, variance):
     fourth_total_evals = total_evals**4
     return np.dot(fourth_total_evals,quadrature_weights)/(variance**2)
 def private_conditional_skewness(order, quadrature_weights, weighted_evals, basis, variance, skewness):
-    dimensions = basis.elements.shape[1]
-    norm_ind = basis.elements.copy()
-    norm_ind = list(map(tuple,(norm_ind > 0).astype(int)))
-    combo_index = {}
-    for i in combinations(range(dimensions), order):
-        index = np.zeros(dimensions).astype(int)
-        index[list(i)] = 1
-        combo_index[tuple(index)] = 0.0
-    #1st term
-    cubed_evals = weighted_evals**3
-    integral1 = np.dot(cubed_evals, quadrature_weights)
-    for i in range(1, integral1.shape[0]):
-        if sum(norm_ind[i]) == order:
-            combo_index[norm_ind[i]] = combo_index[norm_ind[i]] + integral1[i] /(variance**1.5 * skewness)
-    valid_indices = []
-    for i in range(1, basis.cardinality):
-        if sum(norm_ind[i]) <= order:
-            valid_indices.append(i)
-    #2nd term (Can we avoid for loops in the future?)
-    for p in range(1,basis.cardinality):
-        for q in range(1,basis.cardinality):
-            summed_norm_index =tuple(np.logical_or(norm_ind[p], norm_ind[q]).astype(int))
-            if sum(summed_norm_index) != order:
-                continue
-            #check if selection function is zero, in which case delta = True
-            delta = False
-            for d in range(dimensions):
-                if (basis.elements[p,d] == 0 and basis.elements[q,d] != 0) or p == q:
-                    delta = True
-                    break
-            if delta:
-                continue
-            evals2 = (weighted_evals[p,:]**2)*weighted_evals[q,:]
-            integral2 = np.dot(evals2, quadrature_weights)
-            combo_index[summed_norm_index] = combo_index[summed_norm_index] + 3 * integral2 /(variance**1.5* skewness)
-    temp_ind = basis.elements.copy()
-    i = 0
-    for a in range(len(valid_indices)):
-        for b in range(a+1, len(valid_indices)):
-            for c in range(b+1, len(valid_indices)):
-                p = valid_indices[a]
-                q = valid_indices[b]
-                r = valid_indices[c]
-
-                summed_norm_index =tuple(np.logical_or(np.logical_or(norm_ind[p], norm_ind[q]), norm_ind[r]).astype(int))
-                if sum(summed_norm_index) != order:
-                    continue
-                delta = False
-                for d in range(dimensions):
-                    if delta_pqr([temp_ind[p,:],temp_ind[q,:],temp_ind[r,:]]):
-                        delta = True
-                        break
-                if delta:
-                    continue
-
-                evals3 = weighted_evals[p,:]*weighted_evals[q,:]*weighted_evals[r,:]
-
-                integral3 = np.dot(evals3, quadrature_weights)
-
-                combo_index[summed_norm_index] = combo_index[summed_norm_index] + 6 * integral3 /(variance**1.5* skewness)
-    combo_index = {tuple(np.nonzero(key)[0]): value for key, value in combo_index.items()}
-    return combo_index
+    integrals = _get_conditional_moment_integrals(order, quadrature_weights, weighted_evals, basis.elements, 3)
+    return {key: value / (variance**1.5 * skewness) for key, value in integrals.items()}
 def private_conditional_kurtosis(order, quadrature_weights, weighted_evals, basis, variance, kurtosis):
-    #Get all polynomials evaluated at the quad. pts and corresponding wts
-    dimensions = basis.elements.shape[1]
-    norm_ind = basis.elements.copy()
-    norm_ind = list(map(tuple,(norm_ind > 0).astype(int)))
-    combo_index = {}
-    for i in combinations(range(dimensions), order):
-        index = np.zeros(dimensions).astype(int)
-        index[list(i)] = 1
-        combo_index[tuple(index)] = 0.0
-    #1st term
-    fourth_evals = weighted_evals**4
-    integral1 = np.dot(fourth_evals, quadrature_weights)
-    for i in range(1, integral1.shape[0]):
-        if sum(norm_ind[i]) == order:
-            combo_index[norm_ind[i]] = combo_index[norm_ind[i]] + integral1[i] /(variance**2 * kurtosis)
-
-    valid_indices = []
-    for i in range(1, basis.cardinality):
-        if sum(norm_ind[i]) <= order:
-            valid_indices.append(i)
-    #2nd term (Can we avoid for loops in the future?)
-    for p in valid_indices:
-        for q in valid_indices:
-            summed_norm_index =tuple(np.logical_or(norm_ind[p], norm_ind[q]).astype(int))
-            if sum(summed_norm_index) != order:
-                continue
-            #check if selection function is zero, in which case delta = True
-            delta = False
-            for d in range(dimensions):
-                if (basis.elements[p,d] == 0 and basis.elements[q,d] != 0) or p == q:
-                    delta = True
-                    break
-            if delta:
+    integrals = _get_conditional_moment_integrals(order, quadrature_weights, weighted_evals, basis.elements, 4)
+    return {key: value / (variance**2 * kurtosis) for key, value in integrals.items()}
+def _get_conditional_moment_integrals(order, quadrature_weights, weighted_evals, elements, moment):
+    """
+    Private function that returns, for every set of ``order`` dimensions, the integral of the third (moment=3) or fourth
+    (moment=4) power of the part of the expansion whose terms jointly span exactly that set, i.e., the numerators of the
+    conditional skewness and kurtosis indices (Geraci et al.).
+
+    Rather than looping over pairs, triples and quadruples of basis terms, the terms (excluding the constant) are grouped by
+    their support bitmask. Whether a tuple of terms contributes only depends on the supports of its members, except for the
+    delta^p_{qr} selection of the kurtosis, which also compares exponents. So the sum over all tuples drawn from a tuple of
+    groups factorises into elementary symmetric sums of each group's weighted evaluations, and only tuples of groups
+    (contained in the set of dimensions) are enumerated.
+    """
+    quadrature_weights = np.reshape(quadrature_weights, (-1,))
+    elements = np.asarray(elements)
+    dimensions = elements.shape[1]
+    masks = _get_support_masks(elements)
+    popcounts = np.sum(elements != 0, axis=1)
+    valid = np.where(popcounts <= order)[0]
+    valid = valid[valid >= 1]
+    W = weighted_evals[valid]
+    group_masks, group_of = np.unique(masks[valid], return_inverse=True)
+    group_of = np.reshape(group_of, (-1,))
+    group_masks = [int(mask) for mask in group_masks]
+    number_of_groups = len(group_masks)
+    # Power sums (P[k]) and elementary symmetric sums (E[k]) of the weighted evaluations of each group, at every point.
+    P = [None] + [_get_group_sums(W**k, group_of, number_of_groups) for k in range(1, moment + 1)]
+    E = [np.ones((number_of_groups, W.shape[1]))] + [np.zeros((number_of_groups, W.shape[1])) for k in range(1, moment + 1)]
+    for i in range(0, len(valid)):
+        g = group_of[i]
+        for k in range(moment, 0, -1):
+            E[k][g] += W[i] * E[k-1][g]
+    group_index = {mask: g for g, mask in enumerate(group_masks)}
+    integrals = {}
+    for combination in combinations(range(dimensions), order):
+        U = sum(1 << d for d in combination)
+        key = tuple(np.array(combination))
+        sub = [g for g in range(number_of_groups) if group_masks[g] & ~U == 0]
+        if len(sub) == 0:
+            integrals[key] = 0.0
+            continue
+        S1 = np.sum(P[1][sub], axis=0)
+        integrand = np.zeros(W.shape[1])
+        if U in group_index:
+            g = group_index[U]
+            # One term spanning U on its own, and a term spanning U times a term within U.
+            integrand += P[moment][g] + moment * (P[moment-1][g] * S1 - P[moment][g])
+        if moment == 4:
+            for pair in combinations_with_replacement(sub, 2):
+                if group_masks[pair[0]] | group_masks[pair[1]] == U:
+                    if pair[0] == pair[1]:
+                        integrand += 3.0 * (P[2][pair[0]]**2 - P[4][pair[0]])
+                    else:
+                        integrand += 6.0 * P[2][pair[0]] * P[2][pair[1]]
+        # Tuples of distinct terms, where every dimension of U is spanned by at least two of them.
+        for groups in combinations_with_replacement(sub, moment):
+            at_least_one, at_least_two = 0, 0
+            for g in groups:
+                at_least_two |= at_least_one & group_masks[g]
+                at_least_one |= group_masks[g]
+            if at_least_one != U or at_least_one & ~at_least_two != 0:
                 continue
-            evals2 = (weighted_evals[p,:]**3)*weighted_evals[q,:]
-            integral2 = np.dot(evals2, quadrature_weights)
-            combo_index[summed_norm_index] = combo_index[summed_norm_index] + 4 * integral2 /(variance**2 * kurtosis)
-    #3rd term (Can we avoid for loops in the future?)
-    for a in range(len(valid_indices)):
-        for b in range(a+1,len(valid_indices)):
-            p = valid_indices[a]
-            q = valid_indices[b]
-            summed_norm_index = tuple(np.logical_or(norm_ind[p], norm_ind[q]).astype(int))
-            if sum(summed_norm_index) != order:
+            product = np.ones(W.shape[1])
+            for g in set(groups):
+                product = product * E[groups.count(g)][g]
+            integrand += factorial(moment) * product
+        integrals[key] = np.dot(integrand, quadrature_weights)
+    if moment == 4:
+        for key, integral in _get_conditional_kurtosis_p_qr_integrals(order, quadrature_weights, W, elements[valid], \
+                group_masks, group_of, P).items():
+            integrals[key] += integral
+    return integrals
+def _get_conditional_kurtosis_p_qr_integrals(order, quadrature_weights, W, elements, group_masks, group_of, P):
+    """
+    Private function that returns the integrals of the terms 12 w_p^2 w_q w_r (q < r, p not in {q, r}) of the conditional
+    kurtosis, for which q and r must have equal exponents in every dimension where p is zero. For each support P of p, the terms
+    are therefore partitioned into classes by their exponents outside P; the pairs {q, r} are the pairs within a class, and they
+    jointly span P together with the support of the class.
+    """
+    integrals = {}
+    masks = _get_support_masks(elements)
+    for g, mask in enumerate(group_masks):
+        outside = np.array([(mask >> d) & 1 == 0 for d in range(elements.shape[1])])
+        candidates = np.where(np.array([bin(mask | int(m)).count('1') <= order for m in masks]))[0]
+        class_keys, class_of = np.unique(elements[candidates] * outside, axis=0, return_inverse=True)
+        class_of = np.reshape(class_of, (-1,))
+        S1 = _get_group_sums(W[candidates], class_of, len(class_keys))
+        S2 = _get_group_sums(W[candidates]**2, class_of, len(class_keys))
+        for c, class_key in enumerate(class_keys):
+            U = np.where((class_key != 0) | ~outside)[0]
+            if len(U) != order:
                 continue
-            evals3 = (weighted_evals[p,:]**2)*(weighted_evals[q,:]**2)
-            integral3 = np.dot(evals3, quadrature_weights)
-            combo_index[summed_norm_index] = combo_index[summed_norm_index] + 6 * integral3 /(variance**2 * kurtosis)
-    #4th term (Can we avoid for loops in the future?)
-    for a in range(len(valid_indices)):
-        for b in range(len(valid_indices)):
-            for c in range(b+1, len(valid_indices)):
-                p = valid_indices[a]
-                q = valid_indices[b]
-                r = valid_indices[c]
-                summed_norm_index = tuple(np.logical_or(np.logical_or(norm_ind[p], norm_ind[q]), norm_ind[r]).astype(int))
-                if sum(summed_norm_index) != order:
-                    continue
-                #check if selection function is zero, in which case delta = True
-                delta = False
-                for d in range(dimensions):
-                    if (delta_p_qr([basis.elements[p,:], basis.elements[q,:], basis.elements[r,:]]))\
-                    or (q==p) or (r==p):
-                        delta = True
-
-                        break
-                if delta:
-                    continue
-                evals4 = (weighted_evals[p,:]**2)*weighted_evals[q,:]*weighted_evals[r,:]
-
-                integral4 = np.dot(evals4, quadrature_weights)
-
-                combo_index[summed_norm_index] = combo_index[summed_norm_index] + 12 * integral4 /(variance**2 * kurtosis)
-    #5th term (Can we avoid for loops in the future?) (especially this. Scales poorly!)
-    temp_ind = basis.elements.copy()
-    for a in range(len(valid_indices)):
-        for b in range(a+1, len(valid_indices)):
-            for c in range(b+1, len(valid_indices)):
-                for d in range(c+1, len(valid_indices)):
-                    p = valid_indices[a]
-                    q = valid_indices[b]
-                    r = valid_indices[c]
-                    t = valid_indices[d]
-                    summed_norm_index = tuple(np.logical_or(np.logical_or(np.logical_or(norm_ind[p], norm_ind[q]), norm_ind[r]), norm_ind[t]).astype(int))
-                    if sum(summed_norm_index) != order:
-                        continue
-                    #check if selection function is zero, in which case delta = True
-                    delta = False
-                    for d in range(dimensions):
-                        if delta_pqrs([temp_ind[p,:], temp_ind[q,:], temp_ind[r,:], temp_ind[t,:]]):
-                            delta = True
-
-                            break
-                    if delta:
-                        continue
-                    evals5 = weighted_evals[p,:]*weighted_evals[q,:]*weighted_evals[r,:]*weighted_evals[t,:]
-                    integral5 = np.dot(evals5, quadrature_weights)
-                    summed_norm_index = tuple(np.logical_or(np.logical_or(np.logical_or(norm_ind[p], norm_ind[q]), norm_ind[r]), norm_ind[t]).astype(int))
-                    combo_index[summed_norm_index] = combo_index[summed_norm_index] + 24 * integral5 /(variance**2 * kurtosis)
-    combo_index = {tuple(np.nonzero(key)[0]): value for key, value in combo_index.items()}
-    return combo_index
+            integrand = P[2][g] * 0.5 * (S1[c]**2 - S2[c])
+            if not np.any(class_key):
+                # Pairs {q, r} that contain p itself.
+                integrand -= P[3][g] * S1[c] - P[4][g]
+            key = tuple(U)
+            integrals[key] = integrals.get(key, 0.0) + 12.0 * np.dot(integrand, quadrature_weights)
+    return integrals
+def _get_group_sums(values, group_of, number_of_groups):
+    """
+    Private function that sums the rows of values that belong to each group, given the (non-empty) group of every row.
+    """
+    order = np.argsort(group_of, kind='stable')
+    starts = np.searchsorted(group_of[order], np.arange(number_of_groups))
+    return np.add.reduceat(values[order], starts, axis=0)
+def _get_support_masks(elements):
+    """
+    Private function that encodes the support of each row of the multi-index set as a bitmask, with bit d set if the row is
+    non-zero in dimension d.
+    """
+    support = np.asarray(elements) != 0
+    dimensions = support.shape[1]
+    if dimensions < 63:
+        return np.dot(support.astype(np.int64), np.left_shift(np.int64(1), np.arange(dimensions, dtype=np.int64)))
+    return np.array([sum(1 << int(d) for d in np.nonzero(row)[0]) for row in support], dtype=object)
 
 
 #Calculates delta^p_{qr} (Geraci)
@@ -74,7 +74,7 @@ def get_newton_determinant_maximization(Ao, number_of_subsamples):
     alpha = 0.01
     beta = 0.5
 
-    # Assuming the input matrix is an np.matrix()
+    A = np.asarray(A)
     m, n = A.shape
     if m < n:
         raise ValueError( 'maxdet(): requires the number of columns to be greater than the number of rows!')
@@ -85,16 +85,13 @@ def get_newton_determinant_maximization(Ao, number_of_subsamples):
     kappa = np.log(gap) * n/m
 
     # Objective function
-    Z = _diag(z)
-    fz = -np.log(np.linalg.det(A.T * Z * A)) - kappa * np.sum(np.log(z) + np.log(1.0 - z))
+    fz = -np.log(np.linalg.det(A.T @ (z * A))) - kappa * np.sum(np.log(z) + np.log(1.0 - z))
 
     # Optimization loop!
     for i in range(0, maxiter) :
-        Z = _diag(z)
-        W = np.linalg.inv(A.T * Z * A)
-        V = A * W * A.T
-        vo = np.matrix(np.diag(V))
-        vo = vo.T
+        W = np.linalg.inv(A.T @ (z * A))
+        V = A @ W @ A.T
+        vo = np.diag(V).reshape(m, 1)
 
         # define some z operations
         one_by_z = ones_m / z
@@ -102,10 +99,11 @@ def get_newton_determinant_maximization(Ao, number_of_subsamples):
         one_by_z2 = ones_m / z**2
         one_by_one_minus_z2 = ones_m / (ones_m - z)**2
         g = -vo- kappa * (one_by_z - one_by_one_minus_z)
-        H = np.multiply(V, V) + kappa * _diag( one_by_z2 + one_by_one_minus_z2)
+        H = np.multiply(V, V)
+        H[np.diag_indices(m)] += kappa * (one_by_z2 + one_by_one_minus_z2).reshape(m)
 
         # Textbook Newton's method -- compute inverse of Hessian
-        R = np.matrix(cholesky(H) )
+        R = cholesky(H)
         u = lstsq(R.T, g)
         Hinvg = lstsq(R, u[0])
         Hinvg = Hinvg[0]
@@ -124,16 +122,15 @@ def get_newton_determinant_maximization(Ao, number_of_subsamples):
 
         while flag == 1:
             zp = z + s*dz
-            Zp = _diag(zp)
-            fzp = -np.log(np.linalg.det(A.T * Zp * A) ) - kappa * np.sum(np.log(zp) + np.log(1 - zp)  )
-            const = fz + alpha * s * g.T * dz
+            fzp = -np.log(np.linalg.det(A.T @ (zp * A)) ) - kappa * np.sum(np.log(zp) + np.log(1 - zp)  )
+            const = fz + alpha * s * (g.T @ dz)
             if fzp <= const[0,0]:
                 flag = 2
             if flag != 2:
                 s = beta * s
         z = zp
         fz = fzp
-        sig = -g.T * dz * 0.5
+        sig = -(g.T @ dz) * 0.5
         if( sig[0,0] <= n_tol):
             break
         zsort = np.sort(z, axis=0)
@@ -144,10 +141,9 @@ def get_newton_determinant_maximization(Ao, number_of_subsamples):
     thres = zsort[m - number_of_subsamples - 1]
     zhat, not_used = _find(z, thres)
     p, q = zhat.shape
-    Zhat = _diag(zhat)
-    L = np.log(np.linalg.det(A.T * Zhat  * A))
+    L = np.log(np.linalg.det(A.T @ (zhat * A)))
     ztilde  = z
-    Utilde = np.log(np.linalg.det(A.T * _diag(z) * A))  + 2 * m * kappa
+    Utilde = np.log(np.linalg.det(A.T @ (z * A)))  + 2 * m * kappa
     z = _binary2indices(zhat)
     return z
 def _binary2indices(zhat):
@@ -162,12 +158,6 @@ def _binary2indices(zhat):
     return pvec
 def _indices(a, func):
     return [i for (i, val) in enumerate(a) if func(val)]
-def _diag(vec):
-    m = len(vec)
-    D = np.zeros((m, m))
-    for i in range(0, m):
-        D[i,i] = vec[i,0]
-    return D
 def _find(vec, thres):
     t = []
     vec_new = []
@@ -177,6 +167,5 @@ def _find(vec, thres):
             vec_new.append(1.0)
         else:
             vec_new.append(0.0)
-    vec_new = np.matrix(vec_new)
-    vec_new = vec_new.T
+    vec_new = np.array(vec_new).reshape(-1, 1)
     return vec_new, t
@@ -16,6 +16,8 @@ class Weight(object):
         the integration constant is computed and used to normalise weight_function.
     :param float mean: User-defined mean for distribution. When provided, the code does not compute the mean of the weight_function over its support.
     :param float variance: User-defined variance for distribution. When provided, the code does not compute the variance of the weight_function over its support.
+    :param bool vectorized: If set to ``True``, then the weight_function is assumed to accept a numpy.ndarray of points and return the
+        corresponding array of values; it is then evaluated once per quadrature rule rather than once per point.
 
     **Sample constructor initialisations**::
 
@@ -24,9 +26,10 @@ class Weight(object):
 
         pdf = Weight(lambda x: exp(-x)/ np.sqrt(x), [0.00001, -np.log(1e-10)], pdf=False)
     """
-    def __init__(self, weight_function, support, pdf=False, mean=None, variance=None):
+    def __init__(self, weight_function, support, pdf=False, mean=None, variance=None, vectorized=False):
         self.weight_function = weight_function
         self.pdf = pdf
+        self.vectorized = vectorized
         self.support = support
         self.lower = self.support[0]
         self.upper = self.support[1]
@@ -48,6 +51,8 @@ class Weight(object):
 
     def _evaluate_pdf(self, x):
         x = np.array(x)
+        if self.vectorized:
+            return np.asarray(self.weight_function(x), dtype=float).reshape(x.shape[0])
         pdf_values = np.zeros((x.shape[0]))
         for i in range(0, x.shape[0]):
             pdf_values[i] = self.weight_function(x[i])
@@ -86,7 +91,7 @@ class Weight(object):
         while quadrature_error >= 1e-6:
             quadrature_order += QUADRATURE_ORDER_INCREMENT
             pts, wts = self._get_quadrature_points_and_weights(quadrature_order)
-            integral = float(np.dot(wts, evaluate_model(pts, integrand)))
+            integral = float(np.dot(wts, evaluate_model(pts, integrand, vectorized=self.vectorized)))
             quadrature_error = np.abs(integral - integral_before)
             integral_before = integral
             if quadrature_order >= ORDER_LIMIT:
@@ -1142,6 +1142,42 @@ class TestB(TestCase):
         r2 = np.round(r**2, 4)
         np.testing.assert_array_less(0.80, r2, err_msg='Problem!')
 
+    def test_cs_cross_validation_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from equadratures.solver import basis_pursuit_denoising, _get_cross_validation_folds
+        folds = _get_cross_validation_folds(23, 5)
+        np.testing.assert_array_equal(np.concatenate(folds), np.arange(23))
+        self.assertEqual(len(folds), 5)
+        rng = np.random.RandomState(1)
+        A = rng.standard_normal((40, 80)) / np.sqrt(40.)
+        x = np.zeros((80, 1))
+        x[[3, 17, 42], 0] = [1.0, -0.5, 0.25]
+        b = np.dot(A, x) + 1e-4 * rng.standard_normal((40, 1))
+        eta = [1e-4, 1e-3, 1e-2]
+        x_serial = basis_pursuit_denoising(A, b, eta, False)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            x_parallel = basis_pursuit_denoising(A, b, eta, False, executor)
+        np.testing.assert_array_almost_equal(x_serial, x_parallel, decimal=12)
+        np.testing.assert_array_less(np.linalg.norm(x_serial - x), 0.05)
+    def test_cs_matrix_free(self):
+        from scipy.sparse.linalg import aslinearoperator
+        from equadratures.solver import basis_pursuit_denoising, _CG_solve
+        rng = np.random.RandomState(1)
+        A = rng.standard_normal((40, 80)) / np.sqrt(40.)
+        x = np.zeros((80, 1))
+        x[[3, 17, 42], 0] = [1.0, -0.5, 0.25]
+        b = np.dot(A, x) + 1e-4 * rng.standard_normal((40, 1))
+        eta = [1e-4, 1e-3, 1e-2]
+        x_dense = basis_pursuit_denoising(A, b, eta, False)
+        x_cg = basis_pursuit_denoising(A, b, eta, False, use_CG=True)
+        x_operator = basis_pursuit_denoising(aslinearoperator(A), b, eta, False)
+        np.testing.assert_array_almost_equal(x_cg, x_operator, decimal=10)
+        np.testing.assert_array_less(np.linalg.norm(x_cg - x_dense), 1e-3)
+        G = np.dot(A, A.T) + np.eye(40)
+        w, residual, iterations = _CG_solve(aslinearoperator(G), b, 200, 1e-10)
+        np.testing.assert_array_almost_equal(w, np.linalg.solve(G, b).flatten(), decimal=8)
+        self.assertRaises(ValueError, _CG_solve, -G, b, 200, 1e-10)
+
 
 if __name__== '__main__':
     unittest.main()
\ No newline at end of file
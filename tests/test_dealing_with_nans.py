@@ -3,10 +3,16 @@ import unittest
 from equadratures import *
 import numpy as np
 from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 
 def model(x):
     return x[0]**2 + x[1]**3 - x[0]*x[1]**2
 
+def failing_model(x):
+    if x[0] > 0.8 and x[1] > 0.8:
+        raise RuntimeError('Simulation did not converge.')
+    return model(x)
+
 class TestF(TestCase):
 
     def test_tensor_grid_with_nans(self):
@@ -31,5 +37,35 @@ class TestF(TestCase):
         np.testing.assert_almost_equal(mean, mean_with_nans, decimal=7, err_msg='Problem!')
         np.testing.assert_almost_equal(variance, variance_with_nans, decimal=7, err_msg='Problem!')
 
+    def test_executor_with_failures(self):
+        param = Parameter(distribution='uniform', lower=-1., upper=1., order=4)
+        poly = Poly(parameters=[param, param], basis=Basis('tensor-grid'), method='numerical-integration')
+        pts = poly.get_points()
+        model_evals = evaluate_model(pts, model)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            model_evals_parallel = evaluate_model(pts, model, executor=executor, chunksize=3)
+            model_evals_with_NaNs = evaluate_model(pts, failing_model, executor=executor, chunksize=3)
+        np.testing.assert_array_equal(model_evals, model_evals_parallel)
+        failed = (pts[:,0] > 0.8) & (pts[:,1] > 0.8)
+        self.assertTrue(np.all(np.isnan(model_evals_with_NaNs[failed, 0])))
+        np.testing.assert_array_equal(model_evals[~failed], model_evals_with_NaNs[~failed])
+        poly.set_model(model)
+        mean, variance = poly.get_mean_and_variance()
+        poly2 = Poly(parameters=[param, param], basis=Basis('tensor-grid'), method='numerical-integration')
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            poly2.set_model(failing_model, executor=executor)
+        mean_with_failures, variance_with_failures = poly2.get_mean_and_variance()
+        np.testing.assert_almost_equal(mean, mean_with_failures, decimal=7, err_msg='Problem!')
+        np.testing.assert_almost_equal(variance, variance_with_failures, decimal=7, err_msg='Problem!')
+
+    def test_malformed_model_values(self):
+        pts = np.random.RandomState(0).uniform(-1., 1., (10, 2))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertRaises(ValueError, evaluate_model, pts, lambda x: None, executor=executor, chunksize=3)
+            self.assertRaises(ValueError, evaluate_model, pts, lambda x: 'value', executor=executor, chunksize=3)
+            self.assertRaises(ValueError, evaluate_model, pts, lambda x: None, vectorized=True, executor=executor)
+        self.assertRaises(ValueError, evaluate_model, pts, lambda x: None)
+        self.assertRaises(ValueError, evaluate_model, pts, lambda x: x[0:1] if x[0] > 0 else x)
+
 if __name__== '__main__':
     unittest.main()
\ No newline at end of file
@@ -2,6 +2,7 @@ from unittest import TestCase
 import unittest
 from equadratures import *
 import numpy as np
+import os
 import matplotlib.pyplot as plt
 from scipy.special import erf, gamma
 N = 900000
@@ -325,6 +326,72 @@ class Test_Distributions(TestCase):
       mean, variance = myPoly.get_mean_and_variance()
       np.testing.assert_almost_equal(mean, paramtest.shape_parameter_A, decimal=2)
       np.testing.assert_almost_equal(variance, paramtest.shape_parameter_B, decimal=2)
+    def test_recurrence_coefficients_cache(self):
+      import tempfile
+      from unittest import mock
+      from equadratures.distributions import template
+      param = Parameter(distribution='gumbel', shape_parameter_A=0.5, shape_parameter_B=2.0, order=4)
+      x = param.distribution.x_range_for_pdf
+      discretised_recurrence_coefficients = template.discretised_recurrence_coefficients
+      ab = discretised_recurrence_coefficients(param.distribution.get_pdf, x[0], x[-1], 6)
+      def stieltjes(pdf, lower, upper, order):
+        raise AssertionError('The recurrence coefficients should have been read from the cache.')
+      try:
+        with tempfile.TemporaryDirectory() as cache_directory, \
+                mock.patch.dict(os.environ, {template.RECURRENCE_CACHE_VARIABLE: cache_directory}):
+          template._recurrence_coefficients_cache.clear()
+          np.testing.assert_array_equal(param.distribution.get_recurrence_coefficients(6), ab)
+          filenames = os.listdir(cache_directory)
+          self.assertEqual(len(filenames), 1)
+          # A new process only finds the coefficients on disk.
+          template._recurrence_coefficients_cache.clear()
+          template.discretised_recurrence_coefficients = stieltjes
+          np.testing.assert_array_equal(param.distribution.get_recurrence_coefficients(6), ab)
+          template.discretised_recurrence_coefficients = discretised_recurrence_coefficients
+          # Files of the wrong shape are recomputed.
+          np.save(os.path.join(cache_directory, filenames[0]), np.zeros((3, 2)))
+          template._recurrence_coefficients_cache.clear()
+          np.testing.assert_array_equal(param.distribution.get_recurrence_coefficients(6), ab)
+          other = Parameter(distribution='gumbel', shape_parameter_A=0.5, shape_parameter_B=3.0, order=4)
+          self.assertFalse(np.allclose(other.distribution.get_recurrence_coefficients(6), ab))
+          self.assertEqual(len(os.listdir(cache_directory)), 2)
+      finally:
+        template.discretised_recurrence_coefficients = discretised_recurrence_coefficients
+    def test_discretised_recurrence_coefficients(self):
+      # The recurrence coefficients of a Gaussian with mean mu and variance sigma^2 are a_n = mu, b_n = n sigma^2.
+      param = Parameter(distribution='gaussian', shape_parameter_A=1.5, shape_parameter_B=0.25, order=4)
+      ab = param.distribution.get_recurrence_coefficients(30)
+      np.testing.assert_array_almost_equal(ab[:, 0], 1.5 * np.ones(32), decimal=10)
+      np.testing.assert_array_almost_equal(ab[1:, 1] / (0.25 * np.arange(1, 32)), np.ones(31), decimal=10)
+    def test_discretised_recurrence_coefficients_support(self):
+      import warnings
+      from scipy.integrate import quad
+      from equadratures.distributions.recurrence_utils import discretised_recurrence_coefficients
+      # The density of this Pareto distribution is zero on [0.999, 1), and jumps to 3 at 1.
+      param = Parameter(distribution='pareto', shape_parameter_A=3, order=4)
+      upper = param.distribution.x_range_for_pdf[-1]
+      pdf = lambda t: param.distribution.get_pdf(np.array([t]))[0]
+      mean = quad(lambda t: t * pdf(t), 1.0, upper, limit=200)[0] / quad(pdf, 1.0, upper, limit=200)[0]
+      np.testing.assert_almost_equal(param.distribution.get_recurrence_coefficients(4)[0, 0], mean, decimal=10)
+      # A jump inside the support is not resolved by the panels, which is reported.
+      with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        discretised_recurrence_coefficients(lambda t: np.where(t < 0.3, 1.0, 2.0), 0.0, 1.0, 2)
+      self.assertTrue(any(issubclass(warning.category, RuntimeWarning) for warning in caught))
+    def test_discretised_recurrence_coefficients_singular_endpoint(self):
+      import warnings
+      from equadratures.distributions.recurrence_utils import discretised_recurrence_coefficients, custom_recurrence_coefficients
+      # The chi-squared density with k=1 is unbounded at zero. Substituting x = s^2 gives a smooth density in s for reference.
+      param = Parameter(distribution='chi-squared', shape_parameter_A=1, order=4)
+      pdf = param.distribution.get_pdf
+      s, w = np.polynomial.legendre.leggauss(400)
+      s, w = 0.5 * np.sqrt(10.) * (s + 1.), 0.5 * np.sqrt(10.) * w
+      ab_reference = custom_recurrence_coefficients(s**2, pdf(s**2) * 2. * s * w, 6)
+      with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        ab = discretised_recurrence_coefficients(pdf, 0., 10., 6)
+      self.assertFalse(any(issubclass(warning.category, RuntimeWarning) for warning in caught))
+      np.testing.assert_array_almost_equal(ab, ab_reference, decimal=10)
     def test_custom2(self):
       a = 3.
       b = 6.
@@ -6,6 +6,10 @@ def fun(x):
     return np.exp(2*x[0] + x[1])
 def gradfun(x):
     return [2*np.exp(2*x[0] + x[1]), np.exp(2*x[0] + x[1])]
+def fun_vectorized(X):
+    return np.exp(2*X[:,0] + X[:,1])
+def gradfun_vectorized(X):
+    return np.vstack([2*np.exp(2*X[:,0] + X[:,1]), np.exp(2*X[:,0] + X[:,1])]).T
 class TestC(TestCase):
     def test_over_and_under_sampling(self):
         x1 = Parameter(distribution='Uniform', order=9, lower=-1., upper=1.)
@@ -47,5 +51,20 @@ class TestC(TestCase):
             sampling_args={'mesh':'user-defined', 'sample-points': sample_points, 'sample-outputs': sample_outputs, 'sample-gradients': sample_grads})
         OBJECT2.set_model(fun, gradfun)
         coefficients = OBJECT.get_coefficients()
+    def test_vectorized_model_evaluations(self):
+        x1 = Parameter(distribution='Uniform', order=5, lower=-1., upper=1.)
+        x2 = Parameter(distribution='Uniform', order=5, lower=-1., upper=1.)
+        pts = np.random.RandomState(0).uniform(-1., 1., (50, 2))
+        np.testing.assert_array_almost_equal(evaluate_model(pts, fun), evaluate_model(pts, fun_vectorized, vectorized=True), decimal=12)
+        np.testing.assert_array_almost_equal(evaluate_model_gradients(pts, gradfun, 'matrix'), \
+                evaluate_model_gradients(pts, gradfun_vectorized, 'matrix', vectorized=True), decimal=12)
+        np.testing.assert_array_almost_equal(evaluate_model_gradients(pts, gradfun, 'vector'), \
+                evaluate_model_gradients(pts, gradfun_vectorized, 'vector', vectorized=True), decimal=12)
+        OBJECT = Poly(parameters=[x1, x2], basis=Basis('total-order'), method='least-squares-with-gradients')
+        OBJECT.set_model(fun, gradfun)
+        coefficients = OBJECT.get_coefficients()
+        OBJECT.set_model(fun_vectorized, gradfun_vectorized, vectorized=True)
+        coefficients_vectorized = OBJECT.get_coefficients()
+        np.testing.assert_array_almost_equal(coefficients, coefficients_vectorized, decimal=10)
 if __name__== '__main__':
     unittest.main()
\ No newline at end of file
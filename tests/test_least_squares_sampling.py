@@ -1,6 +1,7 @@
 from unittest import TestCase
 import unittest
 from equadratures import *
+from equadratures.poly import cell2matrix
 import numpy as np
 def fun(x):
     a = 1.0
@@ -72,5 +73,44 @@ class TestC(TestCase):
         G3 = np.dot(A3.T, A3)
         cond_number = np.linalg.cond(G3)
         np.testing.assert_array_less(cond_number, 200.0)
+    def test_row_weighted_design_matrix(self):
+        zeta_1 = Parameter(distribution='uniform', order=4, lower= -2.0, upper=2.0)
+        zeta_2 = Parameter(distribution='uniform', order=4, lower=-1.0, upper=3.0)
+        myPoly = Poly([zeta_1, zeta_2], Basis('total-order'), method='least-squares', \
+            sampling_args={'mesh':'tensor-grid', 'subsampling-algorithm':'newton', 'sampling-ratio':1.0})
+        pts, wts = myPoly.quadrature.get_points_and_weights()
+        P = myPoly.get_poly(pts)
+        self.assertIs(type(myPoly.A), np.ndarray)
+        np.testing.assert_array_almost_equal(myPoly.A, np.dot(np.diag(np.sqrt(wts)), P.T), decimal=12)
+        self.assertEqual(len(myPoly.get_points()), myPoly.basis.cardinality)
+        dP = myPoly.get_poly_grad(pts)
+        C = cell2matrix(dP, np.sqrt(wts))
+        np.testing.assert_array_almost_equal(C, np.vstack([np.dot(np.diag(np.sqrt(wts)), dP_i.T) for dP_i in dP]), decimal=12)
+    def test_add_and_remove_samples(self):
+        np.random.seed(3)
+        params = [Parameter(distribution='uniform', order=3, lower=-1.0, upper=1.0) for _ in range(3)]
+        X = np.random.uniform(-1.0, 1.0, (120, 3))
+        y = np.exp(X[:,0:1]) * np.sin(X[:,1:2]) + X[:,2:3]**2
+        myPoly = Poly(params, Basis('total-order'), method='least-squares', \
+            sampling_args={'mesh':'user-defined', 'sample-points':X[:80], 'sample-outputs':y[:80]})
+        myPoly.set_model()
+        mean_before, _ = myPoly.get_mean_and_variance()
+        myPoly.add_samples(X[80:100], y[80:100])
+        myPoly.add_samples(X[100:], y[100:])
+        self.assertIsNone(myPoly.statistics_object)
+        myPoly2 = Poly(params, Basis('total-order'), method='least-squares', \
+            sampling_args={'mesh':'user-defined', 'sample-points':X, 'sample-outputs':y})
+        myPoly2.set_model()
+        np.testing.assert_array_almost_equal(myPoly.get_coefficients(), myPoly2.get_coefficients(), decimal=10)
+        np.testing.assert_array_almost_equal(myPoly.get_weights(), myPoly2.get_weights(), decimal=12)
+        np.testing.assert_array_almost_equal(myPoly.get_mean_and_variance(), myPoly2.get_mean_and_variance(), decimal=10)
+        myPoly.remove_samples(np.arange(80, 120))
+        myPoly3 = Poly(params, Basis('total-order'), method='least-squares', \
+            sampling_args={'mesh':'user-defined', 'sample-points':X[:80], 'sample-outputs':y[:80]})
+        myPoly3.set_model()
+        np.testing.assert_array_almost_equal(myPoly.get_coefficients(), myPoly3.get_coefficients(), decimal=10)
+        np.testing.assert_array_almost_equal(myPoly.get_mean_and_variance()[0], mean_before, decimal=10)
+        with self.assertRaises(ValueError):
+            myPoly.remove_samples(np.arange(0, 70))
 if __name__== '__main__':
     unittest.main()
\ No newline at end of file
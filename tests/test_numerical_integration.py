@@ -1,6 +1,7 @@
 from unittest import TestCase
 import unittest
 from equadratures import *
+from equadratures.sampling_methods.tensorgrid import LazyTensorgrid
 import numpy as np
 def model(x):
     return np.exp(10*x[0] + x[1])
@@ -34,6 +35,72 @@ class TestA(TestCase):
         mean, variance = poly.get_mean_and_variance()
         np.testing.assert_almost_equal(mean, 1294.276442022, decimal=3,err_msg='Problem!')
         np.testing.assert_almost_equal(variance, 20320178.96583, decimal=3, err_msg='Problem!')
+    def test_sparse_grid_tensor_point_indices(self):
+        param = Parameter(distribution='uniform', lower=-1., upper=1., order=5)
+        basis = Basis('sparse-grid', level=3, growth_rule='linear')
+        poly = Poly(parameters=[param, param, param], basis=basis, method='numerical-integration')
+        pts = poly.get_points()
+        for tensor, indices in zip(poly.quadrature.list, poly.quadrature.tensor_point_indices):
+            np.testing.assert_array_almost_equal(pts[indices], tensor.points, decimal=12)
+        self.assertEqual(len(pts), len(np.unique(np.round(pts, 10), axis=0)))
+    def test_sparse_grid_point_merging(self):
+        from equadratures.sampling_methods.sparsegrid import _get_point_keys, SPARSE_GRID_POINT_TOLERANCE
+        # The first two points straddle x / tolerance = 0.5, but differ by much less than the tolerance.
+        boundary = 0.5 * SPARSE_GRID_POINT_TOLERANCE
+        points = np.array([[boundary - 1e-16, 0.3], [boundary + 1e-16, 0.3], [0.7, 0.3], [boundary, 0.3 + 1e-6]])
+        keys = _get_point_keys(points, SPARSE_GRID_POINT_TOLERANCE)
+        np.testing.assert_array_equal(keys[0], keys[1])
+        self.assertEqual(len(np.unique(keys, axis=0)), 3)
+    def test_sum_factorised_coefficients(self):
+        param1 = Parameter(distribution='uniform', lower=-1., upper=2., order=4)
+        param2 = Parameter(distribution='gaussian', shape_parameter_A=1., shape_parameter_B=2., order=3)
+        param3 = Parameter(distribution='beta', lower=0., upper=1., shape_parameter_A=2., shape_parameter_B=3., order=5)
+        for basis in [Basis('tensor-grid'), Basis('total-order')]:
+            poly = Poly(parameters=[param1, param2, param3], basis=basis, method='numerical-integration', sampling_args={'mesh':'tensor-grid'})
+            pts, wts = poly.get_points_and_weights()
+            model_evals = evaluate_model(pts, model2)
+            poly.set_model(model_evals)
+            # The dense polynomial and design matrices are never assembled on the sum-factorised path.
+            self.assertIsNone(poly._P)
+            self.assertIsNone(poly._A)
+            coefficients_dense = np.dot(poly.get_poly(pts) * wts, model_evals)
+            np.testing.assert_array_almost_equal(poly.get_coefficients(), coefficients_dense, decimal=12)
+    def test_lazy_tensor_grid(self):
+        param1 = Parameter(distribution='uniform', lower=-1., upper=1., order=3)
+        param2 = Parameter(distribution='gaussian', shape_parameter_A=0., shape_parameter_B=1., order=4)
+        poly = Poly(parameters=[param1, param2, param1], basis=Basis('tensor-grid'), method='numerical-integration')
+        pts, wts = poly.get_points_and_weights()
+        grid = LazyTensorgrid([param1, param2, param1], orders=[3, 4, 3])
+        self.assertEqual(len(grid), pts.shape[0])
+        np.testing.assert_array_equal(grid.get_points(), pts)
+        np.testing.assert_array_equal(grid.get_weights(), wts)
+        np.testing.assert_array_equal(grid.get_points([7, 3, -1]), pts[[7, 3, -1], :])
+        np.testing.assert_array_equal(grid.get_weights(slice(10, 30, 3)), wts[10:30:3])
+        chunks = list(grid.get_chunks(chunksize=17))
+        np.testing.assert_array_equal(np.vstack([chunk[0] for chunk in chunks]), pts)
+        np.testing.assert_array_equal(np.concatenate([chunk[1] for chunk in chunks]), wts)
+        values = np.random.RandomState(0).rand(len(grid))
+        transform = np.random.RandomState(1).rand(2, 5)
+        transformed = grid.apply_along_axis(grid.get_tensor(values), transform, axis=1)
+        kron_transform = np.kron(np.kron(np.eye(4), transform), np.eye(4))
+        np.testing.assert_array_almost_equal(transformed.reshape(-1), np.dot(kron_transform, values), decimal=12)
+    def test_lazy_tensor_grid_sampling(self):
+        from equadratures.quadrature import Quadrature
+        param1 = Parameter(distribution='uniform', lower=-1., upper=1., order=3)
+        param2 = Parameter(distribution='gaussian', shape_parameter_A=0., shape_parameter_B=1., order=4)
+        quadrature = Quadrature(parameters=[param1, param2], basis=Basis('tensor-grid', orders=[3, 4]), mesh='tensor-grid', points=None)
+        self.assertIsNone(quadrature.samples._points)
+        self.assertIsNone(quadrature.samples._weights)
+        pts, wts = quadrature.get_points_and_weights()
+        np.testing.assert_array_equal(pts, quadrature.samples.tensor_rule.get_points())
+        np.testing.assert_array_equal(wts, quadrature.samples.tensor_rule.get_weights())
+        # The statistics quadrature is evaluated over the chunks of the tensor rule.
+        poly = Poly(parameters=[param1, param2], basis=Basis('total-order'), method='least-squares')
+        grid = LazyTensorgrid([param1, param2], orders=[4, 5])
+        grid_pts, grid_wts, P = poly._get_poly_on_tensor_grid(grid)
+        np.testing.assert_array_equal(grid_pts, grid.get_points())
+        np.testing.assert_array_equal(grid_wts, grid.get_weights())
+        np.testing.assert_array_almost_equal(P, poly.get_poly(grid_pts), decimal=12)
     def test_univariate_quadrature_rules(self):
         param = Parameter(distribution='uniform', lower=-1., upper=1., order=20, endpoints='both')
         basis = Basis('univariate')
@@ -13,5 +13,26 @@ class TestParameter(TestCase):
         myparameter2 = Parameter(lower=250., upper=300., variable='horsepower')
         np.testing.assert_equal(myparameter2.variable, 'horsepower')
 
+    def test_recurrence_coefficients_cache(self):
+        myparameter = Parameter(distribution='logistic', shape_parameter_A=0., shape_parameter_B=1., order=4)
+        ab = myparameter.get_recurrence_coefficients(5)
+        ab[:] = 0.0 # Modifying the returned coefficients must not corrupt the cache.
+        np.testing.assert_array_equal(myparameter.get_recurrence_coefficients(5), \
+                myparameter.distribution.get_recurrence_coefficients(5))
+        for order in range(0, 40):
+            myparameter.get_recurrence_coefficients(order)
+        self.assertTrue(len(myparameter._recurrence_coefficients_cache) <= 16)
+
+    def test_orthogonal_polynomial_derivatives(self):
+        myparameter = Parameter(distribution='uniform', lower=-1., upper=1., order=4)
+        points = np.linspace(-1., 1., 11)
+        p, dp, d2p = myparameter._get_orthogonal_polynomial(points)
+        p0, dp0, d2p0 = myparameter._get_orthogonal_polynomial(points, derivatives=0)
+        p1, dp1, d2p1 = myparameter._get_orthogonal_polynomial(points, derivatives=1)
+        np.testing.assert_array_equal(p, p0)
+        np.testing.assert_array_equal(dp, dp1)
+        self.assertIsNone(dp0)
+        self.assertIsNone(d2p1)
+
 if __name__== '__main__':
     unittest.main()
\ No newline at end of file
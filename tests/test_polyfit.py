@@ -0,0 +1,77 @@
+from unittest import TestCase
+import unittest
+from equadratures import *
+import numpy as np
+import os
+import tempfile
+def fun(x):
+    return np.exp(x[0] + 0.5*x[1]) * np.sin(x[2])
+class TestPolyfit(TestCase):
+    def setUp(self):
+        param = Parameter(distribution='uniform', lower=-1., upper=1., order=4)
+        self.poly = Poly(parameters=[param, param, param], basis=Basis('total-order'), method='least-squares')
+        self.poly.set_model(fun)
+        self.X = np.random.RandomState(0).uniform(-1., 1., (1000, 3))
+    def test_blocked_polyfit(self):
+        N = len(self.poly.get_coefficients())
+        y_dense = np.dot(self.poly.get_poly(self.X).T, self.poly.get_coefficients().reshape(N, 1))
+        np.testing.assert_array_almost_equal(self.poly.get_polyfit(self.X), y_dense, decimal=12)
+        np.testing.assert_array_almost_equal(self.poly.get_polyfit(self.X, block_size=7), y_dense, decimal=12)
+        out = np.zeros((1000, 1))
+        y_out = self.poly.get_polyfit(self.X, out=out, block_size=64)
+        self.assertTrue(y_out is out)
+        np.testing.assert_array_almost_equal(out, y_dense, decimal=12)
+        np.testing.assert_array_almost_equal(self.poly.get_polyfit(self.X[0,:]), y_dense[0:1], decimal=12)
+        with self.assertRaises(ValueError):
+            self.poly.get_polyfit(self.X, out=np.zeros((999, 1)))
+    def test_compact_hessian(self):
+        hess = self.poly.get_polyfit_hess(self.X[0:100,:])
+        hess_compact = self.poly.get_polyfit_hess(self.X[0:100,:], compact=True)
+        rows, cols = np.triu_indices(3)
+        self.assertEqual(hess_compact.shape, (100, 6))
+        np.testing.assert_array_almost_equal(hess[rows, cols, :].T, hess_compact, decimal=12)
+        np.testing.assert_array_almost_equal(hess, np.transpose(hess, (1, 0, 2)), decimal=12)
+        H = self.poly.get_poly_hess(self.X[0:100,:])
+        H_compact = self.poly.get_poly_hess(self.X[0:100,:], compact=True)
+        for i in range(0, len(rows)):
+            np.testing.assert_array_almost_equal(H[rows[i] * 3 + cols[i]], H_compact[i], decimal=12)
+            np.testing.assert_array_almost_equal(H[cols[i] * 3 + rows[i]], H_compact[i], decimal=12)
+        # The symmetric entries are independent arrays.
+        H[1][:] = 0.0
+        np.testing.assert_array_almost_equal(H[3], H_compact[1], decimal=12)
+    def test_polyfit_chunks(self):
+        y = self.poly.get_polyfit(self.X)
+        y_chunks = np.vstack(list(self.poly.get_polyfit_chunks(self.X, chunksize=300)))
+        np.testing.assert_array_almost_equal(y, y_chunks, decimal=12)
+        y_chunks = np.vstack(list(self.poly.get_polyfit_chunks(iter(np.array_split(self.X, 4)))))
+        np.testing.assert_array_almost_equal(y, y_chunks, decimal=12)
+        grads = np.hstack(list(self.poly.get_polyfit_chunks(self.X, chunksize=300, output='grad')))
+        np.testing.assert_array_almost_equal(self.poly.get_polyfit_grad(self.X), grads, decimal=12)
+        with tempfile.TemporaryDirectory() as directory:
+            points_file = os.path.join(directory, 'points.npy')
+            np.save(points_file, self.X)
+            y_file = self.poly.save_polyfit(points_file, os.path.join(directory, 'y.npy'), chunksize=128)
+            np.testing.assert_array_almost_equal(y, y_file, decimal=12)
+            hess_file = self.poly.save_polyfit(self.X[0:50,:], os.path.join(directory, 'hess.npy'), chunksize=16, output='hess')
+            np.testing.assert_array_almost_equal(self.poly.get_polyfit_hess(self.X[0:50,:]), hess_file, decimal=12)
+            del y_file, hess_file
+    def test_multiple_outputs(self):
+        funs = [fun, lambda x: x[0]**2 * x[1] - x[2]]
+        param = Parameter(distribution='uniform', lower=-1., upper=1., order=4)
+        poly = Poly(parameters=[param, param, param], basis=Basis('total-order'), method='least-squares')
+        poly.set_model(lambda x: np.array([f(x) for f in funs]))
+        self.assertEqual(poly.get_coefficients().shape, (poly.basis.cardinality, 2))
+        means, variances = poly.get_mean_and_variance()
+        sobol = poly.get_sobol_indices(1)
+        for k in range(0, 2):
+            single = Poly(parameters=[param, param, param], basis=Basis('total-order'), method='least-squares')
+            single.set_model(funs[k])
+            np.testing.assert_array_almost_equal(poly.get_coefficients()[:, k:k+1], single.get_coefficients(), decimal=12)
+            np.testing.assert_array_almost_equal(poly.get_polyfit(self.X)[:, k:k+1], single.get_polyfit(self.X), decimal=12)
+            mean, variance = single.get_mean_and_variance()
+            np.testing.assert_almost_equal(means[k], mean, decimal=12)
+            np.testing.assert_almost_equal(variances[k], variance, decimal=12)
+            for key, value in single.get_sobol_indices(1).items():
+                np.testing.assert_almost_equal(sobol[key][k], value, decimal=12)
+if __name__== '__main__':
+    unittest.main()
@@ -203,6 +203,102 @@ class TestC(TestCase):
 
         np.testing.assert_array_almost_equal(y_std.mean(), 0.682095574, decimal=5, err_msg='Problem!')
 
+    def test_cached_least_squares(self):
+        from equadratures.solver import LeastSquaresSolver
+        rng = np.random.RandomState(0)
+        solver = LeastSquaresSolver(cache_size=2)
+        for shape in [(60, 10), (8, 10)]:
+            A = rng.rand(*shape)
+            for b in [rng.rand(shape[0]), rng.rand(shape[0], 3)]:
+                np.testing.assert_array_almost_equal(solver.solve(A, b), np.linalg.lstsq(A, b, rcond=None)[0], decimal=10)
+                np.testing.assert_array_almost_equal(solver.solve(A.copy(), b), np.linalg.lstsq(A, b, rcond=None)[0], decimal=10)
+            np.testing.assert_almost_equal(solver.get_condition_number(A), np.linalg.cond(A), decimal=6)
+        self.assertEqual(len(solver._factorisations), 2)
+        A[:, 1] = A[:, 0]
+        np.testing.assert_array_almost_equal(solver.solve(A, b), np.linalg.lstsq(A, b, rcond=None)[0], decimal=10)
+        # Changing a single entry in place changes the fingerprint, so the factorisation is recomputed.
+        A = rng.rand(60, 10)
+        b = rng.rand(60)
+        solver.solve(A, b)
+        A[0, 0] += 1e-3
+        np.testing.assert_array_almost_equal(solver.solve(A, b), np.linalg.lstsq(A, b, rcond=None)[0], decimal=10)
+    def test_relevance_vector_machine(self):
+        from equadratures.solver import _get_rvm_posterior
+        rng = np.random.RandomState(0)
+        A = rng.standard_normal((50, 8))
+        b = rng.standard_normal(50)
+        alpha, alpha_0 = rng.rand(8) + 0.5, 2.0
+        Sigma = np.linalg.inv(alpha_0 * A.T @ A + np.diag(alpha))
+        Sigma_diag, mu, logdet_H = _get_rvm_posterior(A.T @ A, A.T @ b, alpha, alpha_0)
+        np.testing.assert_array_almost_equal(Sigma_diag, np.diag(Sigma), decimal=12)
+        np.testing.assert_array_almost_equal(mu, alpha_0 * Sigma @ A.T @ b, decimal=12)
+        C = np.eye(50) / alpha_0 + A @ np.diag(1.0 / alpha) @ A.T
+        np.testing.assert_almost_equal(logdet_H - 50 * np.log(alpha_0) - np.sum(np.log(alpha)), np.linalg.slogdet(C)[1], decimal=8)
+        X = rng.uniform(-1, 1, (200, 2))
+        y = 1.0 + 0.5 * X[:, 0] - 0.3 * X[:, 0] * X[:, 1] + 1e-3 * rng.standard_normal(200)
+        param = Parameter(distribution='uniform', lower=-1., upper=1., order=4)
+        poly = Poly([param, param], Basis('total-order'), method='relevance-vector-machine', \
+                sampling_args={'mesh': 'user-defined', 'sample-points': X, 'sample-outputs': y.reshape(-1, 1)})
+        poly.set_model()
+        np.testing.assert_array_almost_equal(poly.get_polyfit(X).flatten(), y, decimal=2)
+        self.assertEqual(np.sum(np.abs(poly.get_coefficients()) > 1e-2), 3)
+        # Noiseless data that the basis represents exactly: unused terms (mu = 0) are pruned rather than given infinite precision.
+        y = 1.0 + 0.5 * X[:, 0] - 0.3 * X[:, 0] * X[:, 1]
+        poly = Poly([param, param], Basis('total-order'), method='relevance-vector-machine', \
+                sampling_args={'mesh': 'user-defined', 'sample-points': X, 'sample-outputs': y.reshape(-1, 1)})
+        poly.set_model()
+        np.testing.assert_array_almost_equal(poly.get_polyfit(X).flatten(), y, decimal=10)
+        self.assertEqual(np.sum(poly.get_coefficients() != 0.0), 3)
+    def test_ElasticNet_coordinate_descent(self):
+        from equadratures.solver import elastic_net
+        rng = np.random.RandomState(0)
+        A = rng.standard_normal((100, 30))
+        x = np.zeros(30)
+        x[[2, 5, 11]] = [1.0, -2.0, 0.5]
+        b = np.dot(A, x) + 0.05 * rng.standard_normal(100)
+        for lamda, alpha in [(5.0, 1.0), (2.0, 0.5), (10.0, 0.0)]:
+            x_cd = elastic_net(A, b.reshape(-1, 1), False, lamda, alpha, 'coordinate-descent').flatten()
+            gradient = np.dot(A.T, b - np.dot(A, x_cd)) - lamda * (1.0 - alpha) * x_cd
+            active = x_cd != 0.0
+            np.testing.assert_array_almost_equal(gradient[active], lamda * alpha * np.sign(x_cd[active]), decimal=3)
+            np.testing.assert_array_less(np.abs(gradient[~active]), lamda * alpha + 1e-3)
+        x_cv = elastic_net(A, b, False, 'cv', 1.0, 'coordinate-descent').flatten()
+        np.testing.assert_array_almost_equal(x_cv, x, decimal=1)
+        # By default, lamda is 1.0 whatever the optimiser.
+        np.testing.assert_array_equal(elastic_net(A, b, False, None, 1.0, 'coordinate-descent'), \
+                elastic_net(A, b, False, 1.0, 1.0, 'coordinate-descent'))
+        poly = Poly([Parameter(distribution='uniform', lower=-1., upper=1., order=3)], Basis('univariate'), method='elastic-net', \
+                sampling_args={'mesh': 'user-defined', 'sample-points': np.linspace(-1, 1, 40).reshape(-1, 1), \
+                'sample-outputs': np.linspace(-1, 1, 40).reshape(-1, 1)}, solver_args={'param1': 1e-6, 'optimiser': 'coordinate-descent'})
+        poly.set_model()
+        np.testing.assert_array_almost_equal(poly.get_polyfit(np.array([[0.5]])), [[0.5]], decimal=4)
+        for opt in ['scipy', 'irls']:
+            with self.assertRaisesRegex(ValueError, 'osqp or coordinate-descent'):
+                elastic_net(A, b, False, 1.0, 1.0, opt)
+        from equadratures.solver import cvxpy
+        if not cvxpy:
+            with self.assertRaisesRegex(ValueError, 'cvxpy must be installed'):
+                elastic_net(A, b, False, 1.0, 1.0, 'osqp')
+    def test_irls(self):
+        from equadratures.solver import least_absolute_residual, huber
+        from scipy.special import huber as huber_loss
+        rng = np.random.RandomState(0)
+        A = rng.standard_normal((300, 6))
+        b = np.dot(A, rng.standard_normal(6)) + 0.1 * rng.standard_normal(300)
+        b[0:30] += 10.0 * rng.standard_normal(30)
+        x_irls = least_absolute_residual(A, b.reshape(-1, 1), False, 'irls')
+        x_lp = least_absolute_residual(A, b.reshape(-1, 1), False, 'scipy')
+        np.testing.assert_almost_equal(np.sum(np.abs(np.dot(A, x_irls) - b)), np.sum(np.abs(np.dot(A, x_lp) - b)), decimal=5)
+        np.testing.assert_array_almost_equal(x_irls, x_lp, decimal=5)
+        x_huber = huber(A, b.reshape(-1, 1), False, 0.5, 'irls')
+        gradient = np.dot(A.T, np.clip(np.dot(A, x_huber) - b, -0.5, 0.5))
+        np.testing.assert_array_almost_equal(gradient, np.zeros(6), decimal=4)
+        self.assertLess(np.sum(huber_loss(0.5, np.dot(A, x_huber) - b)), np.sum(huber_loss(0.5, np.dot(A, x_lp) - b)))
+        # Without cvxpy, least-absolute-residual still defaults to the linear program.
+        from equadratures.solver import Solver, cvxpy
+        if not cvxpy:
+            self.assertEqual(Solver('least-absolute-residual', None).opt, 'scipy')
+
 if __name__== '__main__':
     unittest.main()
 
@@ -1,6 +1,7 @@
 from unittest import TestCase
 import unittest
 from equadratures import *
+from equadratures.quadrature import Quadrature
 import numpy as np
 from scipy.stats import skew, kurtosis
 
@@ -82,6 +83,56 @@ class TestD(TestCase):
         np.testing.assert_almost_equal(condkurt2[(1, 2)], 0.008413, decimal=5)
         np.testing.assert_almost_equal(condkurt3[(0,1,2)], 0.006924, decimal=5)
         np.testing.assert_almost_equal(condkurt3[(1,2,3)], 0.137596, decimal=5)
+    def test_conditional_indices_sum_to_one(self):
+        params = [Parameter(order=3, distribution='uniform', lower=-1, upper=1) for _ in range(3)]
+        poly = Poly(params, Basis('tensor-grid'), method='numerical-integration')
+        poly.set_model(lambda x: np.exp(0.5 * x[0] + x[1] * x[2]) + x[0]**2 * x[2])
+        skewness_indices = [poly.get_conditional_skewness_indices(order) for order in range(1, 4)]
+        kurtosis_indices = [poly.get_conditional_kurtosis_indices(order) for order in range(1, 4)]
+        self.assertEqual(len(skewness_indices[1]), 3)
+        np.testing.assert_almost_equal(sum(sum(indices.values()) for indices in skewness_indices), 1.0, decimal=8)
+        np.testing.assert_almost_equal(sum(sum(indices.values()) for indices in kurtosis_indices), 1.0, decimal=8)
+    def test_lazy_statistics(self):
+        params = [Parameter(order=3, distribution='uniform', lower=-1, upper=1) for _ in range(2)]
+        poly = Poly(params, Basis('total-order'), method='least-squares')
+        poly.set_model(lambda x: np.exp(x[0]) + x[0] * x[1]**2)
+        calls = []
+        get_quadrature = poly._get_statistics_quadrature
+        def quadrature():
+            calls.append(1)
+            return get_quadrature()
+        poly._get_statistics_quadrature = quadrature
+        mean, variance = poly.get_mean_and_variance()
+        poly.get_sobol_indices(1)
+        poly.get_total_sobol_indices()
+        self.assertEqual(len(calls), 0)
+        np.testing.assert_almost_equal(mean, poly.get_coefficients()[0, 0])
+        skewness, kurtosis = poly.get_skewness_and_kurtosis()
+        poly.get_conditional_skewness_indices(1)
+        poly.get_conditional_kurtosis_indices(2)
+        self.assertEqual(len(calls), 1)
+        quad_pts, quad_wts, polynomial_matrix = get_quadrature()
+        total_evals = np.dot(poly.get_coefficients()[1:].T, polynomial_matrix[1:]).flatten()
+        np.testing.assert_almost_equal(skewness, np.dot(total_evals**3, quad_wts) / variance**1.5, decimal=10)
+        statistics = Statistics(params, poly.basis, poly.get_coefficients())
+        np.testing.assert_almost_equal(statistics.get_skewness(), skewness, decimal=10)
+        self.assertRaises(ValueError, statistics.get_conditional_skewness, 1)
+    def test_closed_form_moments(self):
+        np.random.seed(1)
+        for distribution, shape_parameters in [('uniform', {'lower': -1., 'upper': 1.}), \
+                ('gaussian', {'shape_parameter_A': 0.3, 'shape_parameter_B': 1.5}), \
+                ('beta', {'lower': 0., 'upper': 2., 'shape_parameter_A': 2., 'shape_parameter_B': 3.})]:
+            params = [Parameter(distribution=distribution, order=3, **shape_parameters) for _ in range(3)]
+            basis = Basis('total-order', orders=[3, 3, 3])
+            coefficients = np.random.randn(basis.get_cardinality(), 2)
+            quad_params = [Parameter(distribution=distribution, order=6, **shape_parameters) for _ in range(3)]
+            quad_pts, quad_wts = Quadrature(parameters=quad_params, basis=Basis('tensor-grid', orders=[6, 6, 6]), \
+                    mesh='tensor-grid', points=None).get_points_and_weights()
+            polynomial_matrix = Poly(params, basis, method='least-squares').get_poly(quad_pts)
+            closed_form = Statistics(params, basis, coefficients)
+            quadrature = Statistics(params, basis, coefficients, quad_pts, quad_wts, polynomial_matrix)
+            np.testing.assert_array_almost_equal(closed_form.get_skewness(), quadrature.get_skewness(), decimal=10)
+            np.testing.assert_array_almost_equal(closed_form.get_kurtosis(), quadrature.get_kurtosis(), decimal=10)
     def test_total_sobol_indices(self):
         order_parameters = 3
         mass = Parameter(distribution='uniform', lower=30.0, upper=60.0, order=order_parameters)
@@ -109,5 +160,23 @@ class TestD(TestCase):
         all_indices = pistonmodel.get_total_sobol_indices()
         np.testing.assert_array_less(all_indices[0], all_indices[1])
         pistonmodel.get_summary('piston_model.txt')
+    def test_sobol_indices_by_support(self):
+        from equadratures.stats import private_get_all_sobol_indices, private_get_total_sobol_indices
+        elements = np.array([[0, 0, 0], [1, 0, 0], [2, 0, 0], [0, 1, 0], [1, 1, 0], [0, 2, 1], [1, 1, 1]])
+        coefficients = np.array([5.0, 1.0, 2.0, 1.0, 1.0, 2.0, 1.0]).reshape(-1, 1)
+        sobol = private_get_all_sobol_indices(coefficients, elements, None)
+        self.assertEqual(len(sobol), 7)
+        np.testing.assert_almost_equal(sobol[(0,)], 5.0 / 12.0)
+        np.testing.assert_almost_equal(sobol[(1,)], 1.0 / 12.0)
+        np.testing.assert_almost_equal(sobol[(2,)], 0.0)
+        np.testing.assert_almost_equal(sobol[(1, 2)], 4.0 / 12.0)
+        np.testing.assert_almost_equal(sobol[(0, 1, 2)], 1.0 / 12.0)
+        np.testing.assert_array_almost_equal(private_get_total_sobol_indices(coefficients, elements, None), \
+                np.array([7.0, 7.0, 5.0]) / 12.0)
+        np.testing.assert_array_almost_equal(private_get_total_sobol_indices(coefficients, elements, 2), \
+                np.array([6.0, 6.0, 4.0]) / 12.0)
+        outputs = private_get_all_sobol_indices(np.hstack([coefficients, 2.0 * coefficients[::-1]]), elements, 2)
+        self.assertEqual(len(outputs), 6)
+        np.testing.assert_array_almost_equal(outputs[(0,)], [5.0 / 12.0, 5.0 / 36.0])
 if __name__== '__main__':
     unittest.main()
\ No newline at end of file